@@ -0,0 +1,83 @@
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+
+The vectorized geodesic solutions of the geographiclib bundled in ext-libs.
+They are not part of the geographiclib that QGIS provides from QGIS 3.12 and
+they rely on the internals of the bundled version, so the bundled package is
+loaded here under its own name whenever a different geographiclib is in use.
+The functions take the Geodesic and GeodesicLine objects of either version
+and compute with the bundled classes. They can only be called when available
+is True, which requires numpy. Nothing in this module may import QGIS so that
+it can be used by the worker processes of shapeWorkers.
+"""
+import os
+import sys
+from functools import lru_cache
+from importlib import import_module
+from importlib.util import module_from_spec, spec_from_file_location
+
+BUNDLED_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ext-libs', 'geographiclib')
+
+def _bundledGeographiclib():
+    '''Return the bundled geographiclib package. It is the geographiclib in
+    use when QGIS does not provide one, otherwise it is loaded from ext-libs
+    as a separate package.'''
+    import geographiclib
+    if os.path.dirname(os.path.abspath(geographiclib.__file__)) == BUNDLED_PATH:
+        return geographiclib
+    name = __name__ + '_geographiclib'
+    if name not in sys.modules:
+        spec = spec_from_file_location(
+            name, os.path.join(BUNDLED_PATH, '__init__.py'), submodule_search_locations=[BUNDLED_PATH])
+        package = module_from_spec(spec)
+        sys.modules[name] = package
+        spec.loader.exec_module(package)
+    return sys.modules[name]
+
+try:
+    _package = _bundledGeographiclib()
+    _array = import_module(_package.__name__ + '.geodesicarray')
+    _Geodesic = import_module(_package.__name__ + '.geodesic').Geodesic
+    _GeodesicLine = import_module(_package.__name__ + '.geodesicline').GeodesicLine
+    available = True
+except ImportError:
+    # numpy is not available so only the scalar solutions can be used
+    available = False
+
+@lru_cache(maxsize=8)
+def _ellipsoid(a, f):
+    return _Geodesic(a, f)
+
+def _geodesic(geodesic):
+    '''Return geodesic as an instance of the bundled Geodesic class.'''
+    if isinstance(geodesic, _Geodesic):
+        return geodesic
+    return _ellipsoid(geodesic.a, geodesic.f)
+
+def DirectFan(geodesic, lat1, lon1, azi1, s12, outmask):
+    return _array.DirectFan(_geodesic(geodesic), lat1, lon1, azi1, s12, outmask)
+
+def DirectArray(geodesic, lat1, lon1, azi1, s12, outmask):
+    return _array.DirectArray(_geodesic(geodesic), lat1, lon1, azi1, s12, outmask)
+
+def InverseArray(geodesic, lat1, lon1, lat2, lon2, outmask):
+    return _array.InverseArray(_geodesic(geodesic), lat1, lon1, lat2, lon2, outmask)
+
+def Positions(line, s12, outmask):
+    if not isinstance(line, _GeodesicLine):
+        line = _geodesic(line).Line(line.lat1, line.lon1, line.azi1, line.caps)
+    return _array.Positions(line, s12, outmask)
+
+def Polygon(geodesic, polyline=False):
+    '''Return a PolygonArea of the bundled version, which AddPoints requires.'''
+    return _geodesic(geodesic).Polygon(polyline)
+
+def AddPoints(poly, lats, lons):
+    _array.AddPoints(poly, lats, lons)
@@ -14,7 +14,7 @@ import math
 from qgis.PyQt.QtCore import Qt
 from qgis.PyQt.QtGui import QColor
 from qgis.PyQt.QtWidgets import QDialog
-from qgis.PyQt.uic import loadUiType
+from qgis.PyQt.uic import loadUi
 from qgis.core import Qgis, QgsCoordinateTransform, QgsFeature, QgsGeometry, QgsProject, QgsWkbTypes, QgsSettings
 from qgis.gui import QgsMapToolEmitPoint, QgsVertexMarker
 
@@ -22,9 +22,6 @@ from geographiclib.geodesic import Geodesic
 from .settings import settings, epsg4326, geod
 from .utils import conversionToMeters, DISTANCE_LABELS, tr
 
-FORM_CLASS, _ = loadUiType(os.path.join(
-    os.path.dirname(__file__), 'ui/azDistDigitizer.ui'))
-
 class AzDigitizerTool(QgsMapToolEmitPoint):
     """Class to interact with the map canvas to capture the coordinate
     when the mouse button is pressed and to display the coordinate in
@@ -93,11 +90,11 @@ class AzDigitizerTool(QgsMapToolEmitPoint):
             self.canvas.scene().removeItem(self.vertex)
             self.vertex = None
 
-class AzDigitizerWidget(QDialog, FORM_CLASS):
+class AzDigitizerWidget(QDialog):
 
     def __init__(self, iface, parent):
         super(AzDigitizerWidget, self).__init__(parent)
-        self.setupUi(self)
+        loadUi(os.path.join(os.path.dirname(__file__), 'ui/azDistDigitizer.ui'), self)
         self.iface = iface
         self.canvas = iface.mapCanvas()
         self.unitsComboBox.addItems(DISTANCE_LABELS)
@@ -0,0 +1,333 @@
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+
+Performance baseline for Shape Tools. The core benchmarks time the geodesic
+solver in ext-libs (Direct, Inverse and Position along with their array
+versions) and the shape cores in shapeWorkers.py. The algorithm benchmarks
+run the processing algorithms on synthetic memory layers with varying vertex
+counts, latitudes and antimeridian crossings and report features per second.
+They need the QGIS python bindings and are skipped when they cannot be
+imported. All of the inputs come from a seeded random generator so runs can
+be compared across releases.
+
+    python benchmarks/benchmark.py --output results.json
+    python benchmarks/benchmark.py --quick --only core
+"""
+import argparse
+import importlib.util
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Measure the vendored geographiclib rather than one installed with QGIS
+sys.path.insert(0, os.path.join(PLUGIN_DIR, 'ext-libs'))
+
+from geographiclib.geodesic import Geodesic  # noqa: E402
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+SEED = 1234
+
+# Latitude and longitude ranges of the synthetic inputs
+SCENARIOS = {
+    'random': ((-70.0, 70.0), (-180.0, 180.0)),
+    'high_latitude': ((75.0, 89.5), (-180.0, 180.0)),
+    'antimeridian': ((-60.0, 60.0), (178.0, 182.0)),
+}
+
+def timeit(func, repeat):
+    '''Return the best wall clock time of repeat calls to func.'''
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def randomPoints(rnd, count, scenario):
+    (lat1, lat2), (lon1, lon2) = SCENARIOS[scenario]
+    return [(rnd.uniform(lat1, lat2), (rnd.uniform(lon1, lon2) + 180.0) % 360.0 - 180.0) for i in range(count)]
+
+def loadPlugin():
+    '''Load the plugin as the shapetools package so that the relative imports
+    of its modules resolve.'''
+    if 'shapetools' not in sys.modules:
+        spec = importlib.util.spec_from_file_location(
+            'shapetools', os.path.join(PLUGIN_DIR, '__init__.py'), submodule_search_locations=[PLUGIN_DIR])
+        package = importlib.util.module_from_spec(spec)
+        sys.modules['shapetools'] = package
+        spec.loader.exec_module(package)
+
+def coreBenchmarks(count, repeat):
+    '''Time the geodesic solver and the QGIS independent shape cores.'''
+    geod = Geodesic.WGS84
+    results = []
+
+    def record(name, scenario, calls, func):
+        seconds = timeit(func, repeat)
+        results.append({
+            'name': name,
+            'scenario': scenario,
+            'calls': calls,
+            'seconds': seconds,
+            'calls_per_second': calls / seconds if seconds else None})
+
+    for scenario in SCENARIOS:
+        rnd = random.Random(SEED)
+        pts1 = randomPoints(rnd, count, scenario)
+        pts2 = randomPoints(rnd, count, scenario)
+        azi = [rnd.uniform(-180.0, 180.0) for i in range(count)]
+        dist = [rnd.uniform(1.0, 5e6) for i in range(count)]
+
+        record('Direct', scenario, count, lambda: [
+            geod.Direct(lat, lon, a, s) for (lat, lon), a, s in zip(pts1, azi, dist)])
+        record('Inverse', scenario, count, lambda: [
+            geod.Inverse(p1[0], p1[1], p2[0], p2[1]) for p1, p2 in zip(pts1, pts2)])
+        line = geod.InverseLine(pts1[0][0], pts1[0][1], pts2[0][0], pts2[0][1])
+        distances = [line.s13 * i / count for i in range(count)]
+        record('Position', scenario, count, lambda: [line.Position(s) for s in distances])
+
+        if numpy is not None:
+            lat1, lon1 = numpy.array(pts1).T
+            lat2, lon2 = numpy.array(pts2).T
+            record('DirectFan', scenario, count, lambda: geod.DirectFan(
+                pts1[0][0], pts1[0][1], numpy.array(azi), numpy.array(dist)))
+            record('InverseArray', scenario, count, lambda: geod.InverseArray(lat1, lon1, lat2, lon2))
+            record('Positions', scenario, count, lambda: line.Positions(numpy.array(distances)))
+
+    loadPlugin()
+    from shapetools import shapeWorkers as shapes
+    azimuths = [i * 10.0 for i in range(36)]
+    for scenario in SCENARIOS:
+        centers = randomPoints(random.Random(SEED), max(1, count // 50), scenario)
+        calls = len(centers)
+        record('circleCoords', scenario, calls, lambda: [
+            shapes.circleCoords(lat, lon, 50000.0, azimuths) for lat, lon in centers])
+        record('ellipseCoords', scenario, calls, lambda: [
+            shapes.ellipseCoords(lat, lon, 80000.0, 30000.0, 20.0, 64) for lat, lon in centers])
+        record('lobCoords', scenario, calls, lambda: [
+            shapes.lobCoords(lat, lon, 45.0, 2e6, 0.0, 20000.0, 1000) for lat, lon in centers])
+        record('gearCoords', scenario, calls, lambda: [
+            shapes.gearCoords(lat, lon, 20000.0, 14000.0, 0.0, 12, 75.0, 50.0) for lat, lon in centers])
+    return results
+
+# The shape generators and the parameters, other than INPUT and OUTPUT, that
+# they are run with. The remaining parameters use their defaults.
+SHAPE_ALGORITHMS = [
+    ('createarc', {}),
+    ('createcircle', {}),
+    ('createdonut', {}),
+    ('createellipse', {}),
+    ('createepicycloid', {}),
+    ('creategear', {}),
+    ('createheart', {}),
+    ('createhypocycloid', {}),
+    ('createlob', {'Distance': 2000.0}),
+    ('createpie', {}),
+    ('createpointsalonglob', {}),
+    ('createpolyfoil', {}),
+    ('createpolygon', {}),
+    ('createradiallines', {}),
+    ('createrings', {}),
+    ('createrose', {}),
+    ('createstar', {}),
+    ('geodesictransformations', {}),
+    ('geodesicflip', {}),
+]
+
+def algorithmBenchmarks(count, vertex_counts, repeat):
+    '''Run the processing algorithms on synthetic layers. Returns None if the
+    QGIS python bindings are not available.'''
+    try:
+        from qgis.core import (
+            Qgis, QgsApplication, QgsFeature, QgsField, QgsFields, QgsGeometry, QgsPointXY,
+            QgsProcessingContext, QgsProcessingFeedback, QgsProject, QgsVectorLayer)
+        from qgis.PyQt.QtCore import QVariant
+    except ImportError:
+        return None
+
+    app = QgsApplication([], False)
+    app.initQgis()
+
+    loadPlugin()
+    from shapetools.provider import ShapeToolsProvider
+    provider = ShapeToolsProvider()
+    QgsApplication.processingRegistry().addProvider(provider)
+
+    def memoryLayer(geom_type, name, features):
+        layer = QgsVectorLayer('{}?crs=epsg:4326'.format(geom_type), name, 'memory')
+        fields = QgsFields()
+        for field in ('seq', 'grp'):
+            fields.append(QgsField(field, QVariant.Int))
+        for field in ('x1', 'y1', 'x2', 'y2'):
+            fields.append(QgsField(field, QVariant.Double))
+        layer.dataProvider().addAttributes(fields)
+        layer.updateFields()
+        layer.dataProvider().addFeatures(features)
+        return layer
+
+    def pointLayer(scenario):
+        rnd = random.Random(SEED)
+        features = []
+        for i, (lat, lon) in enumerate(randomPoints(rnd, count, scenario)):
+            f = QgsFeature()
+            f.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(lon, lat)))
+            lat2, lon2 = randomPoints(rnd, 1, scenario)[0]
+            f.setAttributes([i, i % 10, lon, lat, lon2, lat2])
+            features.append(f)
+        return memoryLayer('Point', scenario, features)
+
+    def walk(rnd, scenario, vertices):
+        # A random walk with steps of up to about 2 degrees
+        lat, lon = randomPoints(rnd, 1, scenario)[0]
+        pts = []
+        for i in range(vertices):
+            pts.append(QgsPointXY(lon, lat))
+            lat = max(-89.0, min(89.0, lat + rnd.uniform(-1.0, 1.0)))
+            lon += rnd.uniform(-2.0, 2.0)
+            if lon > 180.0:
+                lon -= 360.0
+            elif lon < -180.0:
+                lon += 360.0
+        return pts
+
+    def lineLayer(scenario, vertices):
+        rnd = random.Random(SEED)
+        features = []
+        for i in range(max(1, count // vertices)):
+            f = QgsFeature()
+            f.setGeometry(QgsGeometry.fromPolylineXY(walk(rnd, scenario, vertices)))
+            f.setAttributes([i, i % 10, 0.0, 0.0, 0.0, 0.0])
+            features.append(f)
+        return memoryLayer('LineString', scenario, features)
+
+    def polygonLayer(scenario, vertices):
+        rnd = random.Random(SEED)
+        features = []
+        for i in range(max(1, count // vertices)):
+            lat, lon = randomPoints(rnd, 1, scenario)[0]
+            radius = rnd.uniform(0.5, 5.0)
+            ring = [QgsPointXY(lon + radius * math.cos(a), max(-89.0, min(89.0, lat + radius * math.sin(a))))
+                    for a in (2 * math.pi * j / vertices for j in range(vertices))]
+            ring.append(ring[0])
+            f = QgsFeature()
+            f.setGeometry(QgsGeometry.fromPolygonXY([ring]))
+            f.setAttributes([i, i % 10, 0.0, 0.0, 0.0, 0.0])
+            features.append(f)
+        return memoryLayer('Polygon', scenario, features)
+
+    results = []
+
+    def record(alg_id, layer, input_name, output_names, params, vertices=None):
+        alg = QgsApplication.processingRegistry().createAlgorithmById('shapetools:' + alg_id)
+        if alg is None:
+            return
+        def run():
+            context = QgsProcessingContext()
+            context.setProject(QgsProject.instance())
+            parameters = dict(params)
+            parameters[input_name] = layer
+            for name in output_names:
+                parameters[name] = 'memory:'
+            alg.run(parameters, context, QgsProcessingFeedback())
+        seconds = timeit(run, repeat)
+        features = layer.featureCount()
+        results.append({
+            'name': alg_id,
+            'scenario': layer.name(),
+            'features': features,
+            'vertices_per_feature': vertices,
+            'seconds': seconds,
+            'features_per_second': features / seconds if seconds else None})
+
+    for scenario in SCENARIOS:
+        points = pointLayer(scenario)
+        for alg_id, params in SHAPE_ALGORITHMS:
+            record(alg_id, points, 'INPUT', ['OUTPUT'], params)
+        record('geodesicpointdecimate', points, 'InputLayer', ['OutputLayer'], {
+            'OrderField': 'seq', 'GroupField': 'grp', 'MinDistance': 50.0})
+        record('xy2line', points, 'InputLayer', ['OutputLineLayer', 'OutputPointLayer'], {
+            'StartXField': 'x1', 'StartYField': 'y1', 'EndXField': 'x2', 'EndYField': 'y2',
+            'DateLineBreak': scenario == 'antimeridian'})
+        for vertices in vertex_counts:
+            lines = lineLayer(scenario, vertices)
+            polygons = polygonLayer(scenario, vertices)
+            record('geodesicdensifier', lines, 'InputLayer', ['OutputLayer'], {'MaxSegmentLength': 10.0}, vertices)
+            record('geodesicdensifier', polygons, 'InputLayer', ['OutputLayer'], {'MaxSegmentLength': 10.0}, vertices)
+            record('measurelayer', lines, 'InputLayer', ['OutputLayer'], {}, vertices)
+            record('geodesiclinedecimate', lines, 'InputLayer', ['OutputLayer'], {'MinDistance': 50.0}, vertices)
+            record('idlbreakline', lines, 'InputLayer', ['OutputLayer'], {}, vertices)
+
+    QgsApplication.processingRegistry().removeProvider(provider)
+    return {'qgis_version': Qgis.QGIS_VERSION, 'results': results}
+
+def pluginVersion():
+    try:
+        with open(os.path.join(PLUGIN_DIR, 'metadata.txt')) as f:
+            for line in f:
+                if line.startswith('version='):
+                    return line.strip().split('=', 1)[1]
+    except OSError:
+        pass
+    return None
+
+def main():
+    parser = argparse.ArgumentParser(description='Shape Tools performance benchmarks')
+    parser.add_argument('--output', help='Write the JSON results to this file instead of stdout')
+    parser.add_argument('--only', choices=['core', 'algorithms'], help='Run only one group of benchmarks')
+    parser.add_argument('--quick', action='store_true', help='Use small inputs for a fast smoke run')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed repeats, the best is reported')
+    args = parser.parse_args()
+
+    count = 500 if args.quick else 20000
+    alg_count = 200 if args.quick else 5000
+    vertex_counts = [10, 100] if args.quick else [10, 100, 1000]
+
+    report = {
+        'meta': {
+            'plugin_version': pluginVersion(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': numpy.__version__ if numpy is not None else None,
+            'seed': SEED,
+            'quick': args.quick,
+            'repeat': args.repeat,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        }
+    }
+    if args.only != 'algorithms':
+        report['core'] = coreBenchmarks(count, args.repeat)
+    if args.only != 'core':
+        algorithms = algorithmBenchmarks(alg_count, vertex_counts, args.repeat)
+        if algorithms is None:
+            report['algorithms'] = {'skipped': 'The QGIS python bindings are not available'}
+        else:
+            report['meta']['qgis_version'] = algorithms['qgis_version']
+            report['algorithms'] = algorithms['results']
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+if __name__ == '__main__':
+    main()
@@ -9,9 +9,8 @@
  ***************************************************************************/
 """
 import os
-from geographiclib.geodesic import Geodesic
 
-from qgis.core import (QgsPointXY, QgsGeometry, QgsField,
+from qgis.core import (QgsField,
                        QgsProject, QgsWkbTypes, QgsCoordinateTransform, QgsPropertyDefinition)
 
 from qgis.core import (QgsProcessing,
@@ -24,8 +23,9 @@ from qgis.core import (QgsProcessing,
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtCore import QVariant, QUrl
 
-from .settings import settings, epsg4326, geod
-from .utils import tr, conversionToMeters, makeIdlCrossingsPositive, DISTANCE_LABELS, hasIdlCrossing
+from .settings import settings, epsg4326
+from .utils import tr, conversionToMeters, makeIdlCrossingsPositiveCoords, DISTANCE_LABELS, hasIdlCrossingCoords, fanAzimuths, deviationSegments, maxDeviationParameter, geodesicCircleCoords, geodesicRingsCoords
+from .wkbGeometry import polylineGeometry, polygonGeometry, multiPolylineGeometry
 
 SHAPE_TYPE = [tr("Polygon"), tr("Line")]
 
@@ -43,6 +43,7 @@ class CreateArcAlgorithm(QgsProcessingFeatureBasedAlgorithm):
     PrmOuterRadius = 'OuterRadius'
     PrmUnitsOfMeasure = 'UnitsOfMeasure'
     PrmDrawingSegments = 'DrawingSegments'
+    PrmMaxDeviation = 'MaxDeviation'
     PrmExportInputGeometry = 'ExportInputGeometry'
 
     def createInstance(self):
@@ -184,6 +185,7 @@ class CreateArcAlgorithm(QgsProcessingFeatureBasedAlgorithm):
                 minValue=4,
                 optional=True)
         )
+        self.addParameter(maxDeviationParameter(self.PrmMaxDeviation))
         self.addParameter(
             QgsProcessingParameterBoolean(
                 self.PrmExportInputGeometry,
@@ -215,6 +217,7 @@ class CreateArcAlgorithm(QgsProcessingFeatureBasedAlgorithm):
         if self.inner_radius_dyn:
             self.inner_radius_property = parameters[self.PrmInnerRadius]
         segments = self.parameterAsInt(parameters, self.PrmDrawingSegments, context)
+        self.max_deviation = self.parameterAsDouble(parameters, self.PrmMaxDeviation, context)
         units = self.parameterAsInt(parameters, self.PrmUnitsOfMeasure, context)
         self.export_geom = self.parameterAsBool(parameters, self.PrmExportInputGeometry, context)
 
@@ -239,7 +242,6 @@ class CreateArcAlgorithm(QgsProcessingFeatureBasedAlgorithm):
 
     def processFeature(self, feature, context, feedback):
         try:
-            pts = []
             pt = feature.geometry().asPoint()
             pt_orig_x = pt.x()
             pt_orig_y = pt.y()
@@ -281,81 +283,62 @@ class CreateArcAlgorithm(QgsProcessingFeatureBasedAlgorithm):
             else:
                 inner_dist = self.inner_radius_converted
 
+            if self.max_deviation:
+                pt_spacing = 360.0 / deviationSegments(max(outer_dist, inner_dist), self.max_deviation)
+            else:
+                pt_spacing = self.pt_spacing
+
             sangle = sangle % 360
             eangle = eangle % 360
             if sangle == eangle:  # Create a donut instead
                 feedback.pushInfo('Creating donut')
-                angle = 0
-                pts_in = []
-                while angle < 360:
-                    if inner_dist != 0:
-                        g = geod.Direct(pt.y(), pt.x(), angle, inner_dist, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-                        pts_in.append(QgsPointXY(g['lon2'], g['lat2']))
-                    g = geod.Direct(pt.y(), pt.x(), angle, outer_dist, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-                    pts.append(QgsPointXY(g['lon2'], g['lat2']))
-                    angle += self.pt_spacing
+                azimuths = fanAzimuths(pt_spacing)
+                if inner_dist != 0:
+                    pts, pts_in = geodesicRingsCoords(pt.y(), pt.x(), azimuths, [outer_dist, inner_dist])
+                else:
+                    pts = geodesicCircleCoords(pt.y(), pt.x(), azimuths, outer_dist)
                 if inner_dist != 0:
-                    pts_in.append(pts_in[0])
-                pts.append(pts[0])  # Outer point ring
-                crosses_idl = hasIdlCrossing(pts)
+                    pts_in.extend(pts_in[0:2])
+                pts.extend(pts[0:2])  # Outer point ring
+                crosses_idl = hasIdlCrossingCoords(pts)
                 if crosses_idl:
                     if inner_dist != 0:
-                        makeIdlCrossingsPositive(pts_in, True)
-                    makeIdlCrossingsPositive(pts, True)
-                # If the Output crs is not 4326 transform the points to the proper crs
-                if self.to_sink_crs:
-                    if inner_dist != 0:
-                        for x, pt_out in enumerate(pts_in):
-                            pts_in[x] = self.to_sink_crs.transform(pt_out)
-                    for x, pt_out in enumerate(pts):
-                        pts[x] = self.to_sink_crs.transform(pt_out)
-
+                        makeIdlCrossingsPositiveCoords(pts_in, True)
+                    makeIdlCrossingsPositiveCoords(pts, True)
+                # If the Output crs is not 4326 the geometry is transformed to it as it is built
                 if self.shape_type == 0:
                     if inner_dist == 0:
-                        feature.setGeometry(QgsGeometry.fromPolygonXY([pts]))
+                        feature.setGeometry(polygonGeometry([pts], self.to_sink_crs))
                     else:
-                        feature.setGeometry(QgsGeometry.fromPolygonXY([pts, pts_in]))
+                        feature.setGeometry(polygonGeometry([pts, pts_in], self.to_sink_crs))
                 else:
                     if inner_dist == 0:
-                        feature.setGeometry(QgsGeometry.fromMultiPolylineXY([pts]))
+                        feature.setGeometry(multiPolylineGeometry([pts], self.to_sink_crs))
                     else:
-                        feature.setGeometry(QgsGeometry.fromMultiPolylineXY([pts, pts_in]))
+                        feature.setGeometry(multiPolylineGeometry([pts, pts_in], self.to_sink_crs))
             else:
                 if sangle > eangle:
                     # We are crossing the 0 boundary so lets just subtract
                     # 360 from it.
                     sangle -= 360.0
-                sanglesave = sangle
-
-                while sangle < eangle:  # Draw the outer arc
-                    g = geod.Direct(pt.y(), pt.x(), sangle, outer_dist, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-                    pts.append(QgsPointXY(g['lon2'], g['lat2']))
-                    sangle += self.pt_spacing  # add this number of degrees to the angle
-
-                g = geod.Direct(pt.y(), pt.x(), eangle, outer_dist, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-                pts.append(QgsPointXY(g['lon2'], g['lat2']))
+                azimuths = fanAzimuths(pt_spacing, sangle, eangle)
+                azimuths.append(eangle)
                 if inner_dist == 0:  # This will just be a pie wedge
-                    pts.append(pt)
+                    pts = geodesicCircleCoords(pt.y(), pt.x(), azimuths, outer_dist)
+                    pts.extend((pt.x(), pt.y()))
                 else:
-                    sangle = sanglesave
-                    while eangle > sangle:  # Draw the inner arc
-                        g = geod.Direct(pt.y(), pt.x(), eangle, inner_dist, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-                        pts.append(QgsPointXY(g['lon2'], g['lat2']))
-                        eangle -= self.pt_spacing  # subtract this number of degrees to the angle
-                    g = geod.Direct(pt.y(), pt.x(), sangle, inner_dist, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-                    pts.append(QgsPointXY(g['lon2'], g['lat2']))
-
-                pts.append(pts[0])
-                makeIdlCrossingsPositive(pts)
-                # If the Output crs is not 4326 transform the points to the proper crs
-                if self.to_sink_crs:
-                    for x, pt_out in enumerate(pts):
-                        pts[x] = self.to_sink_crs.transform(pt_out)
-
+                    # The inner arc is drawn back along the azimuths of the outer arc
+                    pts, pts_in = geodesicRingsCoords(pt.y(), pt.x(), azimuths, [outer_dist, inner_dist])
+                    for i in range(len(pts_in) - 2, -1, -2):
+                        pts.extend(pts_in[i:i + 2])
+
+                pts.extend(pts[0:2])
+                makeIdlCrossingsPositiveCoords(pts)
+                # If the Output crs is not 4326 the geometry is transformed to it as it is built
                 if self.shape_type == 0:
-                    feature.setGeometry(QgsGeometry.fromPolygonXY([pts]))
+                    feature.setGeometry(polygonGeometry([pts], self.to_sink_crs))
                 else:
-                    feature.setGeometry(QgsGeometry.fromPolylineXY(pts))
+                    feature.setGeometry(polylineGeometry(pts, self.to_sink_crs))
             if self.export_geom:
                 attr = feature.attributes()
                 attr.append(pt_orig_x)
@@ -9,10 +9,9 @@
  ***************************************************************************/
 """
 import os
-from geographiclib.geodesic import Geodesic
 
 from qgis.core import (
-    QgsPointXY, QgsGeometry, QgsField,
+    QgsField,
     QgsProject, QgsWkbTypes, QgsCoordinateTransform, QgsPropertyDefinition)
 
 from qgis.core import (
@@ -26,8 +25,10 @@ from qgis.core import (
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtCore import QVariant, QUrl
 
-from .settings import settings, epsg4326, geod
-from .utils import tr, conversionToMeters, DISTANCE_LABELS, makeIdlCrossingsPositive, hasIdlCrossing
+from .settings import settings, epsg4326
+from .utils import tr, conversionToMeters, DISTANCE_LABELS, makeIdlCrossingsPositiveCoords, hasIdlCrossingCoords, fanAzimuths, deviationSegments, maxDeviationParameter, geodesicCircleCoords, parallelWorkersParameter, ParallelShapes
+from .wkbGeometry import flatCoords, polygonGeometry, multiPolylineGeometry
+from .shapeWorkers import circleCoords
 
 SHAPE_TYPE = [tr("Polygon"), tr("Line")]
 
@@ -41,7 +42,9 @@ class CreateCircleAlgorithm(QgsProcessingFeatureBasedAlgorithm):
     PrmRadius = 'Radius'
     PrmUnitsOfMeasure = 'UnitsOfMeasure'
     PrmDrawingSegments = 'DrawingSegments'
+    PrmMaxDeviation = 'MaxDeviation'
     PrmExportInputGeometry = 'ExportInputGeometry'
+    PrmParallelWorkers = 'ParallelWorkers'
 
     def createInstance(self):
         return CreateCircleAlgorithm()
@@ -131,6 +134,7 @@ class CreateCircleAlgorithm(QgsProcessingFeatureBasedAlgorithm):
                 minValue=4,
                 optional=True)
         )
+        self.addParameter(maxDeviationParameter(self.PrmMaxDeviation))
         self.addParameter(
             QgsProcessingParameterBoolean(
                 self.PrmExportInputGeometry,
@@ -138,6 +142,7 @@ class CreateCircleAlgorithm(QgsProcessingFeatureBasedAlgorithm):
                 False,
                 optional=True)
         )
+        self.addParameter(parallelWorkersParameter(self.PrmParallelWorkers))
 
     def prepareAlgorithm(self, parameters, context, feedback):
         self.shape_type = self.parameterAsInt(parameters, self.PrmShapeType, context)
@@ -149,6 +154,7 @@ class CreateCircleAlgorithm(QgsProcessingFeatureBasedAlgorithm):
         if self.outer_radius_dyn:
             self.outer_radius_property = parameters[self.PrmRadius]
         segments = self.parameterAsInt(parameters, self.PrmDrawingSegments, context)
+        self.max_deviation = self.parameterAsDouble(parameters, self.PrmMaxDeviation, context)
         units = self.parameterAsInt(parameters, self.PrmUnitsOfMeasure, context)
         self.export_geom = self.parameterAsBool(parameters, self.PrmExportInputGeometry, context)
 
@@ -156,7 +162,10 @@ class CreateCircleAlgorithm(QgsProcessingFeatureBasedAlgorithm):
 
         self.outer_radius_converted = self.outer_radius * self.measure_factor
 
+        if self.max_deviation:
+            segments = deviationSegments(self.outer_radius_converted, self.max_deviation)
         self.pt_spacing = 360.0 / segments
+        self.azimuths = fanAzimuths(self.pt_spacing)
         source = self.parameterAsSource(parameters, 'INPUT', context)
         src_crs = source.sourceCrs()
         self.total_features = source.featureCount()
@@ -167,13 +176,19 @@ class CreateCircleAlgorithm(QgsProcessingFeatureBasedAlgorithm):
         else:
             self.geom_to_4326 = None
             self.to_sink_crs = None
+        self.parallel = None
+        workers = self.parameterAsInt(parameters, self.PrmParallelWorkers, context)
+        if workers > 1:
+            if self.outer_radius_dyn:
+                feedback.pushInfo(tr('Parallel workers are not used with data defined parameters'))
+            else:
+                self.parallel = ParallelShapes(
+                    source, self.geom_to_4326, circleCoords, (self.outer_radius_converted, self.azimuths), workers)
         self.num_bad = 0
         return True
 
     def processFeature(self, feature, context, feedback):
         try:
-            pts_in = []
-            pts_out = []
             pt = feature.geometry().asPoint()
             pt_orig_x = pt.x()
             pt_orig_y = pt.y()
@@ -190,25 +205,25 @@ class CreateCircleAlgorithm(QgsProcessingFeatureBasedAlgorithm):
                     return []
             else:
                 outer_rad = self.outer_radius_converted
-            angle = 0
-            while angle < 360:
-                g = geod.Direct(lat, lon, angle, outer_rad, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-                pts_out.append(QgsPointXY(g['lon2'], g['lat2']))
-                angle += self.pt_spacing
-            pts_out.append(pts_out[0])
-            crosses_idl = hasIdlCrossing(pts_out)
+            if self.max_deviation and self.outer_radius_dyn:
+                azimuths = fanAzimuths(360.0 / deviationSegments(outer_rad, self.max_deviation))
+            else:
+                azimuths = self.azimuths
+            coords = self.parallel.coords(feature, feedback) if self.parallel else None
+            if coords is None:
+                pts_out = geodesicCircleCoords(lat, lon, azimuths, outer_rad)
+            else:
+                pts_out = flatCoords(coords)
+            pts_out.extend(pts_out[0:2])
+            crosses_idl = hasIdlCrossingCoords(pts_out)
             if crosses_idl:
-                makeIdlCrossingsPositive(pts_out, True)
-
-            # If the Output crs is not 4326 transform the points to the proper crs
-            if self.to_sink_crs:
-                for x, pt_out in enumerate(pts_out):
-                    pts_out[x] = self.to_sink_crs.transform(pt_out)
+                makeIdlCrossingsPositiveCoords(pts_out, True)
 
+            # If the Output crs is not 4326 the geometry is transformed to it as it is built
             if self.shape_type == 0:
-                feature.setGeometry(QgsGeometry.fromPolygonXY([pts_out]))
+                feature.setGeometry(polygonGeometry([pts_out], self.to_sink_crs))
             else:
-                feature.setGeometry(QgsGeometry.fromMultiPolylineXY([pts_out]))
+                feature.setGeometry(multiPolylineGeometry([pts_out], self.to_sink_crs))
             if self.export_geom:
                 attr = feature.attributes()
                 attr.append(pt_orig_x)
@@ -220,6 +235,9 @@ class CreateCircleAlgorithm(QgsProcessingFeatureBasedAlgorithm):
         return [feature]
 
     def postProcessAlgorithm(self, context, feedback):
+        if self.parallel:
+            self.parallel.close(feedback)
+            self.parallel = None
         if self.num_bad:
             feedback.pushInfo(tr("{} out of {} features had invalid parameters and were ignored.".format(self.num_bad, self.total_features)))
         return {}
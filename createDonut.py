@@ -9,10 +9,10 @@
  ***************************************************************************/
 """
 import os
-from geographiclib.geodesic import Geodesic
+from array import array
 
 from qgis.core import (
-    QgsPointXY, QgsGeometry, QgsField,
+    QgsField,
     QgsProject, QgsWkbTypes, QgsCoordinateTransform, QgsPropertyDefinition)
 
 from qgis.core import (
@@ -26,8 +26,9 @@ from qgis.core import (
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtCore import QVariant, QUrl
 
-from .settings import settings, epsg4326, geod
-from .utils import tr, conversionToMeters, DISTANCE_LABELS, makeIdlCrossingsPositive, hasIdlCrossing
+from .settings import settings, epsg4326
+from .utils import tr, conversionToMeters, DISTANCE_LABELS, makeIdlCrossingsPositiveCoords, hasIdlCrossingCoords, fanAzimuths, geodesicCircleCoords, geodesicRingsCoords
+from .wkbGeometry import polygonGeometry, multiPolylineGeometry
 
 SHAPE_TYPE = [tr("Polygon"), tr("Line")]
 
@@ -178,6 +179,7 @@ class CreateDonutAlgorithm(QgsProcessingFeatureBasedAlgorithm):
         self.outer_radius_converted = self.outer_radius * self.measure_factor
 
         self.pt_spacing = 360.0 / segments
+        self.azimuths = fanAzimuths(self.pt_spacing)
         source = self.parameterAsSource(parameters, 'INPUT', context)
         src_crs = source.sourceCrs()
         self.total_features = source.featureCount()
@@ -193,8 +195,8 @@ class CreateDonutAlgorithm(QgsProcessingFeatureBasedAlgorithm):
 
     def processFeature(self, feature, context, feedback):
         try:
-            pts_in = []
-            pts_out = []
+            pts_in = array('d')
+            pts_out = array('d')
             pt = feature.geometry().asPoint()
             pt_orig_x = pt.x()
             pt_orig_y = pt.y()
@@ -219,41 +221,30 @@ class CreateDonutAlgorithm(QgsProcessingFeatureBasedAlgorithm):
                     return []
             else:
                 outer_rad = self.outer_radius_converted
-            angle = 0
-            while angle < 360:
-                if inner_rad != 0:
-                    g = geod.Direct(lat, lon, angle, inner_rad, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-                    pts_in.append(QgsPointXY(g['lon2'], g['lat2']))
-                g = geod.Direct(lat, lon, angle, outer_rad, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-                pts_out.append(QgsPointXY(g['lon2'], g['lat2']))
-                angle += self.pt_spacing
             if inner_rad != 0:
-                pts_in.append(pts_in[0])
-            pts_out.append(pts_out[0])
-            crosses_idl = hasIdlCrossing(pts_out)
+                pts_out, pts_in = geodesicRingsCoords(lat, lon, self.azimuths, [outer_rad, inner_rad])
+            else:
+                pts_out = geodesicCircleCoords(lat, lon, self.azimuths, outer_rad)
+            if inner_rad != 0:
+                pts_in.extend(pts_in[0:2])
+            pts_out.extend(pts_out[0:2])
+            crosses_idl = hasIdlCrossingCoords(pts_out)
             if crosses_idl:
                 if inner_rad != 0:
-                    makeIdlCrossingsPositive(pts_in, True)
-                makeIdlCrossingsPositive(pts_out, True)
-
-            # If the Output crs is not 4326 transform the points to the proper crs
-            if self.to_sink_crs:
-                if inner_rad != 0:
-                    for x, pt_out in enumerate(pts_in):
-                        pts_in[x] = self.to_sink_crs.transform(pt_out)
-                for x, pt_out in enumerate(pts_out):
-                    pts_out[x] = self.to_sink_crs.transform(pt_out)
+                    makeIdlCrossingsPositiveCoords(pts_in, True)
+                makeIdlCrossingsPositiveCoords(pts_out, True)
 
+            # If the Output crs is not 4326 the geometry is transformed to it as it is built
             if self.shape_type == 0:
                 if inner_rad == 0:
-                    feature.setGeometry(QgsGeometry.fromPolygonXY([pts_out]))
+                    feature.setGeometry(polygonGeometry([pts_out], self.to_sink_crs))
                 else:
-                    feature.setGeometry(QgsGeometry.fromPolygonXY([pts_out, pts_in]))
+                    feature.setGeometry(polygonGeometry([pts_out, pts_in], self.to_sink_crs))
             else:
                 if inner_rad == 0:
-                    feature.setGeometry(QgsGeometry.fromMultiPolylineXY([pts_out]))
+                    feature.setGeometry(multiPolylineGeometry([pts_out], self.to_sink_crs))
                 else:
-                    feature.setGeometry(QgsGeometry.fromMultiPolylineXY([pts_out, pts_in]))
+                    feature.setGeometry(multiPolylineGeometry([pts_out, pts_in], self.to_sink_crs))
             if self.export_geom:
                 attr = feature.attributes()
                 attr.append(pt_orig_x)
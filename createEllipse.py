@@ -9,11 +9,9 @@
  ***************************************************************************/
 """
 import os
-import math
-from geographiclib.geodesic import Geodesic
 
 from qgis.core import (
-    QgsPointXY, QgsGeometry, QgsField,
+    QgsField,
     QgsProject, QgsWkbTypes, QgsCoordinateTransform, QgsPropertyDefinition)
 
 from qgis.core import (
@@ -28,48 +26,20 @@ from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtCore import QVariant, QUrl
 
 from .settings import settings, epsg4326, geod
-from .utils import tr, conversionToMeters, DISTANCE_LABELS, makeIdlCrossingsPositive
+from .utils import tr, conversionToMeters, DISTANCE_LABELS, makeIdlCrossingsPositiveCoords, deviationSegments, maxDeviationParameter, parallelWorkersParameter, ParallelShapes
+from .wkbGeometry import flatCoords, polylineGeometry, polygonGeometry
+from .shapeWorkers import ellipseCoords
 # import traceback
 
 SHAPE_TYPE = [tr("Polygon"), tr("Line")]
 
 
 def geodesicEllipse(geod, lat, lon, sma, smi, orient, segments):
-    segments = int(math.ceil(segments / 2))
-    if smi < 0.0001:
-        smi = 0.0001
-    if sma < 0.0001:
-        sma = 0.0001
-    if sma < smi:
-        temp = sma
-        sma = smi
-        smi = temp
-        orient += 90
-    ab = sma * smi
-    step = 18.0 * smi / sma
-    if step < 1.0:
-        minimum = step
-    else:
-        minimum = 1.0
-
-    maxang = math.pi / 6 * minimum
-    delta = ab * math.pi / segments
-    pts = []
-    azi = 0
-    while azi < math.tau:
-        cos_azi = math.cos(azi)
-        sin_azi = math.sin(azi)
-        rad = ab / math.sqrt(sma * sma * sin_azi * sin_azi + smi * smi * cos_azi * cos_azi)
-        g = geod.Direct(lat, lon, math.degrees(azi) + orient, rad, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-        pts.append(QgsPointXY(g['lon2'], g['lat2']))
-        delo = delta / (rad * rad)
-        if maxang < delo:
-            delo = maxang
-        azi += delo
+    pts = flatCoords(ellipseCoords(lat, lon, sma, smi, orient, segments, geod))
 
     # Append the starting point to close the shape
-    pts.append(pts[0])
-    makeIdlCrossingsPositive(pts)
+    pts.extend(pts[0:2])
+    makeIdlCrossingsPositiveCoords(pts)
     return(pts)
 
 
@@ -84,7 +54,9 @@ class CreateEllipseAlgorithm(QgsProcessingFeatureBasedAlgorithm):
     PrmOrientation = 'Orientation'
     PrmUnitsOfMeasure = 'UnitsOfMeasure'
     PrmDrawingSegments = 'DrawingSegments'
+    PrmMaxDeviation = 'MaxDeviation'
     PrmExportInputGeometry = 'ExportInputGeometry'
+    PrmParallelWorkers = 'ParallelWorkers'
 
     def createInstance(self):
         return CreateEllipseAlgorithm()
@@ -205,6 +177,7 @@ class CreateEllipseAlgorithm(QgsProcessingFeatureBasedAlgorithm):
                 minValue=8,
                 optional=True)
         )
+        self.addParameter(maxDeviationParameter(self.PrmMaxDeviation))
         self.addParameter(
             QgsProcessingParameterBoolean(
                 self.PrmExportInputGeometry,
@@ -212,6 +185,7 @@ class CreateEllipseAlgorithm(QgsProcessingFeatureBasedAlgorithm):
                 False,
                 optional=True)
         )
+        self.addParameter(parallelWorkersParameter(self.PrmParallelWorkers))
 
     def prepareAlgorithm(self, parameters, context, feedback):
         self.shape_type = self.parameterAsInt(parameters, self.PrmShapeType, context)
@@ -231,6 +205,7 @@ class CreateEllipseAlgorithm(QgsProcessingFeatureBasedAlgorithm):
         if self.orientation_dyn:
             self.orientation_property = parameters[self.PrmOrientation]
         self.segments = self.parameterAsInt(parameters, self.PrmDrawingSegments, context)
+        self.max_deviation = self.parameterAsDouble(parameters, self.PrmMaxDeviation, context)
         units = self.parameterAsInt(parameters, self.PrmUnitsOfMeasure, context)
         self.export_geom = self.parameterAsBool(parameters, self.PrmExportInputGeometry, context)
 
@@ -238,6 +213,9 @@ class CreateEllipseAlgorithm(QgsProcessingFeatureBasedAlgorithm):
 
         self.semi_major_converted = self.semi_major * self.measure_factor
         self.semi_minor_converted = self.semi_minor * self.measure_factor
+        if self.max_deviation:
+            self.segments = deviationSegments(
+                max(self.semi_major_converted, self.semi_minor_converted), self.max_deviation, min_segments=8)
 
         source = self.parameterAsSource(parameters, 'INPUT', context)
         src_crs = source.sourceCrs()
@@ -249,12 +227,20 @@ class CreateEllipseAlgorithm(QgsProcessingFeatureBasedAlgorithm):
         else:
             self.geom_to_4326 = None
             self.to_sink_crs = None
+        self.parallel = None
+        workers = self.parameterAsInt(parameters, self.PrmParallelWorkers, context)
+        if workers > 1:
+            if self.semi_major_dyn or self.semi_minor_dyn or self.orientation_dyn:
+                feedback.pushInfo(tr('Parallel workers are not used with data defined parameters'))
+            else:
+                self.parallel = ParallelShapes(
+                    source, self.geom_to_4326, ellipseCoords,
+                    (self.semi_major_converted, self.semi_minor_converted, self.orientation, self.segments), workers)
         self.num_bad = 0
         return True
 
     def processFeature(self, feature, context, feedback):
         try:
-            pts = []
             pt = feature.geometry().asPoint()
             pt_orig_x = pt.x()
             pt_orig_y = pt.y()
@@ -284,17 +270,23 @@ class CreateEllipseAlgorithm(QgsProcessingFeatureBasedAlgorithm):
             else:
                 orient = self.orientation
 
-            pts = geodesicEllipse(geod, lat, lon, sma, smi, orient, self.segments)
-
-            # If the Output crs is not 4326 transform the points to the proper crs
-            if self.to_sink_crs:
-                for x, ptout in enumerate(pts):
-                    pts[x] = self.to_sink_crs.transform(ptout)
+            if self.max_deviation and (self.semi_major_dyn or self.semi_minor_dyn):
+                segments = deviationSegments(max(sma, smi), self.max_deviation, min_segments=8)
+            else:
+                segments = self.segments
+            coords = self.parallel.coords(feature, feedback) if self.parallel else None
+            if coords is None:
+                pts = geodesicEllipse(geod, lat, lon, sma, smi, orient, segments)
+            else:
+                pts = flatCoords(coords)
+                pts.extend(pts[0:2])
+                makeIdlCrossingsPositiveCoords(pts)
 
+            # If the Output crs is not 4326 the geometry is transformed to it as it is built
             if self.shape_type == 0:
-                feature.setGeometry(QgsGeometry.fromPolygonXY([pts]))
+                feature.setGeometry(polygonGeometry([pts], self.to_sink_crs))
             else:
-                feature.setGeometry(QgsGeometry.fromPolylineXY(pts))
+                feature.setGeometry(polylineGeometry(pts, self.to_sink_crs))
             if self.export_geom:
                 attr = feature.attributes()
                 attr.append(pt_orig_x)
@@ -308,6 +300,9 @@ class CreateEllipseAlgorithm(QgsProcessingFeatureBasedAlgorithm):
         return [feature]
 
     def postProcessAlgorithm(self, context, feedback):
+        if self.parallel:
+            self.parallel.close(feedback)
+            self.parallel = None
         if self.num_bad:
             feedback.pushInfo(tr("{} out of {} features had invalid parameters and were ignored.".format(self.num_bad, self.total_features)))
         return {}
@@ -9,11 +9,9 @@
  ***************************************************************************/
 """
 import os
-import math
-from geographiclib.geodesic import Geodesic
 
 from qgis.core import (
-    QgsPointXY, QgsGeometry, QgsField, QgsPropertyDefinition,
+    QgsField, QgsPropertyDefinition,
     QgsProject, QgsWkbTypes, QgsCoordinateTransform)
 
 from qgis.core import (
@@ -27,8 +25,9 @@ from qgis.core import (
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtCore import QVariant, QUrl
 
-from .settings import settings, epsg4326, geod
-from .utils import tr, conversionToMeters, makeIdlCrossingsPositive, DISTANCE_LABELS
+from .settings import settings, epsg4326
+from .utils import tr, conversionToMeters, DISTANCE_LABELS, polarShapeGeometry
+from .shapeWorkers import epicycloidPolar
 
 SHAPE_TYPE = [tr("Polygon"), tr("Line")]
 
@@ -196,7 +195,7 @@ class CreateEpicycloidAlgorithm(QgsProcessingFeatureBasedAlgorithm):
         self.radius_converted = self.radius * self.measureFactor
         self.r2 = self.radius_converted / (self.lobes + 2.0)
 
-        self.step = 360.0 / segments
+        self.segments = segments
 
         source = self.parameterAsSource(parameters, 'INPUT', context)
         srcCRS = source.sourceCrs()
@@ -240,34 +239,15 @@ class CreateEpicycloidAlgorithm(QgsProcessingFeatureBasedAlgorithm):
             else:
                 r = self.r2
 
-            pts = []
             pt = feature.geometry().asPoint()
             pt_orig_x = pt.x()
             pt_orig_y = pt.y()
             # make sure the coordinates are in EPSG:4326
             if self.geomTo4326:
                 pt = self.geomTo4326.transform(pt.x(), pt.y())
-            angle = 0.0
-            while angle <= 360.0:
-                a = math.radians(angle)
-                x = r * (lobes2 + 1.0) * math.cos(a) - r * math.cos((lobes2 + 1.0) * a)
-                y = r * (lobes2 + 1.0) * math.sin(a) - r * math.sin((lobes2 + 1.0) * a)
-                a2 = math.degrees(math.atan2(y, x)) + sangle
-                dist = math.sqrt(x * x + y * y)
-                g = geod.Direct(pt.y(), pt.x(), a2, dist, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-                pts.append(QgsPointXY(g['lon2'], g['lat2']))
-                angle += self.step
-
-            makeIdlCrossingsPositive(pts)
-            # If the Output crs is not 4326 transform the points to the proper crs
-            if self.toSinkCrs:
-                for x, ptout in enumerate(pts):
-                    pts[x] = self.toSinkCrs.transform(ptout)
-
-            if self.shape_type == 0:
-                feature.setGeometry(QgsGeometry.fromPolygonXY([pts]))
-            else:
-                feature.setGeometry(QgsGeometry.fromPolylineXY(pts))
+            azimuths, distances = epicycloidPolar(r, lobes2, sangle, self.segments)
+            # If the Output crs is not 4326 the geometry is transformed to it as it is built
+            feature.setGeometry(polarShapeGeometry(pt.y(), pt.x(), azimuths, distances, self.shape_type, self.toSinkCrs, close=True))
             if self.export_geom:
                 attr = feature.attributes()
                 attr.append(pt_orig_x)
@@ -9,10 +9,9 @@
  ***************************************************************************/
 """
 import os
-from geographiclib.geodesic import Geodesic
 
 from qgis.core import (
-    QgsPointXY, QgsGeometry, QgsField, QgsPropertyDefinition,
+    QgsField, QgsPropertyDefinition,
     QgsProject, QgsWkbTypes, QgsCoordinateTransform)
 
 from qgis.core import (
@@ -26,8 +25,10 @@ from qgis.core import (
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtCore import QVariant, QUrl
 
-from .settings import settings, epsg4326, geod
-from .utils import tr, conversionToMeters, makeIdlCrossingsPositive, DISTANCE_LABELS
+from .settings import settings, epsg4326
+from .utils import tr, conversionToMeters, DISTANCE_LABELS, parallelWorkersParameter, ParallelShapes, shapeGeometry, polarShapeGeometry
+from .wkbGeometry import flatCoords
+from .shapeWorkers import gearCoords, gearPolar
 # import traceback
 
 SHAPE_TYPE = [tr("Polygon"), tr("Line")]
@@ -45,6 +46,7 @@ class CreateGearAlgorithm(QgsProcessingFeatureBasedAlgorithm):
     PrmUnitsOfMeasure = 'UnitsOfMeasure'
     PrmTeethPercent = 'TeethPercent'
     PrmSlotPercent = 'SlotPercent'
+    PrmParallelWorkers = 'ParallelWorkers'
 
     def createInstance(self):
         return CreateGearAlgorithm()
@@ -197,6 +199,7 @@ class CreateGearAlgorithm(QgsProcessingFeatureBasedAlgorithm):
                 defaultValue=0,
                 optional=False)
         )
+        self.addParameter(parallelWorkersParameter(self.PrmParallelWorkers))
 
     def prepareAlgorithm(self, parameters, context, feedback):
         self.shape_type = self.parameterAsInt(parameters, self.PrmShapeType, context)
@@ -246,12 +249,22 @@ class CreateGearAlgorithm(QgsProcessingFeatureBasedAlgorithm):
         else:
             self.geomTo4326 = None
             self.toSinkCrs = None
+        self.parallel = None
+        workers = self.parameterAsInt(parameters, self.PrmParallelWorkers, context)
+        if workers > 1:
+            if (self.outer_radius_dyn or self.inner_radius_dyn or self.start_angle_dyn or self.num_teeth_dyn or
+                    self.teeth_percent_dyn or self.slot_percent_dyn):
+                feedback.pushInfo(tr('Parallel workers are not used with data defined parameters'))
+            else:
+                self.parallel = ParallelShapes(
+                    source, self.geomTo4326, gearCoords,
+                    (self.outer_radius_converted, self.inner_radius_converted, self.start_angle, self.num_teeth,
+                     self.teeth_percent, self.slot_percent), workers)
         self.num_bad = 0
         return True
 
     def processFeature(self, feature, context, feedback):
         try:
-            pts = []
             pt = feature.geometry().asPoint()
             pt_orig_x = pt.x()
             pt_orig_y = pt.y()
@@ -303,40 +316,22 @@ class CreateGearAlgorithm(QgsProcessingFeatureBasedAlgorithm):
                     return []
             else:
                 num_teeth = self.num_teeth
-            half = (360.0 / num_teeth) / 2
-            teeth_half = (360.0 / num_teeth) * teeth_percent / 200
-            slot_half = (360.0 / num_teeth) * slot_percent / 200
-            
-            i = 0
-            while i < num_teeth:
-                angle = (i * 360.0 / num_teeth) + sangle
-                g = geod.Direct(pt.y(), pt.x(), angle - teeth_half, oradius, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-                pts.append(QgsPointXY(g['lon2'], g['lat2']))
-                g = geod.Direct(pt.y(), pt.x(), angle + teeth_half, oradius, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-                pts.append(QgsPointXY(g['lon2'], g['lat2']))
-                angle += half
-                g = geod.Direct(pt.y(), pt.x(), angle - slot_half, iradius, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-                pts.append(QgsPointXY(g['lon2'], g['lat2']))
-                g = geod.Direct(pt.y(), pt.x(), angle + slot_half, iradius, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-                pts.append(QgsPointXY(g['lon2'], g['lat2']))
-                i += 1
-
-            makeIdlCrossingsPositive(pts)
-            # If the Output crs is not 4326 transform the points to the proper crs
-            if self.toSinkCrs:
-                for x, ptout in enumerate(pts):
-                    pts[x] = self.toSinkCrs.transform(ptout)
-            pts.append(pts[0])
-            if self.shape_type == 0:
-                feature.setGeometry(QgsGeometry.fromPolygonXY([pts]))
+            coords = self.parallel.coords(feature, feedback) if self.parallel else None
+            # If the Output crs is not 4326 the geometry is transformed to it as it is built
+            if coords is None:
+                azimuths, distances = gearPolar(oradius, iradius, sangle, num_teeth, teeth_percent, slot_percent)
+                feature.setGeometry(polarShapeGeometry(pt.y(), pt.x(), azimuths, distances, self.shape_type, self.toSinkCrs, close=True))
             else:
-                feature.setGeometry(QgsGeometry.fromPolylineXY(pts))
+                feature.setGeometry(shapeGeometry(flatCoords(coords), self.shape_type, self.toSinkCrs, close=True))
         except Exception:
             self.num_bad += 1
             return []
         return [feature]
 
     def postProcessAlgorithm(self, context, feedback):
+        if self.parallel:
+            self.parallel.close(feedback)
+            self.parallel = None
         if self.num_bad:
             feedback.pushInfo(tr("{} out of {} features had invalid parameters and were ignored.".format(self.num_bad, self.total_features)))
         return {}
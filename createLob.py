@@ -10,10 +10,11 @@
 """
 import os
 import math
+from array import array
 from geographiclib.geodesic import Geodesic
 
 from qgis.core import (
-    QgsPointXY, QgsGeometry, QgsField,
+    QgsField,
     QgsProject, QgsWkbTypes, QgsCoordinateTransform, QgsPropertyDefinition)
 
 from qgis.core import (
@@ -28,7 +29,9 @@ from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtCore import QVariant, QUrl
 
 from .settings import epsg4326, geod, settings
-from .utils import tr, conversionToMeters, makeIdlCrossingsPositive, DISTANCE_LABELS
+from .utils import tr, conversionToMeters, makeIdlCrossingsPositiveCoords, geodesicLineCoords, DISTANCE_LABELS, parallelWorkersParameter, ParallelShapes
+from .wkbGeometry import flatCoords, polylineGeometry
+from .shapeWorkers import lobCoords
 
 
 class CreateLobAlgorithm(QgsProcessingFeatureBasedAlgorithm):
@@ -41,6 +44,7 @@ class CreateLobAlgorithm(QgsProcessingFeatureBasedAlgorithm):
     PrmUnits = 'Units'
     PrmExportInputGeometry = 'ExportInputGeometry'
     PrmOffset = 'Offset'
+    PrmParallelWorkers = 'ParallelWorkers'
 
     def createInstance(self):
         return CreateLobAlgorithm()
@@ -146,6 +150,7 @@ class CreateLobAlgorithm(QgsProcessingFeatureBasedAlgorithm):
                 False,
                 optional=True)
         )
+        self.addParameter(parallelWorkersParameter(self.PrmParallelWorkers))
 
     def prepareAlgorithm(self, parameters, context, feedback):
         self.azimuth = self.parameterAsDouble(parameters, self.PrmAzimuth, context)
@@ -181,6 +186,15 @@ class CreateLobAlgorithm(QgsProcessingFeatureBasedAlgorithm):
         else:
             self.geomTo4326 = None
             self.toSinkCrs = None
+        self.parallel = None
+        workers = self.parameterAsInt(parameters, self.PrmParallelWorkers, context)
+        if workers > 1:
+            if self.azimuth_dyn or self.dist_dyn or self.offset_dyn:
+                feedback.pushInfo(tr('Parallel workers are not used with data defined parameters'))
+            elif self.dist_converted - self.offset_converted > 0:
+                self.parallel = ParallelShapes(
+                    source, self.geomTo4326, lobCoords,
+                    (self.azimuth, self.dist_converted, self.offset_converted, self.maxseglen, self.maxSegments), workers)
         self.num_bad = 0
         return True
 
@@ -218,29 +232,26 @@ class CreateLobAlgorithm(QgsProcessingFeatureBasedAlgorithm):
             # make sure the coordinates are in EPSG:4326
             if self.geomTo4326:
                 pt = self.geomTo4326.transform(pt.x(), pt.y())
-            gline = geod.Line(pt.y(), pt.x(), bearing)
-            n = int(math.ceil((distance-offset) / self.maxseglen))
-            if n > self.maxSegments:
-                n = self.maxSegments
-            seglen = (distance-offset) / n
-            if offset == 0:
-                pts = [pt]
+            coords = self.parallel.coords(feature, feedback) if self.parallel else None
+            if coords is None:
+                gline = geod.Line(pt.y(), pt.x(), bearing)
+                n = int(math.ceil((distance-offset) / self.maxseglen))
+                if n > self.maxSegments:
+                    n = self.maxSegments
+                seglen = (distance-offset) / n
+                if offset == 0:
+                    pts = array('d', (pt.x(), pt.y()))
+                else:
+                    g = gline.Position(offset, Geodesic.LATITUDE | Geodesic.LONGITUDE | Geodesic.LONG_UNROLL)
+                    pts = array('d', (g['lon2'], g['lat2']))
+
+                pts.extend(geodesicLineCoords(gline, [offset + seglen * i for i in range(1, n + 1)]))
             else:
-                g = gline.Position(offset, Geodesic.LATITUDE | Geodesic.LONGITUDE | Geodesic.LONG_UNROLL)
-                pts = [QgsPointXY(g['lon2'], g['lat2'])]
+                pts = flatCoords(coords)
 
-            for i in range(1, n + 1):
-                s = offset + seglen * i
-                g = gline.Position(s, Geodesic.LATITUDE | Geodesic.LONGITUDE | Geodesic.LONG_UNROLL)
-                pts.append(QgsPointXY(g['lon2'], g['lat2']))
-
-            makeIdlCrossingsPositive(pts)
-            # If the Output crs is not 4326 transform the points to the proper crs
-            if self.toSinkCrs:
-                for x, ptout in enumerate(pts):
-                    pts[x] = self.toSinkCrs.transform(ptout)
-
-            feature.setGeometry(QgsGeometry.fromPolylineXY(pts))
+            makeIdlCrossingsPositiveCoords(pts)
+            # If the Output crs is not 4326 the geometry is transformed to it as it is built
+            feature.setGeometry(polylineGeometry(pts, self.toSinkCrs))
             if self.export_geom:
                 attr = feature.attributes()
                 attr.append(pt_orig_x)
@@ -253,6 +264,9 @@ class CreateLobAlgorithm(QgsProcessingFeatureBasedAlgorithm):
         return [feature]
 
     def postProcessAlgorithm(self, context, feedback):
+        if self.parallel:
+            self.parallel.close(feedback)
+            self.parallel = None
         if self.num_bad:
             feedback.pushInfo(tr("{} out of {} features had invalid parameters and were ignored.".format(self.num_bad, self.total_features)))
         return {}
@@ -9,10 +9,11 @@
  ***************************************************************************/
 """
 import os
+from array import array
 from geographiclib.geodesic import Geodesic
 
 from qgis.core import (
-    QgsField, QgsPointXY, QgsGeometry, QgsPropertyDefinition,
+    QgsField, QgsPropertyDefinition,
     QgsProject, QgsWkbTypes, QgsCoordinateTransform)
 
 from qgis.core import (
@@ -27,7 +28,8 @@ from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtCore import QVariant, QUrl
 
 from .settings import settings, epsg4326, geod
-from .utils import tr, conversionToMeters, makeIdlCrossingsPositive, DISTANCE_LABELS
+from .utils import tr, conversionToMeters, makeIdlCrossingsPositiveCoords, DISTANCE_LABELS
+from .wkbGeometry import polylineGeometry, polygonGeometry
 
 SHAPE_TYPE = [tr("Polygon"), tr("Line")]
 
@@ -224,14 +226,14 @@ class CreatePieAlgorithm(QgsProcessingFeatureBasedAlgorithm):
 
     def processFeature(self, feature, context, feedback):
         try:
-            pts = []
+            pts = array('d')
             pt = feature.geometry().asPoint()
             pt_orig_x = pt.x()
             pt_orig_y = pt.y()
             # make sure the coordinates are in EPSG:4326
             if self.geomTo4326:
                 pt = self.geomTo4326.transform(pt.x(), pt.y())
-            pts.append(pt)
+            pts.extend((pt.x(), pt.y()))
             if self.start_angle_dyn:
                 sangle, e = self.start_angle_property.valueAsDouble(context.expressionContext(), self.start_angle)
                 if not e:
@@ -268,23 +270,19 @@ class CreatePieAlgorithm(QgsProcessingFeatureBasedAlgorithm):
                 sangle -= 360.0
             while sangle < eangle:
                 g = geod.Direct(pt.y(), pt.x(), sangle, dist, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-                pts.append(QgsPointXY(g['lon2'], g['lat2']))
+                pts.extend((g['lon2'], g['lat2']))
                 sangle += self.ptSpacing  # add this number of degrees to the angle
 
             g = geod.Direct(pt.y(), pt.x(), eangle, dist, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-            pts.append(QgsPointXY(g['lon2'], g['lat2']))
-            pts.append(pt)
-
-            makeIdlCrossingsPositive(pts)
-            # If the Output crs is not 4326 transform the points to the proper crs
-            if self.toSinkCrs:
-                for x, ptout in enumerate(pts):
-                    pts[x] = self.toSinkCrs.transform(ptout)
+            pts.extend((g['lon2'], g['lat2']))
+            pts.extend((pt.x(), pt.y()))
 
+            makeIdlCrossingsPositiveCoords(pts)
+            # If the Output crs is not 4326 the geometry is transformed to it as it is built
             if self.shape_type == 0:
-                feature.setGeometry(QgsGeometry.fromPolygonXY([pts]))
+                feature.setGeometry(polygonGeometry([pts], self.toSinkCrs))
             else:
-                feature.setGeometry(QgsGeometry.fromPolylineXY(pts))
+                feature.setGeometry(polylineGeometry(pts, self.toSinkCrs))
             if self.export_geom:
                 attr = feature.attributes()
                 attr.append(pt_orig_x)
@@ -10,10 +10,9 @@
 """
 import os
 import math
-from geographiclib.geodesic import Geodesic
 
 from qgis.core import (
-    QgsPointXY, QgsGeometry, QgsField, QgsFeature,
+    QgsGeometry, QgsField, QgsFeature,
     QgsProject, QgsWkbTypes, QgsCoordinateTransform, QgsPropertyDefinition)
 
 from qgis.core import (
@@ -27,7 +26,7 @@ from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtCore import QVariant, QUrl
 
 from .settings import epsg4326, geod, settings
-from .utils import tr, conversionToMeters, conversionFromMeters, DISTANCE_LABELS
+from .utils import tr, conversionToMeters, conversionFromMeters, geodesicLinePoints, DISTANCE_LABELS
 
 
 class CreatePointsAlongLobAlgorithm(QgsProcessingFeatureBasedAlgorithm):
@@ -245,26 +244,20 @@ class CreatePointsAlongLobAlgorithm(QgsProcessingFeatureBasedAlgorithm):
             gline = geod.Line(pt.y(), pt.x(), bearing)
             index = 0
             attr = feature.attributes()
+            distances = []
             while index*inner_dist + offset < distance:
-                d = offset + index*inner_dist
-                g = gline.Position(d, Geodesic.LATITUDE | Geodesic.LONGITUDE | Geodesic.LONG_UNROLL)
-                pt2 = QgsPointXY(g['lon2'], g['lat2'])
+                distances.append(offset + index*inner_dist)
+                index += 1
+            # Add the very last point
+            distances.append(distance)
+            pts = geodesicLinePoints(gline, distances)
+            for index, (d, pt2) in enumerate(zip(distances, pts)):
                 if self.toSinkCrs:
                     pt2 = self.toSinkCrs.transform(pt2)
                 f = QgsFeature(feature)
                 f.setGeometry(QgsGeometry.fromPointXY(pt2))
                 f.setAttributes(attr+[index, d*self.fromMetersMeasureFactor])
                 features.append(f)
-                index += 1
-            # Add the very last point
-            g = gline.Position(distance, Geodesic.LATITUDE | Geodesic.LONGITUDE | Geodesic.LONG_UNROLL)
-            pt2 = QgsPointXY(g['lon2'], g['lat2'])
-            if self.toSinkCrs:
-                pt2 = self.toSinkCrs.transform(pt2)
-            f = QgsFeature(feature)
-            f.setGeometry(QgsGeometry.fromPointXY(pt2))
-            f.setAttributes(attr+[index, distance*self.fromMetersMeasureFactor])
-            features.append(f)
         except Exception:
             self.num_bad += 1
             return []
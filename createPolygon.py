@@ -9,10 +9,9 @@
  ***************************************************************************/
 """
 import os
-from geographiclib.geodesic import Geodesic
 
 from qgis.core import (
-    QgsPointXY, QgsGeometry, QgsField, QgsPropertyDefinition,
+    QgsField, QgsPropertyDefinition,
     QgsProject, QgsWkbTypes, QgsCoordinateTransform)
 
 from qgis.core import (
@@ -26,8 +25,9 @@ from qgis.core import (
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtCore import QVariant, QUrl
 
-from .settings import settings, epsg4326, geod
-from .utils import tr, conversionToMeters, makeIdlCrossingsPositive, DISTANCE_LABELS
+from .settings import settings, epsg4326
+from .utils import tr, conversionToMeters, DISTANCE_LABELS, polarShapeGeometry
+from .shapeWorkers import polygonPolar
 
 SHAPE_TYPE = [tr("Polygon"), tr("Line")]
 
@@ -226,24 +226,9 @@ class CreatePolygonAlgorithm(QgsProcessingFeatureBasedAlgorithm):
                     return []
             else:
                 d = self.dist_converted
-            pts = []
-            i = s
-            while i >= 0:
-                a = (i * 360.0 / s) + startangle
-                i -= 1
-                g = geod.Direct(pt.y(), pt.x(), a, d, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-                pts.append(QgsPointXY(g['lon2'], g['lat2']))
-
-            makeIdlCrossingsPositive(pts)
-            # If the Output crs is not 4326 transform the points to the proper crs
-            if self.toSinkCrs:
-                for x, ptout in enumerate(pts):
-                    pts[x] = self.toSinkCrs.transform(ptout)
-
-            if self.shape_type == 0:
-                feature.setGeometry(QgsGeometry.fromPolygonXY([pts]))
-            else:
-                feature.setGeometry(QgsGeometry.fromPolylineXY(pts))
+            azimuths, distances = polygonPolar(d, s, startangle)
+            # If the Output crs is not 4326 the geometry is transformed to it as it is built
+            feature.setGeometry(polarShapeGeometry(pt.y(), pt.x(), azimuths, distances, self.shape_type, self.toSinkCrs))
             if self.export_geom:
                 attr = feature.attributes()
                 attr.append(pt_orig_x)
@@ -9,10 +9,10 @@
  ***************************************************************************/
 """
 import os
-from geographiclib.geodesic import Geodesic
+from array import array
 
 from qgis.core import (
-    QgsPointXY, QgsGeometry, QgsLineString, QgsMultiLineString, QgsField,
+    QgsField,
     QgsProject, QgsWkbTypes, QgsCoordinateTransform, QgsPropertyDefinition)
 
 from qgis.core import (
@@ -27,8 +27,9 @@ from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtCore import QVariant, QUrl
 # import traceback
 
-from .settings import settings, epsg4326, geod
-from .utils import tr, conversionToMeters, DISTANCE_LABELS
+from .settings import settings, epsg4326
+from .utils import tr, conversionToMeters, DISTANCE_LABELS, fanAzimuths, geodesicRadialsCoords
+from .wkbGeometry import polylineGeometry, multiPolylineGeometry
 
 
 class CreateRadialLinesAlgorithm(QgsProcessingFeatureBasedAlgorithm):
@@ -187,7 +188,6 @@ class CreateRadialLinesAlgorithm(QgsProcessingFeatureBasedAlgorithm):
 
     def processFeature(self, feature, context, feedback):
         try:
-            line_strings = []
             pt = feature.geometry().asPoint()
             pt_orig_x = pt.x()
             pt_orig_y = pt.y()
@@ -219,31 +219,21 @@ class CreateRadialLinesAlgorithm(QgsProcessingFeatureBasedAlgorithm):
                     return []
             else:
                 num_lines = self.nlines
-            angle = 0
-            angle_step = 360.0 / num_lines
-            while angle < 360:
-                if inner_rad == 0:
-                    pt_start = QgsPointXY(lon, lat)
-                else:
-                    g = geod.Direct(lat, lon, angle, inner_rad, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-                    pt_start = QgsPointXY(g['lon2'], g['lat2'])
-                g = geod.Direct(lat, lon, angle, outer_rad, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-                pt_end = QgsPointXY(g['lon2'], g['lat2'])
-                if self.to_sink_crs:
-                    pt_start = self.to_sink_crs.transform(pt_start)
-                    pt_end = self.to_sink_crs.transform(pt_end)
-
-                line_str = QgsLineString([pt_start, pt_end])
-                line_strings.append(line_str)
-                angle += angle_step
+            angles = fanAzimuths(360.0 / num_lines)
+            if inner_rad == 0:
+                line_strings = []
+                for end in geodesicRadialsCoords(lat, lon, angles, [outer_rad]):
+                    line_str = array('d', (lon, lat))
+                    line_str.extend(end)
+                    line_strings.append(line_str)
+            else:
+                line_strings = geodesicRadialsCoords(lat, lon, angles, [inner_rad, outer_rad])
 
+            # If the Output crs is not 4326 the geometry is transformed to it as it is built
             if len(line_strings) == 1:
-                feature.setGeometry(QgsGeometry(line_strings[0]))
+                feature.setGeometry(polylineGeometry(line_strings[0], self.to_sink_crs))
             else:
-                g = QgsMultiLineString()
-                for line_str in line_strings:
-                    g.addGeometry(line_str)
-                feature.setGeometry(QgsGeometry(g))
+                feature.setGeometry(multiPolylineGeometry(line_strings, self.to_sink_crs))
             if self.export_geom:
                 attr = feature.attributes()
                 attr.append(pt_orig_x)
@@ -9,10 +9,10 @@
  ***************************************************************************/
 """
 import os
-from geographiclib.geodesic import Geodesic
+from array import array
 
 from qgis.core import (
-    QgsPointXY, QgsFeature, QgsGeometry, QgsField,
+    QgsFeature, QgsField,
     QgsProject, QgsWkbTypes, QgsCoordinateTransform, QgsPropertyDefinition)
 
 from qgis.core import (
@@ -28,8 +28,9 @@ from qgis.core import (
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtCore import QVariant, QUrl
 
-from .settings import settings, epsg4326, geod
-from .utils import tr, conversionToMeters, DISTANCE_LABELS, makeIdlCrossingsPositive, hasIdlCrossing
+from .settings import settings, epsg4326
+from .utils import tr, conversionToMeters, DISTANCE_LABELS, makeIdlCrossingsPositiveCoords, hasIdlCrossingCoords, fanAzimuths, deviationSegments, maxDeviationParameter, geodesicCircleCoords, geodesicRingsCoords, geodesicRadialsCoords, BufferedSink
+from .wkbGeometry import multiPolylineGeometry
 
 
 class ConcentricRingsAlgorithm(QgsProcessingAlgorithm):
@@ -42,6 +43,7 @@ class ConcentricRingsAlgorithm(QgsProcessingAlgorithm):
     PrmRingCount = 'RingCount'
     PrmUnitsOfMeasure = 'UnitsOfMeasure'
     PrmDrawingSegments = 'DrawingSegments'
+    PrmMaxDeviation = 'MaxDeviation'
     PrmRadials = 'Radials'
     PrmStartingRadialAngle = 'StartingRadialAngle'
 
@@ -141,6 +143,7 @@ class ConcentricRingsAlgorithm(QgsProcessingAlgorithm):
                 minValue=4,
                 optional=True)
         )
+        self.addParameter(maxDeviationParameter(self.PrmMaxDeviation))
         self.addParameter(
             QgsProcessingParameterNumber(
                 self.PrmRadials,
@@ -195,6 +198,7 @@ class ConcentricRingsAlgorithm(QgsProcessingAlgorithm):
             ring_count_property = parameters[self.PrmRingCount]
 
         segments = self.parameterAsInt(parameters, self.PrmDrawingSegments, context)
+        max_deviation = self.parameterAsDouble(parameters, self.PrmMaxDeviation, context)
         units = self.parameterAsInt(parameters, self.PrmUnitsOfMeasure, context)
 
         measure_factor = conversionToMeters(units)
@@ -203,6 +207,7 @@ class ConcentricRingsAlgorithm(QgsProcessingAlgorithm):
         starting_radius_converted = starting_radius * measure_factor
 
         pt_spacing = 360.0 / segments
+        azimuths = fanAzimuths(pt_spacing)
         source = self.parameterAsSource(parameters, 'INPUT', context)
         src_crs = source.sourceCrs()
         total_features = source.featureCount()
@@ -217,6 +222,7 @@ class ConcentricRingsAlgorithm(QgsProcessingAlgorithm):
         (sink, dest_id) = self.parameterAsSink(
             parameters, 'OUTPUT',
             context, source.fields(), QgsWkbTypes.MultiLineString, source.sourceCrs())
+        sink = BufferedSink(sink)
 
         total = 100.0 / source.featureCount() if source.featureCount() else 0
         iterator = source.getFeatures()
@@ -268,43 +274,35 @@ class ConcentricRingsAlgorithm(QgsProcessingAlgorithm):
                     rcount = ring_count
 
                 multi_line = []
-                for ring in range(0, rcount):
-                    dist = sradius + ring * ring_dist
-                    pts = []
-                    angle = 0
-                    while angle < 360:
-                        g = geod.Direct(lat, lon, angle, dist, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-                        pts.append(QgsPointXY(g['lon2'], g['lat2']))
-                        angle += pt_spacing
-                    pts.append(pts[0])
-                    crosses_idl = hasIdlCrossing(pts)
+                radii = [sradius + ring * ring_dist for ring in range(0, rcount)]
+                if max_deviation:
+                    # Each ring has its own azimuths so they are drawn one at a time
+                    rings = [geodesicCircleCoords(lat, lon, fanAzimuths(360.0 / deviationSegments(r, max_deviation)), r) for r in radii]
+                else:
+                    rings = geodesicRingsCoords(lat, lon, azimuths, radii)
+                for pts in rings:
+                    pts.extend(pts[0:2])
+                    crosses_idl = hasIdlCrossingCoords(pts)
                     if crosses_idl:
-                        makeIdlCrossingsPositive(pts, True)
-
-                    # If the Output crs is not 4326 transform the points to the proper crs
-                    if to_sink_crs:
-                        for x, vtx in enumerate(pts):
-                            pts[x] = to_sink_crs.transform(vtx)
+                        makeIdlCrossingsPositiveCoords(pts, True)
                     multi_line.append(pts)
                 if radial_line_cnt:
                     # This will be the number of points to draw the radials
                     num_radial_pts = int(segments / 6)
                     if num_radial_pts < 2:
                         num_radial_pts = 2
-                    for i in range(radial_line_cnt):
-                        angle = starting_radial_angle + i * 360 / radial_line_cnt
-                        pts = [pt]
-                        for j in range(1, num_radial_pts + 1):
-                            dist2 = dist * j / num_radial_pts
-                            g = geod.Direct(lat, lon, angle, dist2, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-                            pts.append(QgsPointXY(g['lon2'], g['lat2']))
-                        if to_sink_crs:
-                            for x, vtx in enumerate(pts):
-                                pts[x] = to_sink_crs.transform(vtx)
+                    angles = [starting_radial_angle + i * 360 / radial_line_cnt for i in range(radial_line_cnt)]
+                    # The radials extend to the outer ring
+                    dist = radii[-1]
+                    dists = [dist * j / num_radial_pts for j in range(1, num_radial_pts + 1)]
+                    for radial in geodesicRadialsCoords(lat, lon, angles, dists):
+                        pts = array('d', (pt.x(), pt.y()))
+                        pts.extend(radial)
                         multi_line.append(pts)
 
                 f = QgsFeature()
-                f.setGeometry(QgsGeometry.fromMultiPolylineXY(multi_line))
+                # If the Output crs is not 4326 the geometry is transformed to it as it is built
+                f.setGeometry(multiPolylineGeometry(multi_line, to_sink_crs))
                 f.setAttributes(feature.attributes())
                 sink.addFeature(f)
             except Exception:
@@ -313,6 +311,7 @@ class ConcentricRingsAlgorithm(QgsProcessingAlgorithm):
             if cnt % 100 == 0:
                 feedback.setProgress(int(cnt * total))
 
+        sink.flush()
         if num_bad:
             feedback.pushInfo(tr("{} out of {} features had invalid parameters and were ignored.".format(num_bad, total_features)))
         return {'OUTPUT': dest_id}
@@ -9,11 +9,9 @@
  ***************************************************************************/
 """
 import os
-import math
-from geographiclib.geodesic import Geodesic
 
 from qgis.core import (
-    QgsPointXY, QgsGeometry, QgsField,
+    QgsField,
     QgsProject, QgsWkbTypes, QgsCoordinateTransform)
 
 from qgis.core import (
@@ -26,8 +24,9 @@ from qgis.core import (
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtCore import QVariant, QUrl
 
-from .settings import settings, epsg4326, geod
-from .utils import tr, conversionToMeters, makeIdlCrossingsPositive, DISTANCE_LABELS
+from .settings import settings, epsg4326
+from .utils import tr, conversionToMeters, DISTANCE_LABELS, polarShapeGeometry
+from .shapeWorkers import rosePolar
 import traceback
 
 SHAPE_TYPE = [tr("Polygon"), tr("Line")]
@@ -154,18 +153,8 @@ class CreateRoseAlgorithm(QgsProcessingFeatureBasedAlgorithm):
         measureFactor = conversionToMeters(units)
         self.radius *= measureFactor
 
-        # Calculate distances one time.
-        self.dist = []
-        if self.petals == 1:
-            self.dist.append(0.0)
-        step = 1
-        angle = -90.0 + step
-        while angle < 90.0:
-            a = math.radians(angle)
-            r = math.cos(a)
-            self.dist.append(r)
-            angle += step
-        self.dist_cnt = len(self.dist)
+        # Calculate the azimuths and distances one time.
+        self.azimuths, self.distances = rosePolar(self.radius, self.petals, self.startAngle)
 
         source = self.parameterAsSource(parameters, 'INPUT', context)
         srcCRS = source.sourceCrs()
@@ -182,38 +171,14 @@ class CreateRoseAlgorithm(QgsProcessingFeatureBasedAlgorithm):
 
     def processFeature(self, feature, context, feedback):
         try:
-            pts = []
             pt = feature.geometry().asPoint()
             pt_orig_x = pt.x()
             pt_orig_y = pt.y()
             # make sure the coordinates are in EPSG:4326
             if self.geomTo4326:
                 pt = self.geomTo4326.transform(pt.x(), pt.y())
-            arange = 360.0 / self.petals
-            angle = -arange / 2.0
-            astep = arange / self.dist_cnt
-            for i in range(self.petals):
-                aoffset = arange * (self.petals - 1)
-                index = 0
-                while index < self.dist_cnt:
-                    r = self.dist[index] * self.radius
-                    g = geod.Direct(pt.y(), pt.x(), angle + aoffset + self.startAngle, r, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-                    pts.append(QgsPointXY(g['lon2'], g['lat2']))
-                    angle += astep
-                    index += 1
-            # repeat the very first point to close the polygon
-            pts.append(pts[0])
-
-            makeIdlCrossingsPositive(pts)
-            # If the Output crs is not 4326 transform the points to the proper crs
-            if self.toSinkCrs:
-                for x, ptout in enumerate(pts):
-                    pts[x] = self.toSinkCrs.transform(ptout)
-
-            if self.shape_type == 0:
-                feature.setGeometry(QgsGeometry.fromPolygonXY([pts]))
-            else:
-                feature.setGeometry(QgsGeometry.fromPolylineXY(pts))
+            # If the Output crs is not 4326 the geometry is transformed to it as it is built
+            feature.setGeometry(polarShapeGeometry(pt.y(), pt.x(), self.azimuths, self.distances, self.shape_type, self.toSinkCrs, close=True))
             if self.export_geom:
                 attr = feature.attributes()
                 attr.append(pt_orig_x)
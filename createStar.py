@@ -9,10 +9,9 @@
  ***************************************************************************/
 """
 import os
-from geographiclib.geodesic import Geodesic
 
 from qgis.core import (
-    QgsPointXY, QgsGeometry, QgsField, QgsPropertyDefinition,
+    QgsField, QgsPropertyDefinition,
     QgsProject, QgsWkbTypes, QgsCoordinateTransform)
 
 from qgis.core import (
@@ -26,8 +25,9 @@ from qgis.core import (
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtCore import QVariant, QUrl
 
-from .settings import settings, epsg4326, geod
-from .utils import tr, conversionToMeters, makeIdlCrossingsPositive, DISTANCE_LABELS
+from .settings import settings, epsg4326
+from .utils import tr, conversionToMeters, DISTANCE_LABELS, polarShapeGeometry
+from .shapeWorkers import starPolar
 # import traceback
 
 SHAPE_TYPE = [tr("Polygon"), tr("Line")]
@@ -197,7 +197,6 @@ class CreateStarAlgorithm(QgsProcessingFeatureBasedAlgorithm):
         self.numPoints_dyn = QgsProcessingParameters.isDynamic(parameters, self.PrmStarPoints)
         if self.numPoints_dyn:
             self.numPoints_property = parameters[self.PrmStarPoints]
-        self.half = (360.0 / self.numPoints) / 2.0
         units = self.parameterAsInt(parameters, self.PrmUnitsOfMeasure, context)
         self.export_geom = self.parameterAsBool(parameters, self.PrmExportInputGeometry, context)
 
@@ -220,7 +219,6 @@ class CreateStarAlgorithm(QgsProcessingFeatureBasedAlgorithm):
 
     def processFeature(self, feature, context, feedback):
         try:
-            pts = []
             pt = feature.geometry().asPoint()
             pt_orig_x = pt.x()
             pt_orig_y = pt.y()
@@ -256,31 +254,12 @@ class CreateStarAlgorithm(QgsProcessingFeatureBasedAlgorithm):
                 if not e or spoints < 3:
                     self.num_bad += 1
                     return []
-                shalf = (360.0 / spoints) / 2.0
             else:
                 spoints = self.numPoints
-                shalf = self.half
-
-            i = spoints - 1
-            while i >= 0:
-                i -= 1
-                angle = (i * 360.0 / spoints) + sangle
-                g = geod.Direct(pt.y(), pt.x(), angle, oradius, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-                pts.append(QgsPointXY(g['lon2'], g['lat2']))
-                g = geod.Direct(pt.y(), pt.x(), angle - shalf, iradius, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-                pts.append(QgsPointXY(g['lon2'], g['lat2']))
-
-            makeIdlCrossingsPositive(pts)
-            # If the Output crs is not 4326 transform the points to the proper crs
-            if self.toSinkCrs:
-                for x, ptout in enumerate(pts):
-                    pts[x] = self.toSinkCrs.transform(ptout)
-
-            pts.append(pts[0])
-            if self.shape_type == 0:
-                feature.setGeometry(QgsGeometry.fromPolygonXY([pts]))
-            else:
-                feature.setGeometry(QgsGeometry.fromPolylineXY(pts))
+
+            azimuths, distances = starPolar(oradius, iradius, sangle, spoints)
+            # If the Output crs is not 4326 the geometry is transformed to it as it is built
+            feature.setGeometry(polarShapeGeometry(pt.y(), pt.x(), azimuths, distances, self.shape_type, self.toSinkCrs, close=True))
             if self.export_geom:
                 attr = feature.attributes()
                 attr.append(pt_orig_x)
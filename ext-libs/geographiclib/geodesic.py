@@ -9,6 +9,10 @@ inverse geodesic problems are solved by
     geodesic problem
   * :meth:`~geographiclib.geodesic.Geodesic.ArcDirect` Solve the direct
     geodesic problem in terms of spherical arc length
+  * :meth:`~geographiclib.geodesic.Geodesic.DirectFan` Solve the direct
+    geodesic problem for arrays of azimuths and distances about one point
+  * :meth:`~geographiclib.geodesic.Geodesic.InverseArray` Solve the inverse
+    geodesic problem for arrays of pairs of points
 
 :class:`~geographiclib.geodesicline.GeodesicLine` objects can be created
 with
@@ -78,9 +82,9 @@ The public attributes for this class are
 ######################################################################
 
 import math
-from geographiclib.geomath import Math
-from geographiclib.constants import Constants
-from geographiclib.geodesiccapability import GeodesicCapability
+from .geomath import Math
+from .constants import Constants
+from .geodesiccapability import GeodesicCapability
 
 class Geodesic(object):
   """Solve geodesic problems"""
@@ -218,7 +222,7 @@ class Geodesic(object):
       m = (Geodesic.nC1_ - l) // 2        # order of polynomial in eps^2
       c[l] = d * Math.polyval(m, coeff, o, eps2) / coeff[o + m + 1]
       o += m + 2
-      d *= eps
+      d = d * eps                 # not in place, eps may be an array
   _C1f = staticmethod(_C1f)
 
   def _C1pf(eps, c):
@@ -238,7 +242,7 @@ class Geodesic(object):
       m = (Geodesic.nC1p_ - l) // 2 # order of polynomial in eps^2
       c[l] = d * Math.polyval(m, coeff, o, eps2) / coeff[o + m + 1]
       o += m + 2
-      d *= eps
+      d = d * eps                 # not in place, eps may be an array
   _C1pf = staticmethod(_C1pf)
 
   def _A2m1f(eps):
@@ -268,7 +272,7 @@ class Geodesic(object):
       m = (Geodesic.nC2_ - l) // 2        # order of polynomial in eps^2
       c[l] = d * Math.polyval(m, coeff, o, eps2) / coeff[o + m + 1]
       o += m + 2
-      d *= eps
+      d = d * eps                 # not in place, eps may be an array
   _C2f = staticmethod(_C2f)
 
   def __init__(self, a, f):
@@ -1060,7 +1064,7 @@ class Geodesic(object):
   # return a12, lat2, lon2, azi2, s12, m12, M12, M21, S12
   def _GenDirect(self, lat1, lon1, azi1, arcmode, s12_a12, outmask):
     """Private: General version of direct problem"""
-    from geographiclib.geodesicline import GeodesicLine
+    from .geodesicline import GeodesicLine
     # Automatically supply DISTANCE_IN if necessary
     if not arcmode: outmask |= Geodesic.DISTANCE_IN
     line = GeodesicLine(self, lat1, lon1, azi1, outmask)
@@ -1140,6 +1144,86 @@ class Geodesic(object):
     if outmask & Geodesic.AREA: result['S12'] = S12
     return result
 
+  def DirectFan(self, lat1, lon1, azi1, s12,
+                outmask = GeodesicCapability.STANDARD):
+    """Solve the direct geodesic problem for a fan of geodesics
+
+    :param lat1: latitude of the first point in degrees
+    :param lon1: longitude of the first point in degrees
+    :param azi1: array of azimuths at the first point in degrees
+    :param s12: array of distances from the first point to the second
+      in meters
+    :param outmask: the :ref:`output mask <outmask>`
+    :return: a :ref:`dict` whose *lat2*, *lon2*, *azi2*, *s12*, *a12*
+      entries are NumPy arrays
+
+    Compute the geodesics starting at (*lat1*, *lon1*) with azimuths
+    *azi1* and lengths *s12*.  *azi1* and *s12* are broadcast against
+    each other, so either may be a scalar.  The quantities that depend
+    only on the starting point are computed once and all the geodesics
+    are evaluated together.  Those that depend on the azimuth are
+    computed once for each element of *azi1*, so a row of azimuths
+    broadcast against a column of distances finds the points along each
+    geodesic at the cost of setting it up once.  The results agree with
+    :meth:`~geographiclib.geodesic.Geodesic.Direct` to round-off.  This
+    method requires NumPy.
+
+    """
+
+    from .geodesicarray import DirectFan
+    return DirectFan(self, lat1, lon1, azi1, s12, outmask)
+
+  def DirectArray(self, lat1, lon1, azi1, s12,
+                  outmask = GeodesicCapability.STANDARD):
+    """Solve the direct geodesic problem for arrays of starting points
+
+    :param lat1: array of latitudes of the first points in degrees
+    :param lon1: array of longitudes of the first points in degrees
+    :param azi1: array of azimuths at the first points in degrees
+    :param s12: array of distances from the first points to the second
+      in meters
+    :param outmask: the :ref:`output mask <outmask>`
+    :return: a :ref:`dict` whose *lat1*, *lon1*, *azi1*, *lat2*, *lon2*,
+      *azi2*, *s12*, *a12* entries are NumPy arrays
+
+    Compute the geodesics starting at the points (*lat1*, *lon1*) with
+    azimuths *azi1* and lengths *s12*.  The four arguments are broadcast
+    against each other so, unlike
+    :meth:`~geographiclib.geodesic.Geodesic.DirectFan`, every geodesic
+    may have its own starting point.  The results agree with
+    :meth:`~geographiclib.geodesic.Geodesic.Direct` to round-off.  This
+    method requires NumPy.
+
+    """
+
+    from .geodesicarray import DirectArray
+    return DirectArray(self, lat1, lon1, azi1, s12, outmask)
+
+  def InverseArray(self, lat1, lon1, lat2, lon2,
+                   outmask = GeodesicCapability.STANDARD):
+    """Solve the inverse geodesic problem for arrays of points
+
+    :param lat1: array of latitudes of the first points in degrees
+    :param lon1: array of longitudes of the first points in degrees
+    :param lat2: array of latitudes of the second points in degrees
+    :param lon2: array of longitudes of the second points in degrees
+    :param outmask: the :ref:`output mask <outmask>`
+    :return: a :ref:`dict` whose *lat1*, *lon1*, *azi1*, *lat2*, *lon2*,
+      *azi2*, *s12*, *a12* entries are NumPy arrays
+
+    Compute the geodesic distances and azimuths between the pairs of
+    points (*lat1*, *lon1*) and (*lat2*, *lon2*).  The four arguments are
+    broadcast against each other.  All the pairs are solved together; the
+    Newton iteration continues only for the pairs which have not yet
+    converged.  The results agree with
+    :meth:`~geographiclib.geodesic.Geodesic.Inverse` to round-off.  This
+    method requires NumPy.
+
+    """
+
+    from .geodesicarray import InverseArray
+    return InverseArray(self, lat1, lon1, lat2, lon2, outmask)
+
   def Line(self, lat1, lon1, azi1,
            caps = GeodesicCapability.STANDARD |
            GeodesicCapability.DISTANCE_IN):
@@ -1158,14 +1242,14 @@ class Geodesic(object):
 
     """
 
-    from geographiclib.geodesicline import GeodesicLine
+    from .geodesicline import GeodesicLine
     return GeodesicLine(self, lat1, lon1, azi1, caps)
 
   def _GenDirectLine(self, lat1, lon1, azi1, arcmode, s12_a12,
                      caps = GeodesicCapability.STANDARD |
                      GeodesicCapability.DISTANCE_IN):
     """Private: general form of DirectLine"""
-    from geographiclib.geodesicline import GeodesicLine
+    from .geodesicline import GeodesicLine
     # Automatically supply DISTANCE_IN if necessary
     if not arcmode: caps |= Geodesic.DISTANCE_IN
     line = GeodesicLine(self, lat1, lon1, azi1, caps)
@@ -1240,7 +1324,7 @@ class Geodesic(object):
 
     """
 
-    from geographiclib.geodesicline import GeodesicLine
+    from .geodesicline import GeodesicLine
     a12, _, salp1, calp1, _, _, _, _, _, _ = self._GenInverse(
       lat1, lon1, lat2, lon2, 0)
     azi1 = Math.atan2d(salp1, calp1)
@@ -1259,7 +1343,7 @@ class Geodesic(object):
 
     """
 
-    from geographiclib.polygonarea import PolygonArea
+    from .polygonarea import PolygonArea
     return PolygonArea(self, polyline)
 
   EMPTY         = GeodesicCapability.EMPTY
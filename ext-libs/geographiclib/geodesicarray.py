@@ -0,0 +1,976 @@
+"""geodesicarray.py: NumPy versions of the geodesic calculations
+
+This module supplies the array implementations behind the batch methods
+
+  * :meth:`~geographiclib.geodesic.Geodesic.DirectFan` solve the direct
+    geodesic problem for many azimuths and distances about one point
+  * :meth:`~geographiclib.geodesic.Geodesic.InverseArray` solve the inverse
+    geodesic problem for arrays of pairs of points
+  * :meth:`~geographiclib.geodesicline.GeodesicLine.Positions` find the
+    positions for many distances along one geodesic line
+  * :meth:`~geographiclib.polygonarea.PolygonArea.AddPoints` add many
+    vertices to a polygon
+
+The routines here follow the scalar code in geodesic.py and
+geodesicline.py step by step, with the branches replaced by element
+wise selections.  NumPy is only required when one of the batch methods
+is called.
+
+"""
+# geodesicarray.py
+#
+# This is an array transcription of parts of the GeographicLib::Geodesic
+# and GeographicLib::GeodesicLine classes.  See geodesic.py and
+# geodesicline.py for the scalar versions and the references.
+######################################################################
+
+import math
+import numpy as np
+from .geomath import Math
+
+def _asfloat(x):
+  """Private: convert x to a float64 array."""
+  return np.asarray(x, dtype = np.float64)
+
+def AngRound(x):
+  """Private: array version of Math.AngRound."""
+  z = 1/16.0
+  y = np.abs(x)
+  y = np.where(y < z, z - (z - y), y)
+  return np.where(x == 0, 0.0, np.where(x < 0, -y, y))
+
+def remainder(x, y):
+  """array version of Math.remainder, the remainder of x/y in [-y/2, y/2]."""
+  z = np.where(np.isfinite(x), np.fmod(x, y), Math.nan)
+  z = np.where(x == 0, x, z)
+  return np.where(z < -y/2, z + y, np.where(z < y/2, z, z - y))
+
+def AngNormalize(x):
+  """array version of Math.AngNormalize, reduce angle to (-180,180]"""
+  y = remainder(x, 360)
+  return np.where(y == -180, 180.0, y)
+
+def LatFix(x):
+  """array version of Math.LatFix, replace angles outside [-90,90] by NaN"""
+  return np.where(np.abs(x) > 90, Math.nan, x)
+
+def norm(x, y):
+  """Private: array version of Math.norm."""
+  r = np.hypot(x, y)
+  return x/r, y/r
+
+def sincosd(x):
+  """array version of Math.sincosd, sine and cosine of x in degrees."""
+  x = _asfloat(x)
+  r = np.where(np.isfinite(x), np.fmod(x, 360), Math.nan)
+  q = np.where(np.isnan(r), 0, np.round(r / 90)).astype(np.int64)
+  r = np.radians(r - 90 * q)
+  s = np.sin(r); c = np.cos(r)
+  q = q % 4
+  s, c = (np.select([q == 1, q == 2, q == 3], [c, -s, -c], s),
+          np.select([q == 1, q == 2, q == 3], [-s, -c, s], c))
+  # Remove the minus sign on -0.0 except for sin(-0.0).
+  return np.where(x == 0, x, 0.0 + s), 0.0 + c
+
+def atan2d(y, x):
+  """array version of Math.atan2d, atan2(y, x) with the result in degrees"""
+  y, x = np.broadcast_arrays(_asfloat(y), _asfloat(x))
+  swap = np.abs(y) > np.abs(x)
+  x, y = np.where(swap, y, x), np.where(swap, x, y)
+  q = np.where(swap, 2, 0) + (x < 0)
+  x = np.abs(x)
+  ang = np.degrees(np.arctan2(y, x))
+  return np.select([q == 1, q == 2, q == 3],
+                   [np.where(y >= 0, 180.0, -180.0) - ang, 90 - ang, -90 + ang],
+                   ang)
+
+def _sum(u, v):
+  """Private: array version of Math.sum, error free transformation of a sum."""
+  s = u + v
+  up = s - v
+  vpp = s - up
+  up = up - u
+  vpp = vpp - v
+  t = -(up + vpp)
+  return s, t
+
+def AngDiff(x, y):
+  """array version of Math.AngDiff, y - x reduced to [-180,180] accurately"""
+  d, t = _sum(AngNormalize(-x), AngNormalize(y))
+  d = AngNormalize(d)
+  return _sum(np.where((d == 180) & (t > 0), -180.0, d), t)
+
+def cbrt(x):
+  """array version of Math.cbrt, the real cube root of a number"""
+  y = np.power(np.abs(x), 1/3.0)
+  return np.where(x > 0, y, np.where(x < 0, -y, x))
+
+class _LineArray(object):
+  """Private: the set up of GeodesicLine for arrays of starting points"""
+
+  def __init__(self, geod, lat1, lon1, azi1, caps):
+    from .geodesic import Geodesic
+    self.a = geod.a
+    self.f = geod.f
+    self._b = geod._b
+    self._c2 = geod._c2
+    self._f1 = geod._f1
+    self.caps = (caps | Geodesic.LATITUDE | Geodesic.AZIMUTH |
+                 Geodesic.LONG_UNROLL)
+
+    # Quantities that depend only on the starting latitude are computed once
+    # when lat1 is a scalar.
+    self.lat1 = LatFix(_asfloat(lat1))
+    self.lon1 = _asfloat(lon1)
+    self.azi1 = AngNormalize(_asfloat(azi1))
+    self.salp1, self.calp1 = sincosd(AngRound(_asfloat(azi1)))
+
+    sbet1, cbet1 = sincosd(AngRound(self.lat1)); sbet1 = sbet1 * self._f1
+    # Ensure cbet1 = +epsilon at poles
+    sbet1, cbet1 = norm(sbet1, cbet1)
+    cbet1 = np.maximum(Geodesic.tiny_, cbet1)
+    self._dn1 = np.sqrt(1 + geod._ep2 * Math.sq(sbet1))
+
+    # Evaluate alp0 from sin(alp1) * cos(bet1) = sin(alp0),
+    self._salp0 = self.salp1 * cbet1
+    self._calp0 = np.hypot(self.calp1, self.salp1 * sbet1)
+    self._ssig1 = sbet1 + 0 * self._salp0
+    self._somg1 = self._salp0 * sbet1
+    self._csig1 = self._comg1 = np.where((sbet1 != 0) | (self.calp1 != 0),
+                                         cbet1 * self.calp1, 1.0)
+    self._ssig1, self._csig1 = norm(self._ssig1, self._csig1)
+
+    self._k2 = Math.sq(self._calp0) * geod._ep2
+    eps = self._k2 / (2 * (1 + np.sqrt(1 + self._k2)) + self._k2)
+
+    if self.caps & Geodesic.CAP_C1:
+      self._A1m1 = Geodesic._A1m1f(eps)
+      self._C1a = list(range(Geodesic.nC1_ + 1))
+      Geodesic._C1f(eps, self._C1a)
+      self._B11 = Geodesic._SinCosSeries(
+        True, self._ssig1, self._csig1, self._C1a)
+      s = np.sin(self._B11); c = np.cos(self._B11)
+      # tau1 = sig1 + B11
+      self._stau1 = self._ssig1 * c + self._csig1 * s
+      self._ctau1 = self._csig1 * c - self._ssig1 * s
+
+    if self.caps & Geodesic.CAP_C1p:
+      self._C1pa = list(range(Geodesic.nC1p_ + 1))
+      Geodesic._C1pf(eps, self._C1pa)
+
+    if self.caps & Geodesic.CAP_C2:
+      self._A2m1 = Geodesic._A2m1f(eps)
+      self._C2a = list(range(Geodesic.nC2_ + 1))
+      Geodesic._C2f(eps, self._C2a)
+      self._B21 = Geodesic._SinCosSeries(
+        True, self._ssig1, self._csig1, self._C2a)
+
+    if self.caps & Geodesic.CAP_C3:
+      self._C3a = list(range(Geodesic.nC3_))
+      geod._C3f(eps, self._C3a)
+      self._A3c = -self.f * self._salp0 * geod._A3f(eps)
+      self._B31 = Geodesic._SinCosSeries(
+        True, self._ssig1, self._csig1, self._C3a)
+
+    if self.caps & Geodesic.CAP_C4:
+      self._C4a = list(range(Geodesic.nC4_))
+      geod._C4f(eps, self._C4a)
+      # Multiplier = a^2 * e^2 * cos(alpha0) * sin(alpha0)
+      self._A4 = Math.sq(self.a) * self._calp0 * self._salp0 * geod._e2
+      self._B41 = Geodesic._SinCosSeries(
+        False, self._ssig1, self._csig1, self._C4a)
+
+# return a12, lat2, lon2, azi2, s12, m12, M12, M21, S12
+def GenPosition(line, arcmode, s12_a12, outmask):
+  """Private: array version of GeodesicLine._GenPosition
+
+  *line* is either a :class:`~geographiclib.geodesicline.GeodesicLine`
+  or a _LineArray; its attributes broadcast against *s12_a12*.
+
+  """
+  from .geodesic import Geodesic
+  s12_a12 = _asfloat(s12_a12)
+  shape = np.broadcast(s12_a12, line._salp0).shape
+  nan = np.full(shape, Math.nan)
+  a12 = lat2 = lon2 = azi2 = s12 = m12 = M12 = M21 = S12 = nan
+  outmask &= line.caps & Geodesic.OUT_MASK
+  if not (arcmode or
+          (line.caps & (Geodesic.OUT_MASK & Geodesic.DISTANCE_IN))):
+    # Uninitialized or impossible distance calculation requested
+    return a12, lat2, lon2, azi2, s12, m12, M12, M21, S12
+
+  B12 = 0.0; AB1 = 0.0
+  if arcmode:
+    # Interpret s12_a12 as spherical arc length
+    sig12 = np.radians(s12_a12)
+    ssig12, csig12 = sincosd(s12_a12)
+  else:
+    # Interpret s12_a12 as distance
+    tau12 = s12_a12 / (line._b * (1 + line._A1m1))
+    tau12 = np.where(np.isfinite(tau12), tau12, Math.nan)
+    s = np.sin(tau12); c = np.cos(tau12)
+    # tau2 = tau1 + tau12
+    B12 = - Geodesic._SinCosSeries(True,
+                                   line._stau1 * c + line._ctau1 * s,
+                                   line._ctau1 * c - line._stau1 * s,
+                                   line._C1pa)
+    sig12 = tau12 - (B12 - line._B11)
+    ssig12 = np.sin(sig12); csig12 = np.cos(sig12)
+    if abs(line.f) > 0.01:
+      # Reverted distance series is inaccurate for |f| > 1/100, so correct
+      # sig12 with 1 Newton iteration (see GeodesicLine._GenPosition).
+      ssig2 = line._ssig1 * csig12 + line._csig1 * ssig12
+      csig2 = line._csig1 * csig12 - line._ssig1 * ssig12
+      B12 = Geodesic._SinCosSeries(True, ssig2, csig2, line._C1a)
+      serr = ((1 + line._A1m1) * (sig12 + (B12 - line._B11)) -
+              s12_a12 / line._b)
+      sig12 = sig12 - serr / np.sqrt(1 + line._k2 * Math.sq(ssig2))
+      ssig12 = np.sin(sig12); csig12 = np.cos(sig12)
+
+  # sig2 = sig1 + sig12
+  ssig2 = line._ssig1 * csig12 + line._csig1 * ssig12
+  csig2 = line._csig1 * csig12 - line._ssig1 * ssig12
+  dn2 = np.sqrt(1 + line._k2 * Math.sq(ssig2))
+  if outmask & (
+    Geodesic.DISTANCE | Geodesic.REDUCEDLENGTH | Geodesic.GEODESICSCALE):
+    if arcmode or abs(line.f) > 0.01:
+      B12 = Geodesic._SinCosSeries(True, ssig2, csig2, line._C1a)
+    AB1 = (1 + line._A1m1) * (B12 - line._B11)
+  # sin(bet2) = cos(alp0) * sin(sig2)
+  sbet2 = line._calp0 * ssig2
+  # Alt: cbet2 = hypot(csig2, salp0 * ssig2)
+  cbet2 = np.hypot(line._salp0, line._calp0 * csig2)
+  # Break the degeneracy of salp0 = 0, csig2 = 0
+  degen = cbet2 == 0
+  cbet2 = np.where(degen, Geodesic.tiny_, cbet2)
+  csig2 = np.where(degen, Geodesic.tiny_, csig2)
+  # tan(alp0) = cos(sig2)*tan(alp2)
+  salp2 = line._salp0 + 0 * csig2; calp2 = line._calp0 * csig2
+
+  if outmask & Geodesic.DISTANCE:
+    s12 = (line._b * ((1 + line._A1m1) * sig12 + AB1) if arcmode
+           else s12_a12 + 0 * sig12)
+
+  if outmask & Geodesic.LONGITUDE:
+    # tan(omg2) = sin(alp0) * tan(sig2)
+    somg2 = line._salp0 * ssig2; comg2 = csig2
+    E = np.copysign(1, line._salp0)        # East or west going?
+    # omg12 = omg2 - omg1
+    omg12 = (E * (sig12
+                  - (np.arctan2(          ssig2,       csig2) -
+                     np.arctan2(    line._ssig1, line._csig1))
+                  + (np.arctan2(E *       somg2,       comg2) -
+                     np.arctan2(E * line._somg1, line._comg1)))
+             if outmask & Geodesic.LONG_UNROLL
+             else np.arctan2(somg2 * line._comg1 - comg2 * line._somg1,
+                             comg2 * line._comg1 + somg2 * line._somg1))
+    lam12 = omg12 + line._A3c * (
+      sig12 + (Geodesic._SinCosSeries(True, ssig2, csig2, line._C3a)
+               - line._B31))
+    lon12 = np.degrees(lam12)
+    lon2 = (line.lon1 + lon12 if outmask & Geodesic.LONG_UNROLL else
+            AngNormalize(AngNormalize(line.lon1) + AngNormalize(lon12)))
+
+  if outmask & Geodesic.LATITUDE:
+    lat2 = atan2d(sbet2, line._f1 * cbet2)
+
+  if outmask & Geodesic.AZIMUTH:
+    azi2 = atan2d(salp2, calp2)
+
+  if outmask & (Geodesic.REDUCEDLENGTH | Geodesic.GEODESICSCALE):
+    B22 = Geodesic._SinCosSeries(True, ssig2, csig2, line._C2a)
+    AB2 = (1 + line._A2m1) * (B22 - line._B21)
+    J12 = (line._A1m1 - line._A2m1) * sig12 + (AB1 - AB2)
+    if outmask & Geodesic.REDUCEDLENGTH:
+      m12 = line._b * ((      dn2 * (line._csig1 * ssig2) -
+                        line._dn1 * (line._ssig1 * csig2))
+                       - line._csig1 * csig2 * J12)
+    if outmask & Geodesic.GEODESICSCALE:
+      t = (line._k2 * (ssig2 - line._ssig1) *
+           (ssig2 + line._ssig1) / (line._dn1 + dn2))
+      M12 = csig12 + (t * ssig2 - csig2 * J12) * line._ssig1 / line._dn1
+      M21 = csig12 - (t * line._ssig1 - line._csig1 * J12) * ssig2 / dn2
+
+  if outmask & Geodesic.AREA:
+    B42 = Geodesic._SinCosSeries(False, ssig2, csig2, line._C4a)
+    # alp12 = alp2 - alp1, used in atan2 so no need to normalize
+    salp12a = salp2 * line.calp1 - calp2 * line.salp1
+    calp12a = calp2 * line.calp1 + salp2 * line.salp1
+    # tan(alp) = tan(alp0) * sec(sig), see GeodesicLine._GenPosition
+    salp12b = line._calp0 * line._salp0 * np.where(
+      csig12 <= 0,
+      line._csig1 * (1 - csig12) + ssig12 * line._ssig1,
+      ssig12 * (line._csig1 * ssig12 / (1 + csig12) + line._ssig1))
+    calp12b = (Math.sq(line._salp0) +
+               Math.sq(line._calp0) * line._csig1 * csig2)
+    simple = (line._calp0 == 0) | (line._salp0 == 0)
+    salp12 = np.where(simple, salp12a, salp12b)
+    calp12 = np.where(simple, calp12a, calp12b)
+    S12 = (line._c2 * np.arctan2(salp12, calp12) +
+           line._A4 * (B42 - line._B41))
+
+  a12 = s12_a12 + 0 * sig12 if arcmode else np.degrees(sig12)
+  return a12, lat2, lon2, azi2, s12, m12, M12, M21, S12
+
+def _Result(outmask, values):
+  """Private: assemble the dict returned by the batch methods."""
+  from .geodesic import Geodesic
+  a12, lat2, lon2, azi2, s12, m12, M12, M21, S12 = values
+  outmask &= Geodesic.OUT_MASK
+  result = {'a12': a12}
+  if outmask & Geodesic.DISTANCE: result['s12'] = s12
+  if outmask & Geodesic.LATITUDE: result['lat2'] = lat2
+  if outmask & Geodesic.LONGITUDE: result['lon2'] = lon2
+  if outmask & Geodesic.AZIMUTH: result['azi2'] = azi2
+  if outmask & Geodesic.REDUCEDLENGTH: result['m12'] = m12
+  if outmask & Geodesic.GEODESICSCALE:
+    result['M12'] = M12; result['M21'] = M21
+  if outmask & Geodesic.AREA: result['S12'] = S12
+  return result
+
+def DirectFan(geod, lat1, lon1, azi1, s12, outmask):
+  """Private: implementation of Geodesic.DirectFan"""
+  from .geodesic import Geodesic
+  outmask |= Geodesic.DISTANCE_IN
+  # The line is set up on the azimuths before they are broadcast so that a
+  # grid of azimuths and distances only sets up one geodesic per azimuth.
+  azi1 = _asfloat(azi1); s12 = _asfloat(s12)
+  line = _LineArray(geod, lat1, lon1, azi1, outmask)
+  result = _Result(outmask, GenPosition(line, False, s12, outmask))
+  azi1, s12 = np.broadcast_arrays(azi1, s12)
+  result['lat1'] = float(Math.LatFix(lat1))
+  result['lon1'] = (lon1 if outmask & Geodesic.LONG_UNROLL else
+                    Math.AngNormalize(lon1))
+  result['azi1'] = AngNormalize(azi1)
+  result['s12'] = s12
+  return result
+
+def DirectArray(geod, lat1, lon1, azi1, s12, outmask):
+  """Private: implementation of Geodesic.DirectArray"""
+  from .geodesic import Geodesic
+  outmask |= Geodesic.DISTANCE_IN
+  lat1, lon1, azi1, s12 = np.broadcast_arrays(
+    _asfloat(lat1), _asfloat(lon1), _asfloat(azi1), _asfloat(s12))
+  shape = lat1.shape
+  lat1, lon1, azi1, s12 = (lat1.ravel(), lon1.ravel(),
+                           azi1.ravel(), s12.ravel())
+  line = _LineArray(geod, lat1, lon1, azi1, outmask)
+  result = _Result(outmask, GenPosition(line, False, s12, outmask))
+  result['lat1'] = LatFix(lat1)
+  result['lon1'] = (lon1 if outmask & Geodesic.LONG_UNROLL else
+                    AngNormalize(lon1))
+  result['azi1'] = AngNormalize(azi1)
+  result['s12'] = s12
+  return dict((key, np.reshape(val, shape)) for key, val in result.items())
+
+def Positions(line, s12, outmask):
+  """Private: implementation of GeodesicLine.Positions"""
+  from .geodesic import Geodesic
+  s12 = _asfloat(s12)
+  result = _Result(outmask, GenPosition(line, False, s12, outmask))
+  result['lat1'] = line.lat1
+  result['lon1'] = (line.lon1 if outmask & Geodesic.LONG_UNROLL else
+                    Math.AngNormalize(line.lon1))
+  result['azi1'] = line.azi1
+  result['s12'] = s12
+  return result
+
+# return s12b, m12b, m0, M12, M21
+def _Lengths(geod, eps, sig12,
+             ssig1, csig1, dn1, ssig2, csig2, dn2, cbet1, cbet2, outmask):
+  """Private: array version of Geodesic._Lengths"""
+  from .geodesic import Geodesic
+  outmask &= Geodesic.OUT_MASK
+  nan = np.full(np.broadcast(sig12, ssig1, ssig2).shape, Math.nan)
+  s12b = m12b = m0 = M12 = M21 = nan
+  C1a = list(range(Geodesic.nC1_ + 1))
+  C2a = list(range(Geodesic.nC2_ + 1))
+  if outmask & (Geodesic.DISTANCE | Geodesic.REDUCEDLENGTH |
+                Geodesic.GEODESICSCALE):
+    A1 = Geodesic._A1m1f(eps)
+    Geodesic._C1f(eps, C1a)
+    if outmask & (Geodesic.REDUCEDLENGTH | Geodesic.GEODESICSCALE):
+      A2 = Geodesic._A2m1f(eps)
+      Geodesic._C2f(eps, C2a)
+      m0x = A1 - A2
+      A2 = 1 + A2
+    A1 = 1 + A1
+  if outmask & Geodesic.DISTANCE:
+    B1 = (Geodesic._SinCosSeries(True, ssig2, csig2, C1a) -
+          Geodesic._SinCosSeries(True, ssig1, csig1, C1a))
+    # Missing a factor of _b
+    s12b = A1 * (sig12 + B1)
+    if outmask & (Geodesic.REDUCEDLENGTH | Geodesic.GEODESICSCALE):
+      B2 = (Geodesic._SinCosSeries(True, ssig2, csig2, C2a) -
+            Geodesic._SinCosSeries(True, ssig1, csig1, C2a))
+      J12 = m0x * sig12 + (A1 * B1 - A2 * B2)
+  elif outmask & (Geodesic.REDUCEDLENGTH | Geodesic.GEODESICSCALE):
+    # Assume here that nC1_ >= nC2_
+    for l in range(1, Geodesic.nC2_):
+      C2a[l] = A1 * C1a[l] - A2 * C2a[l]
+    J12 = m0x * sig12 + (Geodesic._SinCosSeries(True, ssig2, csig2, C2a) -
+                         Geodesic._SinCosSeries(True, ssig1, csig1, C2a))
+  if outmask & Geodesic.REDUCEDLENGTH:
+    m0 = m0x + 0 * sig12
+    # Missing a factor of _b.
+    m12b = (dn2 * (csig1 * ssig2) - dn1 * (ssig1 * csig2) -
+            csig1 * csig2 * J12)
+  if outmask & Geodesic.GEODESICSCALE:
+    csig12 = csig1 * csig2 + ssig1 * ssig2
+    t = geod._ep2 * (cbet1 - cbet2) * (cbet1 + cbet2) / (dn1 + dn2)
+    M12 = csig12 + (t * ssig2 - csig2 * J12) * ssig1 / dn1
+    M21 = csig12 - (t * ssig1 - csig1 * J12) * ssig2 / dn2
+  return s12b, m12b, m0, M12, M21
+
+def _Astroid(x, y):
+  """Private: array version of Geodesic._Astroid"""
+  p = Math.sq(x)
+  q = Math.sq(y)
+  r = (p + q - 1) / 6
+  S = p * q / 4
+  r2 = Math.sq(r)
+  r3 = r * r2
+  disc = S * (S + 2 * r3)
+  # disc >= 0: pick the sign on the sqrt to maximize abs(T3)
+  T3 = S + r3
+  T3 = T3 + np.where(T3 < 0, -1, 1) * np.sqrt(np.maximum(disc, 0))
+  T = cbrt(T3)
+  u1 = r + T + np.where(T != 0, r2 / T, 0)
+  # disc < 0: T is complex, but the way u is defined the result is real.
+  ang = np.arctan2(np.sqrt(np.maximum(-disc, 0)), -(S + r3))
+  u2 = r + 2 * r * np.cos(ang / 3)
+  u = np.where(disc >= 0, u1, u2)
+  v = np.sqrt(Math.sq(u) + q)
+  uv = np.where(u < 0, q / (v - u), u + v)
+  w = (uv - q) / (2 * v)
+  k = uv / (np.sqrt(uv + Math.sq(w)) + w)
+  # y = 0 with |x| <= 1 is handled directly
+  return np.where((q == 0) & (r <= 0), 0.0, k)
+
+# return sig12, salp1, calp1, salp2, calp2, dnm
+def _InverseStart(geod, sbet1, cbet1, dn1, sbet2, cbet2, dn2,
+                  lam12, slam12, clam12):
+  """Private: array version of Geodesic._InverseStart"""
+  from .geodesic import Geodesic
+  sig12 = np.full(sbet1.shape, -1.0)
+  salp2 = np.full(sbet1.shape, Math.nan); calp2 = salp2.copy()
+  sbet12 = sbet2 * cbet1 - cbet2 * sbet1
+  cbet12 = cbet2 * cbet1 + sbet2 * sbet1
+  sbet12a = sbet2 * cbet1 + cbet2 * sbet1
+
+  shortline = (cbet12 >= 0) & (sbet12 < 0.5) & (cbet2 * lam12 < 0.5)
+  sbetm2 = Math.sq(sbet1 + sbet2)
+  sbetm2 = sbetm2 / (sbetm2 + Math.sq(cbet1 + cbet2))
+  dnm = np.where(shortline, np.sqrt(1 + geod._ep2 * sbetm2), Math.nan)
+  omg12 = lam12 / (geod._f1 * dnm)
+  somg12 = np.where(shortline, np.sin(omg12), slam12)
+  comg12 = np.where(shortline, np.cos(omg12), clam12)
+
+  salp1 = cbet2 * somg12
+  calp1 = np.where(
+    comg12 >= 0,
+    sbet12 + cbet2 * sbet1 * Math.sq(somg12) / (1 + comg12),
+    sbet12a - cbet2 * sbet1 * Math.sq(somg12) / (1 - comg12))
+
+  ssig12 = np.hypot(salp1, calp1)
+  csig12 = sbet1 * sbet2 + cbet1 * cbet2 * comg12
+
+  # really short lines
+  vshort = shortline & (ssig12 < geod._etol2)
+  salp2s = cbet1 * somg12
+  calp2s = sbet12 - cbet1 * sbet2 * np.where(
+    comg12 >= 0, Math.sq(somg12) / (1 + comg12), 1 - comg12)
+  salp2s, calp2s = norm(salp2s, calp2s)
+  salp2 = np.where(vshort, salp2s, salp2)
+  calp2 = np.where(vshort, calp2s, calp2)
+  sig12 = np.where(vshort, np.arctan2(ssig12, csig12), sig12)
+
+  # Otherwise, unless the zeroth order spherical approximation is OK, scale
+  # lam12 and bet2 to x, y coordinate system where antipodal point is at
+  # origin and singular point is at y = 0, x = -1.
+  astroid = ~vshort & ~((abs(geod._n) >= 0.1) | (csig12 >= 0) |
+                        (ssig12 >= 6 * abs(geod._n) * math.pi *
+                         Math.sq(cbet1)))
+  if astroid.any():
+    i = np.nonzero(astroid)[0]
+    sb1 = sbet1[i]; cb1 = cbet1[i]; sb2 = sbet2[i]; cb2 = cbet2[i]
+    sb12a = sbet12a[i]
+    lam12x = np.arctan2(-slam12[i], -clam12[i])
+    if geod.f >= 0:            # In fact f == 0 does not get here
+      # x = dlong, y = dlat
+      k2 = Math.sq(sb1) * geod._ep2
+      eps = k2 / (2 * (1 + np.sqrt(1 + k2)) + k2)
+      lamscale = geod.f * cb1 * geod._A3f(eps) * math.pi
+      betscale = lamscale * cb1
+      x = lam12x / lamscale
+      y = sb12a / betscale
+    else:                     # _f < 0
+      # x = dlat, y = dlong
+      cbet12a = cb2 * cb1 - sb2 * sb1
+      bet12a = np.arctan2(sb12a, cbet12a)
+      dummy, m12b, m0, dummy, dummy = _Lengths(
+        geod, geod._n, math.pi + bet12a, sb1, -cb1, dn1[i], sb2, cb2, dn2[i],
+        cb1, cb2, Geodesic.REDUCEDLENGTH)
+      x = -1 + m12b / (cb1 * cb2 * m0 * math.pi)
+      betscale = np.where(x < -0.01, sb12a / x,
+                          -geod.f * Math.sq(cb1) * math.pi)
+      lamscale = betscale / cb1
+      y = lam12x / lamscale
+
+    # strip near cut
+    strip = (y > -Geodesic.tol1_) & (x > -1 - Geodesic.xthresh_)
+    if geod.f >= 0:
+      salp1s = np.minimum(1.0, -x)
+      calp1s = - np.sqrt(1 - Math.sq(salp1s))
+    else:
+      calp1s = np.maximum(np.where(x > -Geodesic.tol1_, 0.0, -1.0), x)
+      salp1s = np.sqrt(1 - Math.sq(calp1s))
+    # Estimate omg12 by solving the astroid problem and use the spherical
+    # formula to compute alp1.
+    k = _Astroid(x, y)
+    omg12a = lamscale * ( -x * k/(1 + k) if geod.f >= 0
+                          else -y * (1 + k)/k )
+    somg12 = np.sin(omg12a); comg12 = -np.cos(omg12a)
+    salp1a = cb2 * somg12
+    calp1a = sb12a - cb2 * sb1 * Math.sq(somg12) / (1 - comg12)
+    salp1[i] = np.where(strip, salp1s, salp1a)
+    calp1[i] = np.where(strip, calp1s, calp1a)
+
+  # Sanity check on starting guess.  Backwards check allows NaN through.
+  good = ~(salp1 <= 0)
+  salp1n, calp1n = norm(salp1, calp1)
+  salp1 = np.where(good, salp1n, 1.0)
+  calp1 = np.where(good, calp1n, 0.0)
+  return sig12, salp1, calp1, salp2, calp2, dnm
+
+# return lam12, salp2, calp2, sig12, ssig1, csig1, ssig2, csig2, eps,
+# domg12, dlam12
+def _Lambda12(geod, sbet1, cbet1, dn1, sbet2, cbet2, dn2, salp1, calp1,
+              slam120, clam120, diffp):
+  """Private: array version of Geodesic._Lambda12"""
+  from .geodesic import Geodesic
+  # Break degeneracy of equatorial line.
+  calp1 = np.where((sbet1 == 0) & (calp1 == 0), -Geodesic.tiny_, calp1)
+
+  # sin(alp1) * cos(bet1) = sin(alp0)
+  salp0 = salp1 * cbet1
+  calp0 = np.hypot(calp1, salp1 * sbet1) # calp0 > 0
+
+  # tan(bet1) = tan(sig1) * cos(alp1)
+  # tan(omg1) = sin(alp0) * tan(sig1) = tan(omg1)=tan(alp1)*sin(bet1)
+  somg1 = salp0 * sbet1
+  csig1 = comg1 = calp1 * cbet1
+  ssig1, csig1 = norm(sbet1, csig1)
+
+  # Enforce symmetries in the case abs(bet2) = -bet1.
+  salp2 = np.where(cbet2 != cbet1, salp0 / cbet2, salp1)
+  calp2 = np.where(
+    (cbet2 != cbet1) | (np.abs(sbet2) != -sbet1),
+    np.sqrt(Math.sq(calp1 * cbet1) +
+            np.where(cbet1 < -sbet1,
+                     (cbet2 - cbet1) * (cbet1 + cbet2),
+                     (sbet1 - sbet2) * (sbet1 + sbet2))) / cbet2,
+    np.abs(calp1))
+  # tan(bet2) = tan(sig2) * cos(alp2)
+  # tan(omg2) = sin(alp0) * tan(sig2).
+  somg2 = salp0 * sbet2
+  csig2 = comg2 = calp2 * cbet2
+  ssig2, csig2 = norm(sbet2, csig2)
+
+  # sig12 = sig2 - sig1, limit to [0, pi]
+  sig12 = np.arctan2(np.maximum(0.0, csig1 * ssig2 - ssig1 * csig2),
+                                     csig1 * csig2 + ssig1 * ssig2)
+
+  # omg12 = omg2 - omg1, limit to [0, pi]
+  somg12 = np.maximum(0.0, comg1 * somg2 - somg1 * comg2)
+  comg12 =                 comg1 * comg2 + somg1 * somg2
+  # eta = omg12 - lam120
+  eta = np.arctan2(somg12 * clam120 - comg12 * slam120,
+                   comg12 * clam120 + somg12 * slam120)
+
+  k2 = Math.sq(calp0) * geod._ep2
+  eps = k2 / (2 * (1 + np.sqrt(1 + k2)) + k2)
+  C3a = list(range(Geodesic.nC3_))
+  geod._C3f(eps, C3a)
+  B312 = (Geodesic._SinCosSeries(True, ssig2, csig2, C3a) -
+          Geodesic._SinCosSeries(True, ssig1, csig1, C3a))
+  domg12 = -geod.f * geod._A3f(eps) * salp0 * (sig12 + B312)
+  lam12 = eta + domg12
+
+  if diffp:
+    dummy, dlam12, dummy, dummy, dummy = _Lengths(
+      geod, eps, sig12, ssig1, csig1, dn1, ssig2, csig2, dn2, cbet1, cbet2,
+      Geodesic.REDUCEDLENGTH)
+    dlam12 = np.where(calp2 == 0, - 2 * geod._f1 * dn1 / sbet1,
+                      dlam12 * geod._f1 / (calp2 * cbet2))
+  else:
+    dlam12 = np.full(lam12.shape, Math.nan)
+
+  return (lam12, salp2, calp2, sig12, ssig1, csig1, ssig2, csig2, eps,
+          domg12, dlam12)
+
+# return a12, s12, salp1, calp1, salp2, calp2, m12, M12, M21, S12
+def GenInverse(geod, lat1, lon1, lat2, lon2, outmask):
+  """Private: array version of Geodesic._GenInverse
+
+  The arguments are one dimensional arrays of equal length.  Each pair
+  of points goes through the same cases as the scalar solution; the
+  Newton iteration is carried out on the unconverged pairs only.
+
+  """
+  from .geodesic import Geodesic
+  nan = np.full(lat1.shape, Math.nan)
+  a12 = nan.copy(); s12 = nan.copy(); m12 = nan.copy()
+  M12 = nan.copy(); M21 = nan.copy(); S12 = nan.copy()
+  s12x = nan.copy(); m12x = nan.copy(); sig12 = nan.copy()
+  salp1 = nan.copy(); calp1 = nan.copy()
+  salp2 = nan.copy(); calp2 = nan.copy()
+
+  outmask &= Geodesic.OUT_MASK
+  # Compute longitude difference (AngDiff does this carefully).
+  lon12, lon12s = AngDiff(lon1, lon2)
+  # Make longitude difference positive.
+  lonsign = np.where(lon12 >= 0, 1.0, -1.0)
+  # If very close to being on the same half-meridian, then make it so.
+  lon12 = lonsign * AngRound(lon12)
+  lon12s = AngRound((180 - lon12) - lonsign * lon12s)
+  lam12 = np.radians(lon12)
+  slam12a, clam12a = sincosd(lon12s)
+  slam12b, clam12b = sincosd(lon12)
+  slam12 = np.where(lon12 > 90, slam12a, slam12b)
+  clam12 = np.where(lon12 > 90, -clam12a, clam12b)
+
+  # If really close to the equator, treat as on equator.
+  lat1 = AngRound(LatFix(lat1))
+  lat2 = AngRound(LatFix(lat2))
+  # Swap points so that point with higher (abs) latitude is point 1
+  # If one latitude is a nan, then it becomes lat1.
+  swapp = np.where(np.abs(lat1) < np.abs(lat2), -1.0, 1.0)
+  lonsign = lonsign * swapp
+  lat1, lat2 = np.where(swapp < 0, lat2, lat1), np.where(swapp < 0, lat1, lat2)
+  # Make lat1 <= 0
+  latsign = np.where(lat1 < 0, 1.0, -1.0)
+  lat1 = lat1 * latsign
+  lat2 = lat2 * latsign
+
+  sbet1, cbet1 = sincosd(lat1); sbet1 = sbet1 * geod._f1
+  # Ensure cbet1 = +epsilon at poles
+  sbet1, cbet1 = norm(sbet1, cbet1)
+  cbet1 = np.maximum(Geodesic.tiny_, cbet1)
+
+  sbet2, cbet2 = sincosd(lat2); sbet2 = sbet2 * geod._f1
+  # Ensure cbet2 = +epsilon at poles
+  sbet2, cbet2 = norm(sbet2, cbet2)
+  cbet2 = np.maximum(Geodesic.tiny_, cbet2)
+
+  # Force bet2 = +/- bet1 exactly when the quantities used to compare them
+  # vanish, see Geodesic._GenInverse.
+  sens = cbet1 < -sbet1
+  sbet2 = np.where(sens & (cbet2 == cbet1),
+                   np.where(sbet2 < 0, sbet1, -sbet1), sbet2)
+  cbet2 = np.where(~sens & (np.abs(sbet2) == -sbet1), cbet1, cbet2)
+
+  dn1 = np.sqrt(1 + geod._ep2 * Math.sq(sbet1))
+  dn2 = np.sqrt(1 + geod._ep2 * Math.sq(sbet2))
+
+  meridian = (lat1 == -90) | (slam12 == 0)
+
+  if meridian.any():
+    # Endpoints are on a single full meridian, so the geodesic might lie on
+    # a meridian.
+    i = np.nonzero(meridian)[0]
+    calp1[i] = clam12[i]; salp1[i] = slam12[i] # Head to the target longitude
+    calp2[i] = 1.0; salp2[i] = 0.0             # At the target we're heading north
+    # tan(bet) = tan(sig) * cos(alp)
+    ssig1 = sbet1[i]; csig1 = calp1[i] * cbet1[i]
+    ssig2 = sbet2[i]; csig2 = calp2[i] * cbet2[i]
+    # sig12 = sig2 - sig1
+    sig12m = np.arctan2(np.maximum(0.0, csig1 * ssig2 - ssig1 * csig2),
+                                        csig1 * csig2 + ssig1 * ssig2)
+    s12m, m12m, dummy, M12m, M21m = _Lengths(
+      geod, geod._n, sig12m, ssig1, csig1, dn1[i], ssig2, csig2, dn2[i],
+      cbet1[i], cbet2[i],
+      outmask | Geodesic.DISTANCE | Geodesic.REDUCEDLENGTH)
+    # m12 < 0, i.e., prolate and too close to anti-podal, is not a meridian
+    ok = (sig12m < 1) | (m12m >= 0)
+    # Prevent negative s12 or m12 for short lines
+    zero = ((sig12m < 3 * Geodesic.tiny_) |
+            ((sig12m < Geodesic.tol0_) & ((s12m < 0) | (m12m < 0))))
+    sig12m = np.where(zero, 0.0, sig12m)
+    m12m = np.where(zero, 0.0, m12m)
+    s12m = np.where(zero, 0.0, s12m)
+    j = i[ok]
+    sig12[j] = sig12m[ok]
+    m12x[j] = m12m[ok] * geod._b
+    s12x[j] = s12m[ok] * geod._b
+    a12[j] = np.degrees(sig12m[ok])
+    M12[j] = M12m[ok]; M21[j] = M21m[ok]
+    meridian[i[~ok]] = False
+
+  # somg12 > 1 marks that it needs to be calculated
+  somg12 = np.full(lat1.shape, 2.0); comg12 = np.zeros(lat1.shape)
+  omg12 = np.zeros(lat1.shape)
+  equatorial = (~meridian & (sbet1 == 0) &
+                # Mimic the way Lambda12 works with calp1 = 0
+                ((geod.f <= 0) | (lon12s >= geod.f * 180)))
+  if equatorial.any():
+    # Geodesic runs along equator
+    i = np.nonzero(equatorial)[0]
+    calp1[i] = calp2[i] = 0.0; salp1[i] = salp2[i] = 1.0
+    s12x[i] = geod.a * lam12[i]
+    sig12[i] = omg12[i] = lam12[i] / geod._f1
+    m12x[i] = geod._b * np.sin(sig12[i])
+    M12[i] = M21[i] = np.cos(sig12[i])
+    a12[i] = lon12[i] / geod._f1
+
+  general = ~meridian & ~equatorial
+  if general.any():
+    # Now point1 and point2 belong within a hemisphere bounded by a
+    # meridian and geodesic is neither meridional or equatorial.
+    i = np.nonzero(general)[0]
+    sig12g, salp1g, calp1g, salp2g, calp2g, dnm = _InverseStart(
+      geod, sbet1[i], cbet1[i], dn1[i], sbet2[i], cbet2[i], dn2[i],
+      lam12[i], slam12[i], clam12[i])
+    salp1[i] = salp1g; calp1[i] = calp1g
+    salp2[i] = salp2g; calp2[i] = calp2g
+
+    short = sig12g >= 0
+    if short.any():
+      # Short lines (InverseStart sets salp2, calp2, dnm)
+      j = i[short]; sig12s = sig12g[short]; dnms = dnm[short]
+      sig12[j] = sig12s
+      s12x[j] = sig12s * geod._b * dnms
+      m12x[j] = Math.sq(dnms) * geod._b * np.sin(sig12s / dnms)
+      M12[j] = M21[j] = np.cos(sig12s / dnms)
+      a12[j] = np.degrees(sig12s)
+      omg12[j] = lam12[j] / (geod._f1 * dnms)
+
+    if not short.all():
+      j = i[~short]
+      _NewtonInverse(geod, outmask, j, sbet1, cbet1, dn1, sbet2, cbet2, dn2,
+                     lam12, slam12, clam12, salp1, calp1, salp2, calp2,
+                     sig12, s12x, m12x, a12, M12, M21, somg12, comg12)
+
+  if outmask & Geodesic.DISTANCE:
+    s12 = 0.0 + s12x            # Convert -0 to 0
+
+  if outmask & Geodesic.REDUCEDLENGTH:
+    m12 = 0.0 + m12x            # Convert -0 to 0
+
+  if outmask & Geodesic.AREA:
+    # From Lambda12: sin(alp1) * cos(bet1) = sin(alp0)
+    salp0 = salp1 * cbet1
+    calp0 = np.hypot(calp1, salp1 * sbet1) # calp0 > 0
+    # From Lambda12: tan(bet) = tan(sig) * cos(alp)
+    ssig1, csig1 = norm(sbet1, calp1 * cbet1)
+    ssig2, csig2 = norm(sbet2, calp2 * cbet2)
+    k2 = Math.sq(calp0) * geod._ep2
+    eps = k2 / (2 * (1 + np.sqrt(1 + k2)) + k2)
+    # Multiplier = a^2 * e^2 * cos(alpha0) * sin(alpha0).
+    A4 = Math.sq(geod.a) * calp0 * salp0 * geod._e2
+    C4a = list(range(Geodesic.nC4_))
+    geod._C4f(eps, C4a)
+    B41 = Geodesic._SinCosSeries(False, ssig1, csig1, C4a)
+    B42 = Geodesic._SinCosSeries(False, ssig2, csig2, C4a)
+    # Avoid problems with indeterminate sig1, sig2 on equator
+    S12 = np.where((calp0 != 0) & (salp0 != 0), A4 * (B42 - B41), 0.0)
+
+    calc = ~meridian & (somg12 > 1)
+    somg12 = np.where(calc, np.sin(omg12), somg12)
+    comg12 = np.where(calc, np.cos(omg12), comg12)
+
+    # Use tan(Gamma/2) = tan(omg12/2)
+    # * (tan(bet1/2)+tan(bet2/2))/(1+tan(bet1/2)*tan(bet2/2))
+    # with tan(x/2) = sin(x)/(1+cos(x))
+    domg12 = 1 + comg12; dbet1 = 1 + cbet1; dbet2 = 1 + cbet2
+    alp12a = 2 * np.arctan2( somg12 * ( sbet1 * dbet2 + sbet2 * dbet1 ),
+                             domg12 * ( sbet1 * sbet2 + dbet1 * dbet2 ) )
+    # alp12 = alp2 - alp1, used in atan2 so no need to normalize
+    salp12 = salp2 * calp1 - calp2 * salp1
+    calp12 = calp2 * calp1 + salp2 * salp1
+    # Attach the sign to zero so that alp1 = +/-180 and alp2 = 0 give
+    # alp12 = -180.
+    fix = (salp12 == 0) & (calp12 < 0)
+    salp12 = np.where(fix, Geodesic.tiny_ * calp1, salp12)
+    calp12 = np.where(fix, -1.0, calp12)
+    alp12b = np.arctan2(salp12, calp12)
+    alp12 = np.where(~meridian &
+                     # omg12 < 3/4 * pi
+                     (comg12 > -0.7071) &   # Long difference not too big
+                     (sbet2 - sbet1 < 1.75), # Lat difference not too big
+                     alp12a, alp12b)
+    S12 = S12 + geod._c2 * alp12
+    S12 = S12 * swapp * lonsign * latsign
+    # Convert -0 to 0
+    S12 = S12 + 0.0
+
+  # Convert calp, salp to azimuth accounting for lonsign, swapp, latsign.
+  swap = swapp < 0
+  salp1, salp2 = np.where(swap, salp2, salp1), np.where(swap, salp1, salp2)
+  calp1, calp2 = np.where(swap, calp2, calp1), np.where(swap, calp1, calp2)
+  if outmask & Geodesic.GEODESICSCALE:
+    M12, M21 = np.where(swap, M21, M12), np.where(swap, M12, M21)
+
+  salp1 = salp1 * swapp * lonsign; calp1 = calp1 * swapp * latsign
+  salp2 = salp2 * swapp * lonsign; calp2 = calp2 * swapp * latsign
+
+  return a12, s12, salp1, calp1, salp2, calp2, m12, M12, M21, S12
+
+def _NewtonInverse(geod, outmask, j, sbet1, cbet1, dn1, sbet2, cbet2, dn2,
+                   lam12, slam12, clam12, salp1, calp1, salp2, calp2,
+                   sig12, s12x, m12x, a12, M12, M21, somg12, comg12):
+  """Private: the Newton iteration of Geodesic._GenInverse on arrays
+
+  *j* indexes the pairs that need the iteration; the results are stored
+  into the output arrays at these indices.  Each pair keeps its own
+  bracket and trip flags and drops out of the iteration as soon as it
+  has converged.
+
+  """
+  from .geodesic import Geodesic
+  n = len(j)
+  sb1 = sbet1[j]; cb1 = cbet1[j]; d1 = dn1[j]
+  sb2 = sbet2[j]; cb2 = cbet2[j]; d2 = dn2[j]
+  sl12 = slam12[j]; cl12 = clam12[j]
+  sa1 = salp1[j].copy(); ca1 = calp1[j].copy()
+  # Results of the last evaluation of Lambda12 for each pair
+  sa2 = np.full(n, Math.nan); ca2 = sa2.copy(); sg12 = sa2.copy()
+  ss1 = sa2.copy(); cs1 = sa2.copy(); ss2 = sa2.copy(); cs2 = sa2.copy()
+  ep = sa2.copy(); dom12 = sa2.copy()
+  tripn = np.zeros(n, dtype = bool); tripb = np.zeros(n, dtype = bool)
+  # Bracketing range
+  salp1a = np.full(n, Geodesic.tiny_); calp1a = np.ones(n)
+  salp1b = np.full(n, Geodesic.tiny_); calp1b = -np.ones(n)
+  # Indices into the j arrays of the pairs still iterating
+  act = np.arange(n)
+  numit = 0
+  while numit < Geodesic.maxit2_ and len(act):
+    (v, sa2[act], ca2[act], sg12[act], ss1[act], cs1[act], ss2[act], cs2[act],
+     ep[act], dom12[act], dv) = _Lambda12(
+       geod, sb1[act], cb1[act], d1[act], sb2[act], cb2[act], d2[act],
+       sa1[act], ca1[act], sl12[act], cl12[act], numit < Geodesic.maxit1_)
+    # Reversed test to allow escape with NaNs
+    done = tripb[act] | ~(np.abs(v) >=
+                          np.where(tripn[act], 8, 1) * Geodesic.tol0_)
+    keep = ~done
+    act = act[keep]; v = v[keep]; dv = dv[keep]
+    if not len(act):
+      break
+    s = sa1[act]; c = ca1[act]
+    # Update bracketing values
+    upb = (v > 0) & ((numit > Geodesic.maxit1_) |
+                     (c/s > calp1b[act]/salp1b[act]))
+    upa = ~upb & (v < 0) & ((numit > Geodesic.maxit1_) |
+                            (c/s < calp1a[act]/salp1a[act]))
+    salp1b[act] = np.where(upb, s, salp1b[act])
+    calp1b[act] = np.where(upb, c, calp1b[act])
+    salp1a[act] = np.where(upa, s, salp1a[act])
+    calp1a[act] = np.where(upa, c, calp1a[act])
+
+    numit += 1
+    newton = np.zeros(len(act), dtype = bool)
+    if numit < Geodesic.maxit1_:
+      dalp1 = -v/dv
+      sdalp1 = np.sin(dalp1); cdalp1 = np.cos(dalp1)
+      nsalp1 = s * cdalp1 + c * sdalp1
+      newton = (dv > 0) & (nsalp1 > 0) & (np.abs(dalp1) < math.pi)
+      ns, nc = norm(nsalp1, c * cdalp1 - s * sdalp1)
+    # Either dv was not positive or updated value was outside legal range.
+    # Use the midpoint of the bracket as the next estimate.
+    bs, bc = norm((salp1a[act] + salp1b[act])/2,
+                  (calp1a[act] + calp1b[act])/2)
+    if numit < Geodesic.maxit1_:
+      sa1[act] = np.where(newton, ns, bs)
+      ca1[act] = np.where(newton, nc, bc)
+    else:
+      sa1[act] = bs; ca1[act] = bc
+    # In some regimes we don't get quadratic convergence because slope ->
+    # 0.  So use convergence conditions based on epsilon instead of
+    # sqrt(epsilon).
+    tripn[act] = newton & (np.abs(v) <= 16 * Geodesic.tol0_)
+    tripb[act] = ~newton & (
+      (np.abs(salp1a[act] - bs) + (calp1a[act] - bc) < Geodesic.tolb_) |
+      (np.abs(bs - salp1b[act]) + (bc - calp1b[act]) < Geodesic.tolb_))
+
+  lengthmask = (outmask |
+                (Geodesic.DISTANCE
+                 if (outmask & (Geodesic.REDUCEDLENGTH |
+                                Geodesic.GEODESICSCALE))
+                 else Geodesic.EMPTY))
+  s12b, m12b, dummy, M12n, M21n = _Lengths(
+    geod, ep, sg12, ss1, cs1, d1, ss2, cs2, d2, cb1, cb2, lengthmask)
+
+  salp1[j] = sa1; calp1[j] = ca1; salp2[j] = sa2; calp2[j] = ca2
+  sig12[j] = sg12
+  m12x[j] = m12b * geod._b
+  s12x[j] = s12b * geod._b
+  M12[j] = M12n; M21[j] = M21n
+  a12[j] = np.degrees(sg12)
+  if outmask & Geodesic.AREA:
+    # omg12 = lam12 - domg12
+    sdomg12 = np.sin(dom12); cdomg12 = np.cos(dom12)
+    somg12[j] = sl12 * cdomg12 - cl12 * sdomg12
+    comg12[j] = cl12 * cdomg12 + sl12 * sdomg12
+
+def InverseArray(geod, lat1, lon1, lat2, lon2, outmask):
+  """Private: implementation of Geodesic.InverseArray"""
+  from .geodesic import Geodesic
+  lat1, lon1, lat2, lon2 = np.broadcast_arrays(
+    _asfloat(lat1), _asfloat(lon1), _asfloat(lat2), _asfloat(lon2))
+  shape = lat1.shape
+  lat1, lon1, lat2, lon2 = (lat1.ravel(), lon1.ravel(),
+                            lat2.ravel(), lon2.ravel())
+  with np.errstate(divide = 'ignore', invalid = 'ignore'):
+    a12, s12, salp1, calp1, salp2, calp2, m12, M12, M21, S12 = GenInverse(
+      geod, lat1, lon1, lat2, lon2, outmask)
+    outmask &= Geodesic.OUT_MASK
+    if outmask & Geodesic.LONG_UNROLL:
+      lon12, e = AngDiff(lon1, lon2)
+      lon2 = (lon1 + lon12) + e
+    else:
+      lon2 = AngNormalize(lon2)
+    result = {'lat1': LatFix(lat1),
+              'lon1': lon1 if outmask & Geodesic.LONG_UNROLL else
+              AngNormalize(lon1),
+              'lat2': LatFix(lat2),
+              'lon2': lon2}
+    result['a12'] = a12
+    if outmask & Geodesic.DISTANCE: result['s12'] = s12
+    if outmask & Geodesic.AZIMUTH:
+      result['azi1'] = atan2d(salp1, calp1)
+      result['azi2'] = atan2d(salp2, calp2)
+    if outmask & Geodesic.REDUCEDLENGTH: result['m12'] = m12
+    if outmask & Geodesic.GEODESICSCALE:
+      result['M12'] = M12; result['M21'] = M21
+    if outmask & Geodesic.AREA: result['S12'] = S12
+  return dict((key, np.reshape(val, shape)) for key, val in result.items())
+
+def AddPoints(poly, lats, lons):
+  """Private: implementation of PolygonArea.AddPoints"""
+  lats = _asfloat(lats).ravel(); lons = _asfloat(lons).ravel()
+  if lats.size == 0:
+    return
+  if poly.num == 0:
+    poly.AddPoint(lats[0], lons[0])
+    lats = lats[1:]; lons = lons[1:]
+    if lats.size == 0:
+      return
+  lat1 = np.concatenate(([poly.lat1], lats[:-1]))
+  lon1 = np.concatenate(([poly.lon1], lons[:-1]))
+  with np.errstate(divide = 'ignore', invalid = 'ignore'):
+    _, s12, _, _, _, _, _, _, _, S12 = GenInverse(
+      poly.earth, lat1, lon1, lats, lons, poly._mask)
+  for s in s12.tolist():
+    poly._perimetersum.Add(s)
+  if not poly.polyline:
+    for S in S12.tolist():
+      poly._areasum.Add(S)
+    # Count the crossings of the prime meridian as PolygonArea._transit
+    lon1 = AngNormalize(lon1); lon2 = AngNormalize(lons)
+    lon12, _ = AngDiff(lon1, lon2)
+    cross = (np.count_nonzero((lon1 <= 0) & (lon2 > 0) & (lon12 > 0)) -
+             np.count_nonzero((lon2 <= 0) & (lon1 > 0) & (lon12 < 0)))
+    poly._crossings += int(cross)
+  poly.lat1 = float(lats[-1])
+  poly.lon1 = float(lons[-1])
+  poly.num += lats.size
@@ -7,6 +7,8 @@ line are given by
     given in terms of distance
   * :meth:`~geographiclib.geodesicline.GeodesicLine.ArcPosition` position
     given in terms of spherical arc length
+  * :meth:`~geographiclib.geodesicline.GeodesicLine.Positions` positions
+    given in terms of an array of distances
 
 A reference point 3 can be defined with
 
@@ -57,8 +59,8 @@ The public attributes for this class are
 ######################################################################
 
 import math
-from geographiclib.geomath import Math
-from geographiclib.geodesiccapability import GeodesicCapability
+from .geomath import Math
+from .geodesiccapability import GeodesicCapability
 
 class GeodesicLine(object):
   """Points on a geodesic path"""
@@ -83,7 +85,7 @@ class GeodesicLine(object):
 
     """
 
-    from geographiclib.geodesic import Geodesic
+    from .geodesic import Geodesic
     self.a = geod.a
     """The equatorial radius in meters (readonly)"""
     self.f = geod.f
@@ -188,7 +190,7 @@ class GeodesicLine(object):
   # return a12, lat2, lon2, azi2, s12, m12, M12, M21, S12
   def _GenPosition(self, arcmode, s12_a12, outmask):
     """Private: General solution of position along geodesic"""
-    from geographiclib.geodesic import Geodesic
+    from .geodesic import Geodesic
     a12 = lat2 = lon2 = azi2 = s12 = m12 = M12 = M21 = S12 = Math.nan
     outmask &= self.caps & Geodesic.OUT_MASK
     if not (arcmode or
@@ -354,7 +356,7 @@ class GeodesicLine(object):
 
     """
 
-    from geographiclib.geodesic import Geodesic
+    from .geodesic import Geodesic
     result = {'lat1': self.lat1,
               'lon1': self.lon1 if outmask & Geodesic.LONG_UNROLL else
               Math.AngNormalize(self.lon1),
@@ -386,7 +388,7 @@ class GeodesicLine(object):
 
     """
 
-    from geographiclib.geodesic import Geodesic
+    from .geodesic import Geodesic
     result = {'lat1': self.lat1,
               'lon1': self.lon1 if outmask & Geodesic.LONG_UNROLL else
               Math.AngNormalize(self.lon1),
@@ -404,6 +406,26 @@ class GeodesicLine(object):
     if outmask & Geodesic.AREA: result['S12'] = S12
     return result
 
+  def Positions(self, s12, outmask = GeodesicCapability.STANDARD):
+    """Find the positions on the line for an array of distances
+
+    :param s12: array of distances from the first point in meters
+    :param outmask: the :ref:`output mask <outmask>`
+    :return: a :ref:`dict` whose *lat2*, *lon2*, *azi2*, *s12*, *a12*
+      entries are NumPy arrays
+
+    This is equivalent to calling
+    :meth:`~geographiclib.geodesicline.GeodesicLine.Position` for each
+    element of *s12*, but the series are summed over all the distances
+    at once.  The :class:`~geographiclib.geodesicline.GeodesicLine`
+    object must have been constructed with the DISTANCE_IN capability.
+    This method requires NumPy.
+
+    """
+
+    from .geodesicarray import Positions
+    return Positions(self, s12, outmask)
+
   def SetDistance(self, s13):
     """Specify the position of point 3 in terms of distance
 
@@ -421,7 +443,7 @@ class GeodesicLine(object):
 
     """
 
-    from geographiclib.geodesic import Geodesic
+    from .geodesic import Geodesic
     self.a13 = a13
     _, _, _, _, self.s13, _, _, _, _ = self._GenPosition(True, self.a13,
                                                          Geodesic.DISTANCE)
@@ -6,6 +6,8 @@ The constructor initializes a empty polygon.  The available methods are
     polygon
   * :meth:`~geographiclib.polygonarea.PolygonArea.AddPoint` add a vertex
     to the polygon
+  * :meth:`~geographiclib.polygonarea.PolygonArea.AddPoints` add a
+    sequence of vertices to the polygon
   * :meth:`~geographiclib.polygonarea.PolygonArea.AddEdge` add an edge
     to the polygon
   * :meth:`~geographiclib.polygonarea.PolygonArea.Compute` compute the
@@ -45,8 +47,8 @@ The public attributes for this class are
 ######################################################################
 
 import math
-from geographiclib.geomath import Math
-from geographiclib.accumulator import Accumulator
+from .geomath import Math
+from .accumulator import Accumulator
 
 class PolygonArea(object):
   """Area of a geodesic polygon"""
@@ -130,7 +132,7 @@ class PolygonArea(object):
     Initially the polygon has no vertices.
     """
 
-    from geographiclib.geodesic import Geodesic
+    from .geodesic import Geodesic
     self.earth = earth
     """The geodesic object (readonly)"""
     self.polyline = polyline
@@ -182,6 +184,23 @@ class PolygonArea(object):
       self.lon1 = lon
     self.num += 1
 
+  def AddPoints(self, lats, lons):
+    """Add a sequence of vertices to the polygon
+
+    :param lats: the latitudes of the points in degrees
+    :param lons: the longitudes of the points in degrees
+
+    This is equivalent to calling
+    :meth:`~geographiclib.polygonarea.PolygonArea.AddPoint` for each
+    point in turn.  The edges are solved together with the array version
+    of the inverse problem and their lengths and areas are then added to
+    the accumulators in order.  This method requires NumPy.
+
+    """
+
+    from .geodesicarray import AddPoints
+    AddPoints(self, lats, lons)
+
   def AddEdge(self, azi, s):
     """Add the next edge to the polygon
 
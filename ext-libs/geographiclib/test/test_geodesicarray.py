@@ -0,0 +1,223 @@
+import unittest
+
+from geographiclib.geodesic import Geodesic
+from geographiclib.test import test_geodesic
+
+try:
+  import numpy
+except ImportError:
+  numpy = None
+
+@unittest.skipIf(numpy is None, "NumPy is not available")
+class DirectFanTest(unittest.TestCase):
+
+  def test_testcases(self):
+    for l in test_geodesic.GeodesicTest.testcases:
+      (lat1, lon1, azi1, lat2, lon2, azi2,
+       s12, a12, m12, M12, M21, S12) = l
+      dir = Geodesic.WGS84.DirectFan(lat1, lon1, [azi1], [s12],
+                                     Geodesic.ALL | Geodesic.LONG_UNROLL)
+      self.assertAlmostEqual(lat2, dir["lat2"][0], delta = 1e-13)
+      self.assertAlmostEqual(lon2, dir["lon2"][0], delta = 1e-13)
+      self.assertAlmostEqual(azi2, dir["azi2"][0], delta = 1e-13)
+      self.assertAlmostEqual(a12, dir["a12"][0], delta = 1e-13)
+      self.assertAlmostEqual(m12, dir["m12"][0], delta = 1e-8)
+      self.assertAlmostEqual(M12, dir["M12"][0], delta = 1e-15)
+      self.assertAlmostEqual(M21, dir["M21"][0], delta = 1e-15)
+      self.assertAlmostEqual(S12, dir["S12"][0], delta = 0.1)
+
+  def test_fan(self):
+    # A full circle of azimuths about points including the poles and the
+    # equator must agree with the scalar solution
+    azi = numpy.arange(-180, 540, 7.5)
+    for geod in (Geodesic.WGS84, Geodesic(6.4e6, 1/50.0),
+                 Geodesic(6.4e6, -1/30.0)):
+      for lat in (-90, -63.5, 0, 0.001, 45, 90):
+        dir = geod.DirectFan(lat, 100.0, azi, 3.5e6)
+        self.assertEqual(dir["lat2"].shape, azi.shape)
+        for i, a in enumerate(azi):
+          s = geod.Direct(lat, 100.0, a, 3.5e6)
+          self.assertAlmostEqual(s["lat2"], dir["lat2"][i], delta = 1e-12)
+          if abs(lat) != 90:
+            self.assertAlmostEqual(s["lon2"], dir["lon2"][i], delta = 1e-12)
+            self.assertAlmostEqual(s["azi2"], dir["azi2"][i], delta = 1e-12)
+
+  def test_distances(self):
+    # Varying distances broadcast against a scalar azimuth
+    s12 = numpy.linspace(0, 2e7, 41)
+    dir = Geodesic.WGS84.DirectFan(-30, 170, 80, s12,
+                                   Geodesic.STANDARD | Geodesic.LONG_UNROLL)
+    for i, s in enumerate(s12):
+      d = Geodesic.WGS84.Direct(-30, 170, 80, s,
+                                Geodesic.STANDARD | Geodesic.LONG_UNROLL)
+      self.assertAlmostEqual(d["lat2"], dir["lat2"][i], delta = 1e-12)
+      self.assertAlmostEqual(d["lon2"], dir["lon2"][i], delta = 1e-12)
+      self.assertAlmostEqual(d["a12"], dir["a12"][i], delta = 1e-12)
+
+  def test_grid(self):
+    # A row of azimuths broadcast against a column of distances gives the
+    # points along each of the geodesics
+    azi = numpy.arange(0, 360, 15.0)
+    s12 = numpy.linspace(0, 1.5e7, 9)
+    dir = Geodesic.WGS84.DirectFan(-40, 170, azi[numpy.newaxis, :],
+                                   s12[:, numpy.newaxis])
+    self.assertEqual(dir["lat2"].shape, (9, 24))
+    self.assertEqual(dir["azi1"].shape, (9, 24))
+    for i, s in enumerate(s12):
+      for j, a in enumerate(azi):
+        d = Geodesic.WGS84.Direct(-40, 170, a, s)
+        self.assertAlmostEqual(d["lat2"], dir["lat2"][i, j], delta = 1e-12)
+        self.assertAlmostEqual(d["lon2"], dir["lon2"][i, j], delta = 1e-12)
+        self.assertAlmostEqual(d["azi2"], dir["azi2"][i, j], delta = 1e-12)
+
+@unittest.skipIf(numpy is None, "NumPy is not available")
+class DirectArrayTest(unittest.TestCase):
+
+  def test_testcases(self):
+    cases = numpy.array(test_geodesic.GeodesicTest.testcases)
+    lat1, lon1, azi1, lat2, lon2, azi2, s12, a12 = cases.T[:8]
+    dir = Geodesic.WGS84.DirectArray(lat1, lon1, azi1, s12,
+                                     Geodesic.STANDARD | Geodesic.LONG_UNROLL)
+    for i in range(len(cases)):
+      self.assertAlmostEqual(lat2[i], dir["lat2"][i], delta = 1e-13)
+      self.assertAlmostEqual(lon2[i], dir["lon2"][i], delta = 1e-13)
+      self.assertAlmostEqual(azi2[i], dir["azi2"][i], delta = 1e-13)
+      self.assertAlmostEqual(a12[i], dir["a12"][i], delta = 1e-13)
+
+  def test_broadcast(self):
+    # Points spread over the ellipsoid with the distances broadcast against
+    # them and longitudes normalized when LONG_UNROLL is not set
+    lat1 = numpy.array([[-90.0], [-45.5], [0.0], [30.0], [89.9]])
+    lon1 = numpy.array([[-179.5], [10.0], [170.0], [-60.0], [0.0]])
+    s12 = numpy.linspace(0, 1.5e7, 7)
+    dir = Geodesic.WGS84.DirectArray(lat1, lon1, 75.0, s12)
+    self.assertEqual(dir["lat2"].shape, (5, 7))
+    for i in range(5):
+      for j, s in enumerate(s12):
+        d = Geodesic.WGS84.Direct(lat1[i, 0], lon1[i, 0], 75.0, s)
+        self.assertAlmostEqual(d["lat2"], dir["lat2"][i, j], delta = 1e-12)
+        self.assertAlmostEqual(d["lon2"], dir["lon2"][i, j], delta = 1e-12)
+        self.assertAlmostEqual(d["azi2"], dir["azi2"][i, j], delta = 1e-12)
+
+@unittest.skipIf(numpy is None, "NumPy is not available")
+class InverseArrayTest(unittest.TestCase):
+
+  def test_testcases(self):
+    cases = numpy.array(test_geodesic.GeodesicTest.testcases).T
+    inv = Geodesic.WGS84.InverseArray(cases[0], cases[1], cases[3], cases[4],
+                                      Geodesic.ALL | Geodesic.LONG_UNROLL)
+    for i, l in enumerate(test_geodesic.GeodesicTest.testcases):
+      (lat1, lon1, azi1, lat2, lon2, azi2,
+       s12, a12, m12, M12, M21, S12) = l
+      self.assertAlmostEqual(lon2, inv["lon2"][i], delta = 1e-13)
+      self.assertAlmostEqual(azi1, inv["azi1"][i], delta = 1e-13)
+      self.assertAlmostEqual(azi2, inv["azi2"][i], delta = 1e-13)
+      self.assertAlmostEqual(s12, inv["s12"][i], delta = 1e-8)
+      self.assertAlmostEqual(a12, inv["a12"][i], delta = 1e-13)
+      self.assertAlmostEqual(m12, inv["m12"][i], delta = 1e-8)
+      self.assertAlmostEqual(M12, inv["M12"][i], delta = 1e-15)
+      self.assertAlmostEqual(M21, inv["M21"][i], delta = 1e-15)
+      self.assertAlmostEqual(S12, inv["S12"][i], delta = 0.1)
+
+  def test_special(self):
+    # Meridional, equatorial, nearly antipodal, coincident and polar
+    # points must take the same branches as the scalar solution
+    pts = [(0, 0, 0, 179.5), (0, 0, 0, 180), (-30, 10, 30, 190),
+           (-30.3, 10, 30, 189.9), (40, 20, 40, 20), (90, 0, -90, 0),
+           (90, 10, 45, 100), (-45, 0, 60, 0), (10, 0, 10, 1e-7),
+           (5, 0, -5.1, 179.9), (0, 0, 0.5, 179.8)]
+    for geod in (Geodesic.WGS84, Geodesic(6.4e6, 1/50.0),
+                 Geodesic(6.4e6, -1/30.0)):
+      lat1, lon1, lat2, lon2 = numpy.array(pts, dtype = float).T
+      inv = geod.InverseArray(lat1, lon1, lat2, lon2, Geodesic.ALL)
+      for i, p in enumerate(pts):
+        s = geod.Inverse(*p, outmask = Geodesic.ALL)
+        self.assertAlmostEqual(s["s12"], inv["s12"][i], delta = 1e-8)
+        self.assertAlmostEqual(s["a12"], inv["a12"][i], delta = 1e-12)
+        self.assertAlmostEqual(s["azi1"], inv["azi1"][i], delta = 1e-9)
+        self.assertAlmostEqual(s["azi2"], inv["azi2"][i], delta = 1e-9)
+        self.assertAlmostEqual(s["m12"], inv["m12"][i], delta = 1e-8)
+        self.assertAlmostEqual(s["S12"], inv["S12"][i], delta = 0.1)
+
+  def test_broadcast(self):
+    # A scalar first point against an array of second points
+    lat2 = numpy.linspace(-90, 90, 13).reshape(13, 1)
+    lon2 = numpy.linspace(-180, 180, 9)
+    inv = Geodesic.WGS84.InverseArray(10, 20, lat2, lon2)
+    self.assertEqual(inv["s12"].shape, (13, 9))
+    for i in range(13):
+      for j in range(9):
+        s = Geodesic.WGS84.Inverse(10, 20, lat2[i, 0], lon2[j])
+        self.assertAlmostEqual(s["s12"], inv["s12"][i, j], delta = 1e-8)
+
+@unittest.skipIf(numpy is None, "NumPy is not available")
+class PositionsTest(unittest.TestCase):
+
+  def test_positions(self):
+    for geod in (Geodesic.WGS84, Geodesic(6.4e6, 1/50.0),
+                 Geodesic(6.4e6, -1/30.0)):
+      line = geod.InverseLine(-40, 170, 50, -20, Geodesic.ALL)
+      s12 = numpy.linspace(-line.s13, 2 * line.s13, 61)
+      pos = line.Positions(s12, Geodesic.ALL | Geodesic.LONG_UNROLL)
+      self.assertEqual(pos["lat2"].shape, s12.shape)
+      for i, s in enumerate(s12):
+        p = line.Position(s, Geodesic.ALL | Geodesic.LONG_UNROLL)
+        self.assertAlmostEqual(p["lat2"], pos["lat2"][i], delta = 1e-12)
+        self.assertAlmostEqual(p["lon2"], pos["lon2"][i], delta = 1e-12)
+        self.assertAlmostEqual(p["azi2"], pos["azi2"][i], delta = 1e-12)
+        self.assertAlmostEqual(p["a12"], pos["a12"][i], delta = 1e-12)
+        self.assertAlmostEqual(p["m12"], pos["m12"][i], delta = 1e-8)
+        self.assertAlmostEqual(p["M12"], pos["M12"][i], delta = 1e-15)
+        self.assertAlmostEqual(p["S12"], pos["S12"][i], delta = 0.1)
+
+  def test_meridian(self):
+    # A line through the pole
+    line = Geodesic.WGS84.Line(80, 10, 0)
+    s12 = numpy.arange(0, 3e6, 1e5)
+    pos = line.Positions(s12)
+    for i, s in enumerate(s12):
+      p = line.Position(s)
+      self.assertAlmostEqual(p["lat2"], pos["lat2"][i], delta = 1e-12)
+      self.assertAlmostEqual(p["lon2"], pos["lon2"][i], delta = 1e-12)
+
+@unittest.skipIf(numpy is None, "NumPy is not available")
+class AddPointsTest(unittest.TestCase):
+
+  def test_planimeter(self):
+    # The polygons of PlanimeterTest including the ones encircling a pole
+    # and crossing the antimeridian
+    for points in ([[89, 0], [89, 90], [89, 180], [89, 270]],
+                   [[-89, 0], [-89, 90], [-89, 180], [-89, 270]],
+                   [[0, -1], [-1, 0], [0, 1], [1, 0]],
+                   [[90, 0], [0, 0], [0, 90]],
+                   [[0, 170], [10, -170], [-5, 175], [3, 190]]):
+      for polyline in (False, True):
+        poly = Geodesic.WGS84.Polygon(polyline)
+        poly.AddPoints([p[0] for p in points], [p[1] for p in points])
+        test = Geodesic.WGS84.Polygon(polyline)
+        for p in points:
+          test.AddPoint(p[0], p[1])
+        num, perimeter, area = poly.Compute(False, True)
+        self.assertEqual(num, test.num)
+        self.assertAlmostEqual(perimeter, test.Compute(False, True)[1],
+                               delta = 1e-6)
+        if not polyline:
+          self.assertAlmostEqual(area, test.Compute(False, True)[2],
+                                 delta = 1)
+
+  def test_batches(self):
+    # Points may be added in several batches and mixed with AddPoint
+    lats = numpy.linspace(-60, 60, 50)
+    lons = numpy.linspace(-200, 300, 50) % 360
+    poly = Geodesic.WGS84.Polygon(False)
+    poly.AddPoints(lats[:20], lons[:20])
+    poly.AddPoint(lats[20], lons[20])
+    poly.AddPoints(lats[21:], lons[21:])
+    test = Geodesic.WGS84.Polygon(False)
+    for lat, lon in zip(lats, lons):
+      test.AddPoint(lat, lon)
+    num, perimeter, area = poly.Compute(False, True)
+    self.assertEqual(num, 50)
+    self.assertAlmostEqual(perimeter, test.Compute(False, True)[1],
+                           delta = 1e-6)
+    self.assertAlmostEqual(area, test.Compute(False, True)[2], delta = 1)
@@ -0,0 +1,151 @@
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import os
+
+from qgis.core import (
+    QgsCoordinateTransform, QgsField,
+    QgsProject, QgsWkbTypes)
+
+from qgis.core import (
+    QgsProcessing,
+    QgsProcessingAlgorithm,
+    QgsProcessingParameterEnum,
+    QgsProcessingParameterFeatureSource,
+    QgsProcessingParameterFeatureSink)
+
+from qgis.PyQt.QtGui import QIcon
+from qgis.PyQt.QtCore import QUrl, QVariant
+
+from .settings import epsg4326
+from .utils import tr, conversionFromMeters, areaConversionFromSquareMeters, DISTANCE_LABELS, AREA_LABELS, geodesicPolygonMeasure, BufferedSink
+
+class GeodesicAreaAlgorithm(QgsProcessingAlgorithm):
+    """
+    Algorithm to measure the geodesic area and perimeter of polygons.
+    """
+    PrmInputLayer = 'InputLayer'
+    PrmOutputLayer = 'OutputLayer'
+    PrmAreaUnits = 'AreaUnits'
+    PrmPerimeterUnits = 'PerimeterUnits'
+
+    def initAlgorithm(self, config):
+        self.addParameter(
+            QgsProcessingParameterFeatureSource(
+                self.PrmInputLayer,
+                tr('Input polygon layer'),
+                [QgsProcessing.TypeVectorPolygon])
+        )
+        self.addParameter(
+            QgsProcessingParameterEnum(
+                self.PrmAreaUnits,
+                tr('Area units'),
+                options=AREA_LABELS,
+                defaultValue=0)
+        )
+        self.addParameter(
+            QgsProcessingParameterEnum(
+                self.PrmPerimeterUnits,
+                tr('Perimeter units'),
+                options=DISTANCE_LABELS,
+                defaultValue=0)
+        )
+        self.addParameter(
+            QgsProcessingParameterFeatureSink(
+                self.PrmOutputLayer,
+                tr('Output layer'))
+        )
+
+    def processAlgorithm(self, parameters, context, feedback):
+        source = self.parameterAsSource(parameters, self.PrmInputLayer, context)
+        area_units = self.parameterAsInt(parameters, self.PrmAreaUnits, context)
+        perimeter_units = self.parameterAsInt(parameters, self.PrmPerimeterUnits, context)
+
+        area_factor = areaConversionFromSquareMeters(area_units)
+        perimeter_factor = conversionFromMeters(perimeter_units)
+
+        wkbtype = source.wkbType()
+        if QgsWkbTypes.geometryType(wkbtype) != QgsWkbTypes.PolygonGeometry:
+            feedback.reportError(tr("Please select a valid polygon layer."))
+            return({})
+
+        fields = source.fields()
+        fields.append(QgsField("geod_area", QVariant.Double))
+        fields.append(QgsField("geod_perimeter", QVariant.Double))
+
+        layercrs = source.sourceCrs()
+        (sink, dest_id) = self.parameterAsSink(
+            parameters, self.PrmOutputLayer, context, fields, wkbtype, layercrs)
+        sink = BufferedSink(sink)
+
+        if layercrs != epsg4326:
+            transto4326 = QgsCoordinateTransform(layercrs, epsg4326, QgsProject.instance())
+
+        total = 100.0 / source.featureCount() if source.featureCount() else 0
+        iterator = source.getFeatures()
+        num_bad = 0
+        for cnt, feature in enumerate(iterator):
+            if feedback.isCanceled():
+                break
+            try:
+                # geometry() returns a copy so the output keeps the original geometry
+                geom = feature.geometry()
+                if geom.isNull() or geom.isEmpty():
+                    # A feature without a geometry is kept with NULL measurements
+                    measurements = [None, None]
+                else:
+                    if layercrs != epsg4326:
+                        geom.transform(transto4326)
+                    perimeter, area = geodesicPolygonMeasure(geom)
+                    measurements = [area * area_factor, perimeter * perimeter_factor]
+                feature.setAttributes(feature.attributes() + measurements)
+                sink.addFeature(feature)
+            except Exception:
+                num_bad += 1
+
+            feedback.setProgress(int(cnt * total))
+        sink.flush()
+
+        if num_bad > 0:
+            feedback.pushInfo(tr("{} out of {} features from input layer were invalid and were skipped.".format(num_bad, source.featureCount())))
+
+        return {self.PrmOutputLayer: dest_id}
+
+    def name(self):
+        return 'geodesicarea'
+
+    def icon(self):
+        return QIcon(os.path.dirname(__file__) + '/images/measureLine.svg')
+
+    def displayName(self):
+        return tr('Geodesic area and perimeter')
+
+    def group(self):
+        return tr('Vector geometry')
+
+    def groupId(self):
+        return 'vectorgeometry'
+
+    def helpUrl(self):
+        file = os.path.dirname(__file__) + '/index.html'
+        if not os.path.exists(file):
+            return ''
+        return QUrl.fromLocalFile(file).toString(QUrl.FullyEncoded)
+
+    def shortHelpString(self):
+        file = os.path.dirname(__file__) + '/doc/GeodesicAreaAlgorithm.help'
+        if not os.path.exists(file):
+            return ''
+        with open(file) as helpf:
+            help = helpf.read()
+        return help
+
+    def createInstance(self):
+        return GeodesicAreaAlgorithm()
@@ -10,11 +10,11 @@
 """
 import os
 import math
-from geographiclib.geodesic import Geodesic
+from array import array
 # import traceback
 
 from qgis.core import (
-    QgsCoordinateTransform, QgsPointXY, QgsFeature, QgsGeometry,
+    QgsCoordinateTransform, QgsPointXY, QgsFeature,
     QgsProject, QgsWkbTypes)
 
 from qgis.core import (
@@ -29,7 +29,8 @@ from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtCore import QUrl
 
 from .settings import settings, epsg4326, geod
-from .utils import tr
+from .utils import tr, geodesicLineCoords, transformPoints, BufferedSink
+from .wkbGeometry import polylineGeometry, polygonGeometry, multiPolylineGeometry, multiPolygonGeometry
 
 class GeodesicDensifyAlgorithm(QgsProcessingAlgorithm):
     """
@@ -88,6 +89,7 @@ class GeodesicDensifyAlgorithm(QgsProcessingAlgorithm):
             (sink, dest_id) = self.parameterAsSink(
                 parameters, self.PrmOutputLayer,
                 context, source.fields(), outputType, source.sourceCrs())
+            sink = BufferedSink(sink)
 
             num_bad = processLine(source, sink, feedback, discardVertices, maxseglen)
         else:
@@ -96,8 +98,10 @@ class GeodesicDensifyAlgorithm(QgsProcessingAlgorithm):
             (sink, dest_id) = self.parameterAsSink(
                 parameters, self.PrmOutputLayer,
                 context, source.fields(), outputType, source.sourceCrs())
+            sink = BufferedSink(sink)
 
             num_bad = processPoly(source, sink, feedback, maxseglen)
+        sink.flush()
 
         if num_bad > 0:
             feedback.pushInfo(tr("{} out of {} features from input layer failed to process correctly.".format(num_bad, source.featureCount())))
@@ -136,11 +140,32 @@ class GeodesicDensifyAlgorithm(QgsProcessingAlgorithm):
     def createInstance(self):
         return GeodesicDensifyAlgorithm()
 
+def densifyCoords(points, maxseglen):
+    '''Return the EPSG:4326 points with additional points added along each
+    segment longer than maxseglen as a flat array of x, y coordinates.'''
+    ptStart = points[0]
+    coords = array('d', (ptStart.x(), ptStart.y()))
+    for x in range(1, len(points)):
+        ptEnd = points[x]
+        gline = geod.InverseLine(ptStart.y(), ptStart.x(), ptEnd.y(), ptEnd.x())
+        # Check to see if the distance is greater than the maximum
+        # segment length and if so lets add additional points.
+        if gline.s13 > maxseglen:
+            n = int(math.ceil(gline.s13 / maxseglen))
+            seglen = gline.s13 / n
+            coords.extend(geodesicLineCoords(gline, [seglen * i for i in range(1, n)]))
+        coords.append(ptEnd.x())
+        coords.append(ptEnd.y())
+        ptStart = ptEnd
+    return coords
+
 def processPoly(source, sink, feedback, maxseglen):
     layercrs = source.sourceCrs()
     if layercrs != epsg4326:
         transto4326 = QgsCoordinateTransform(layercrs, epsg4326, QgsProject.instance())
         transfrom4326 = QgsCoordinateTransform(epsg4326, layercrs, QgsProject.instance())
+    else:
+        transfrom4326 = None
 
     total = 100.0 / source.featureCount() if source.featureCount() else 0
     iterator = source.getFeatures()
@@ -163,35 +188,13 @@ def processPoly(source, sink, feedback, maxseglen):
                     if numpoints < 2:
                         continue
                     # If the input is not 4326 we need to convert it to that and then back to the output CRS
-                    ptStart = QgsPointXY(points[0][0], points[0][1])
                     if layercrs != epsg4326:  # Convert to 4326
-                        ptStart = transto4326.transform(ptStart)
-                    pts = [ptStart]
-                    for x in range(1, numpoints):
-                        ptEnd = QgsPointXY(points[x][0], points[x][1])
-                        if layercrs != epsg4326:  # Convert to 4326
-                            ptEnd = transto4326.transform(ptEnd)
-                        gline = geod.InverseLine(ptStart.y(), ptStart.x(), ptEnd.y(), ptEnd.x())
-                        # Check to see if the distance is greater than the maximum
-                        # segment length and if so lets add additional points.
-                        if gline.s13 > maxseglen:
-                            n = int(math.ceil(gline.s13 / maxseglen))
-                            seglen = gline.s13 / n
-                            for i in range(1, n):
-                                s = seglen * i
-                                g = gline.Position(s, Geodesic.LATITUDE | Geodesic.LONGITUDE | Geodesic.LONG_UNROLL)
-                                pts.append(QgsPointXY(g['lon2'], g['lat2']))
-                        pts.append(ptEnd)
-                        ptStart = ptEnd
-
-                    if layercrs != epsg4326:  # Convert each point to the output CRS
-                        for x, pt in enumerate(pts):
-                            pts[x] = transfrom4326.transform(pt)
-                    ptset.append(pts)
+                        points = transformPoints(transto4326, points)
+                    ptset.append(densifyCoords(points, maxseglen))
 
                 if len(ptset) > 0:
                     featureout = QgsFeature()
-                    featureout.setGeometry(QgsGeometry.fromPolygonXY(ptset))
+                    featureout.setGeometry(polygonGeometry(ptset, transfrom4326))
                     featureout.setAttributes(feature.attributes())
                     sink.addFeature(featureout)
             else:
@@ -204,34 +207,14 @@ def processPoly(source, sink, feedback, maxseglen):
                         if numpoints < 2:
                             continue
                         # If the input is not 4326 we need to convert it to that and then back to the output CRS
-                        ptStart = QgsPointXY(points[0][0], points[0][1])
                         if layercrs != epsg4326:  # Convert to 4326
-                            ptStart = transto4326.transform(ptStart)
-                        pts = [ptStart]
-                        for x in range(1, numpoints):
-                            ptEnd = QgsPointXY(points[x][0], points[x][1])
-                            if layercrs != epsg4326:  # Convert to 4326
-                                ptEnd = transto4326.transform(ptEnd)
-                            gline = geod.InverseLine(ptStart.y(), ptStart.x(), ptEnd.y(), ptEnd.x())
-                            if gline.s13 > maxseglen:
-                                n = int(math.ceil(gline.s13 / maxseglen))
-                                seglen = gline.s13 / n
-                                for i in range(1, n):
-                                    s = seglen * i
-                                    g = gline.Position(s, Geodesic.LATITUDE | Geodesic.LONGITUDE | Geodesic.LONG_UNROLL)
-                                    pts.append(QgsPointXY(g['lon2'], g['lat2']))
-                            pts.append(ptEnd)
-                            ptStart = ptEnd
-
-                        if layercrs != epsg4326:  # Convert each point to the output CRS
-                            for x, pt in enumerate(pts):
-                                pts[x] = transfrom4326.transform(pt)
-                        ptset.append(pts)
+                            points = transformPoints(transto4326, points)
+                        ptset.append(densifyCoords(points, maxseglen))
                     multiset.append(ptset)
 
                 if len(multiset) > 0:
                     featureout = QgsFeature()
-                    featureout.setGeometry(QgsGeometry.fromMultiPolygonXY(multiset))
+                    featureout.setGeometry(multiPolygonGeometry(multiset, transfrom4326))
 
                     featureout.setAttributes(feature.attributes())
                     sink.addFeature(featureout)
@@ -248,6 +231,8 @@ def processLine(source, sink, feedback, discardVertices, maxseglen):
     if layercrs != epsg4326:
         transto4326 = QgsCoordinateTransform(layercrs, epsg4326, QgsProject.instance())
         transfrom4326 = QgsCoordinateTransform(epsg4326, layercrs, QgsProject.instance())
+    else:
+        transfrom4326 = None
 
     total = 100.0 / source.featureCount() if source.featureCount() else 0
     iterator = source.getFeatures()
@@ -270,81 +255,25 @@ def processLine(source, sink, feedback, discardVertices, maxseglen):
                 ptStart = QgsPointXY(seg[0][0][0], seg[0][0][1])
                 if layercrs != epsg4326:  # Convert to 4326
                     ptStart = transto4326.transform(ptStart)
-                pts = [ptStart]
                 numpoints = len(seg[numseg - 1])
                 ptEnd = QgsPointXY(seg[numseg - 1][numpoints - 1][0], seg[numseg - 1][numpoints - 1][1])
                 if layercrs != epsg4326:  # Convert to 4326
                     ptEnd = transto4326.transform(ptEnd)
-                gline = geod.InverseLine(ptStart.y(), ptStart.x(), ptEnd.y(), ptEnd.x())
-                if gline.s13 > maxseglen:
-                    n = int(math.ceil(gline.s13 / maxseglen))
-                    seglen = gline.s13 / n
-                    for i in range(1, n):
-                        s = seglen * i
-                        g = gline.Position(s, Geodesic.LATITUDE | Geodesic.LONGITUDE | Geodesic.LONG_UNROLL)
-                        pts.append(QgsPointXY(g['lon2'], g['lat2']))
-                pts.append(ptEnd)
-
-                if layercrs != epsg4326:  # Convert each point back to the output CRS
-                    for x, pt in enumerate(pts):
-                        pts[x] = transfrom4326.transform(pt)
-                fline.setGeometry(QgsGeometry.fromPolylineXY(pts))
+                fline.setGeometry(polylineGeometry(densifyCoords([ptStart, ptEnd], maxseglen), transfrom4326))
             else:
                 if not feature.geometry().isMultipart():
                     line = seg[0]
-                    numpoints = len(line)
-                    ptStart = QgsPointXY(line[0][0], line[0][1])
                     if layercrs != epsg4326:  # Convert to 4326
-                        ptStart = transto4326.transform(ptStart)
-                    pts = [ptStart]
-                    for x in range(1, numpoints):
-                        ptEnd = QgsPointXY(line[x][0], line[x][1])
-                        if layercrs != epsg4326:  # Convert to 4326
-                            ptEnd = transto4326.transform(ptEnd)
-                        gline = geod.InverseLine(ptStart.y(), ptStart.x(), ptEnd.y(), ptEnd.x())
-                        if gline.s13 > maxseglen:
-                            n = int(math.ceil(gline.s13 / maxseglen))
-                            seglen = gline.s13 / n
-                            for i in range(1, n):
-                                s = seglen * i
-                                g = gline.Position(s, Geodesic.LATITUDE | Geodesic.LONGITUDE | Geodesic.LONG_UNROLL)
-                                pts.append(QgsPointXY(g['lon2'], g['lat2']))
-                        pts.append(ptEnd)
-                        ptStart = ptEnd
-
-                    if layercrs != epsg4326:  # Convert each point back to the output CRS
-                        for x, pt in enumerate(pts):
-                            pts[x] = transfrom4326.transform(pt)
-                    fline.setGeometry(QgsGeometry.fromPolylineXY(pts))
+                        line = transformPoints(transto4326, line)
+                    fline.setGeometry(polylineGeometry(densifyCoords(line, maxseglen), transfrom4326))
                 else:  # MultiLineString
                     outseg = []
                     for line in seg:
-                        numpoints = len(line)
-                        ptStart = QgsPointXY(line[0][0], line[0][1])
                         if layercrs != epsg4326:  # Convert to 4326
-                            ptStart = transto4326.transform(ptStart)
-                        pts = [ptStart]
-                        for x in range(1, numpoints):
-                            ptEnd = QgsPointXY(line[x][0], line[x][1])
-                            if layercrs != epsg4326:  # Convert to 4326
-                                ptEnd = transto4326.transform(ptEnd)
-                            gline = geod.InverseLine(ptStart.y(), ptStart.x(), ptEnd.y(), ptEnd.x())
-                            if gline.s13 > maxseglen:
-                                n = int(math.ceil(gline.s13 / maxseglen))
-                                seglen = gline.s13 / n
-                                for i in range(1, n):
-                                    s = seglen * i
-                                    g = gline.Position(s, Geodesic.LATITUDE | Geodesic.LONGITUDE | Geodesic.LONG_UNROLL)
-                                    pts.append(QgsPointXY(g['lon2'], g['lat2']))
-                            pts.append(ptEnd)
-                            ptStart = ptEnd
-
-                        if layercrs != epsg4326:  # Convert each point back to the output CRS
-                            for x, pt in enumerate(pts):
-                                pts[x] = transfrom4326.transform(pt)
-                        outseg.append(pts)
-
-                    fline.setGeometry(QgsGeometry.fromMultiPolylineXY(outseg))
+                            line = transformPoints(transto4326, line)
+                        outseg.append(densifyCoords(line, maxseglen))
+
+                    fline.setGeometry(multiPolylineGeometry(outseg, transfrom4326))
 
             fline.setAttributes(feature.attributes())
             sink.addFeature(fline)
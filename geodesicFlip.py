@@ -9,9 +9,8 @@
  ***************************************************************************/
 """
 import os
-from geographiclib.geodesic import Geodesic
 
-from qgis.core import (QgsProject, QgsMapLayer, QgsCoordinateTransform)
+from qgis.core import (QgsPointXY, QgsProject, QgsMapLayer, QgsCoordinateTransform)
 
 from qgis.core import (
     QgsProcessing,
@@ -23,8 +22,8 @@ from qgis.core import (
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtCore import QUrl
 
-from .settings import epsg4326, geod
-from .utils import tr
+from .settings import epsg4326
+from .utils import tr, geodesicFan, geodesicInverse, transformPoints
 
 class GeodesicFlipAlgorithm(QgsProcessingAlgorithm):
     """
@@ -84,24 +83,20 @@ class GeodesicFlipAlgorithm(QgsProcessingAlgorithm):
             cy = centroid.y()
             cx = centroid.x()
 
-            vertices = geom.vertices()
-            for vcnt, vertex in enumerate(vertices):
-                v = geom_to_4326.transform(vertex.x(), vertex.y())
-                gline = geod.Inverse(cy, cx, v.y(), v.x())
-                vdist = gline['s12']
-                vazi = gline['azi1']
-                if mode == 0:  # flip horizontally
-                    vazi = -1.0 * vazi
-                elif mode == 1:  # Flip vertically
-                    vazi = -1.0 * (vazi + 180)
-                elif mode == 2:  # Rotate 180
-                    vazi += 180
-                elif mode == 3:  # Rotate 90
-                    vazi += 90
-                else:
-                    vazi -= 90  # Rotate -90
-                g = geod.Direct(cy, cx, vazi, vdist, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-                new_vertex = to_sink_crs.transform(g['lon2'], g['lat2'])
+            vertices = transformPoints(geom_to_4326, [QgsPointXY(vertex) for vertex in geom.vertices()])
+            vdists, vazis = geodesicInverse(cy, cx, [v.y() for v in vertices], [v.x() for v in vertices])
+            if mode == 0:  # flip horizontally
+                vazis = [-1.0 * vazi for vazi in vazis]
+            elif mode == 1:  # Flip vertically
+                vazis = [-1.0 * (vazi + 180) for vazi in vazis]
+            elif mode == 2:  # Rotate 180
+                vazis = [vazi + 180 for vazi in vazis]
+            elif mode == 3:  # Rotate 90
+                vazis = [vazi + 90 for vazi in vazis]
+            else:
+                vazis = [vazi - 90 for vazi in vazis]  # Rotate -90
+            new_vertices = transformPoints(to_sink_crs, geodesicFan(cy, cx, vazis, vdists))
+            for vcnt, new_vertex in enumerate(new_vertices):
                 geom.moveVertex(new_vertex.x(), new_vertex.y(), vcnt)
             feature.setGeometry(geom)
             sink.addFeature(feature)
@@ -154,24 +149,20 @@ def flipLayer(iface, layer, mode):
         cy = centroid.y()
         cx = centroid.x()
 
-        vertices = geom.vertices()
-        for vcnt, vertex in enumerate(vertices):
-            v = geom_to_4326.transform(vertex.x(), vertex.y())
-            gline = geod.Inverse(cy, cx, v.y(), v.x())
-            vdist = gline['s12']
-            vazi = gline['azi1']
-            if mode == 0:  # flip horizontally
-                vazi = -1.0 * vazi
-            elif mode == 1:  # Flip vertically
-                vazi = -1.0 * (vazi + 180)
-            elif mode == 2:  # Rotate 180
-                vazi += 180
-            elif mode == 3:  # Rotate 90
-                vazi += 90
-            else:
-                vazi -= 90  # Rotate -90
-            g = geod.Direct(cy, cx, vazi, vdist, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-            new_vertex = to_sink_crs.transform(g['lon2'], g['lat2'])
+        vertices = transformPoints(geom_to_4326, [QgsPointXY(vertex) for vertex in geom.vertices()])
+        vdists, vazis = geodesicInverse(cy, cx, [v.y() for v in vertices], [v.x() for v in vertices])
+        if mode == 0:  # flip horizontally
+            vazis = [-1.0 * vazi for vazi in vazis]
+        elif mode == 1:  # Flip vertically
+            vazis = [-1.0 * (vazi + 180) for vazi in vazis]
+        elif mode == 2:  # Rotate 180
+            vazis = [vazi + 180 for vazi in vazis]
+        elif mode == 3:  # Rotate 90
+            vazis = [vazi + 90 for vazi in vazis]
+        else:
+            vazis = [vazi - 90 for vazi in vazis]  # Rotate -90
+        new_vertices = transformPoints(to_sink_crs, geodesicFan(cy, cx, vazis, vdists))
+        for vcnt, new_vertex in enumerate(new_vertices):
             geom.moveVertex(new_vertex.x(), new_vertex.y(), vcnt)
         layer.changeGeometry(feature.id(), geom)
     layer.updateExtents()
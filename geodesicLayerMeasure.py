@@ -13,7 +13,7 @@ import math
 from geographiclib.geodesic import Geodesic
 
 from qgis.core import (QgsUnitTypes, QgsVectorLayer,
-    QgsPointXY, QgsFeature, QgsFields, QgsField, QgsGeometry, 
+    QgsFeature, QgsFields, QgsField,
     QgsProject, QgsWkbTypes, QgsCoordinateTransform, QgsPalLayerSettings,
     QgsVectorLayerSimpleLabeling)
 
@@ -29,12 +29,21 @@ from qgis.core import (
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtCore import QUrl, QVariant
 
-from .settings import epsg4326, geod, settings
-from .utils import tr, DISTANCE_LABELS
+from .settings import epsg4326, settings
+from .utils import tr, DISTANCE_LABELS, transformPoints, geodesicInverse, BufferedSink
+from .wkbGeometry import polylineGeometry
 from .compass import Compass
 
 unitsAbbr = ['km','m','cm','mi','yd','ft','in','nm']
 
+def segmentInverse(pts):
+    '''Return the geodesic distance and initial azimuth of each segment of
+    the line through the EPSG:4326 points. All the segments are solved in one
+    batch.'''
+    lats = [pt.y() for pt in pts]
+    lons = [pt.x() for pt in pts]
+    return geodesicInverse(lats[:-1], lons[:-1], lats[1:], lons[1:])
+
 class GeodesicLayerMeasureAlgorithm(QgsProcessingAlgorithm):
     """
     Algorithm to create a line of bearing.
@@ -144,6 +153,7 @@ class GeodesicLayerMeasureAlgorithm(QgsProcessingAlgorithm):
 
         (sink, dest_id) = self.parameterAsSink(
             parameters, self.PrmOutputLayer, context, f, QgsWkbTypes.LineString, srcCRS)
+        sink = BufferedSink(sink)
 
         if srcCRS != epsg4326:
             geomTo4326 = QgsCoordinateTransform(srcCRS, epsg4326, QgsProject.instance())
@@ -173,91 +183,57 @@ class GeodesicLayerMeasureAlgorithm(QgsProcessingAlgorithm):
             if len(ptdata) < 1:
                 continue
 
+            # The features of all the parts are added to the sink together
+            features = []
             for seg in ptdata:
-                if len(seg) < 1:
-                    continue
-                if totalLength:
-                    for pts in seg:
-                        numpoints = len(pts)
-                        if numpoints < 2:
-                            continue
+                for pts in seg:
+                    numpoints = len(pts)
+                    if numpoints < 2:
+                        continue
+                    if srcCRS != epsg4326: # Convert to 4326
+                        pts4326 = transformPoints(geomTo4326, pts)
+                    else:
+                        pts4326 = pts
+                    # Every segment of the line is solved once. The total is
+                    # known before the segment features are created.
+                    distances, azimuths = segmentInverse(pts4326)
+                    totalDistance = self.unitDistance(units, sum(distances)) # Distance converted to the selected unit of measure
+                    if totalLength:
                         f = QgsFeature()
-                        f.setGeometry(QgsGeometry.fromPolylineXY(pts))
-                        ptStart = QgsPointXY(pts[0].x(), pts[0].y())
-                        if srcCRS != epsg4326: # Convert to 4326
-                            ptStart = geomTo4326.transform(ptStart)
-                        # Calculate the total distance of this line segment
-                        distance = 0.0
-                        for x in range(1,numpoints):
-                            ptEnd = QgsPointXY(pts[x].x(), pts[x].y())
-                            if srcCRS != epsg4326: # Convert to 4326
-                                ptEnd = geomTo4326.transform(ptEnd)
-                            l = geod.Inverse(ptStart.y(), ptStart.x(), ptEnd.y(), ptEnd.x())
-                            distance += l['s12']
-                            ptStart = ptEnd
-
-                        distance = self.unitDistance(units, distance) # Distance converted to the selected unit of measure
-                        attr = ["{:.2f} {}".format(distance, unitsAbbr[units]), distance, unitsAbbr[units] ]
+                        f.setGeometry(polylineGeometry(pts))
+                        attr = ["{:.2f} {}".format(totalDistance, unitsAbbr[units]), totalDistance, unitsAbbr[units] ]
                         if retain_attributes:
                             f.setAttributes(attr + feature.attributes())
                         else:
                             f.setAttributes(attr)
-                        sink.addFeature(f)
-                else:
-                    for pts in seg:
-                        numpoints = len(pts)
-                        if numpoints < 2:
-                            continue
-                        ptStart = QgsPointXY(pts[0].x(), pts[0].y())
-                        if srcCRS != epsg4326: # Convert to 4326
-                            ptStart = geomTo4326.transform(ptStart)
-                        # Calculate the total distance of this line segment
-                        totalDistance = 0.0
-                        for x in range(1,numpoints):
-                            ptEnd = QgsPointXY(pts[x].x(), pts[x].y())
-                            if srcCRS != epsg4326: # Convert to 4326
-                                ptEnd = geomTo4326.transform(ptEnd)
-                            l = geod.Inverse(ptStart.y(), ptStart.x(), ptEnd.y(), ptEnd.x())
-                            totalDistance += l['s12']
-                            ptStart = ptEnd
-
-                        totalDistance = self.unitDistance(units, totalDistance) # Distance converted to the selected unit of measure
-
-                        ptStart = QgsPointXY(pts[0].x(), pts[0].y())
-                        if srcCRS != epsg4326: # Convert to 4326
-                            pt1 = geomTo4326.transform(ptStart)
+                        features.append(f)
+                        continue
+
+                    for x in range(1,numpoints):
+                        f = QgsFeature()
+                        f.setGeometry(polylineGeometry(pts[x - 1:x + 1]))
+                        distance = self.unitDistance(units, distances[x - 1])
+                        angle = azimuths[x - 1]
+                        if compass_label:
+                            label = "{:.2f} {} {}".format(distance, unitsAbbr[units], self.compass(angle, compass_mode, 0))
+                        else:
+                            label = "{:.2f} {}".format(distance, unitsAbbr[units])
+                        if compass_mode:
+                            attr = [label, distance, unitsAbbr[units], angle, totalDistance, self.compass(angle, compass_mode, 0), self.compass(angle, compass_mode, 1), self.compass(angle, compass_mode, 2)]
                         else:
-                            pt1 = ptStart
-                        for x in range(1,numpoints):
-                            ptEnd = QgsPointXY(pts[x].x(), pts[x].y())
-                            f = QgsFeature()
-                            f.setGeometry(QgsGeometry.fromPolylineXY([ptStart, ptEnd]))
-                            if srcCRS != epsg4326: # Convert to 4326
-                                pt2 = geomTo4326.transform(ptEnd)
-                            else:
-                                pt2 = ptEnd
-                            l = geod.Inverse(pt1.y(), pt1.x(), pt2.y(), pt2.x())
-                            ptStart = ptEnd
-                            pt1 = pt2
-                            distance = self.unitDistance(units, l['s12'])
-                            angle = l['azi1']
-                            if compass_label:
-                                label = "{:.2f} {} {}".format(distance, unitsAbbr[units], self.compass(angle, compass_mode, 0))
-                            else:
-                                label = "{:.2f} {}".format(distance, unitsAbbr[units])
-                            if compass_mode:
-                                attr = [label, distance, unitsAbbr[units], l['azi1'], totalDistance, self.compass(angle, compass_mode, 0), self.compass(angle, compass_mode, 1), self.compass(angle, compass_mode, 2)]
-                            else:
-                                attr = [label, distance, unitsAbbr[units], l['azi1'], totalDistance]
-
-                            if retain_attributes:
-                                f.setAttributes(attr + feature.attributes())
-                            else:
-                                f.setAttributes(attr)
-                            sink.addFeature(f)
+                            attr = [label, distance, unitsAbbr[units], angle, totalDistance]
+
+                        if retain_attributes:
+                            f.setAttributes(attr + feature.attributes())
+                        else:
+                            f.setAttributes(attr)
+                        features.append(f)
+            if features:
+                sink.addFeatures(features)
 
             if cnt % 100 == 0:
                 feedback.setProgress(int(cnt * total))
+        sink.flush()
         if autoStyle and context.willLoadLayerOnCompletion(dest_id):
             context.layerToLoadOnCompletionDetails(dest_id).setPostProcessor(StylePostProcessor.create())
 
@@ -30,7 +30,7 @@ from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtCore import QUrl
 
 from .settings import epsg4326, geod
-from .utils import tr, conversionToMeters, DISTANCE_LABELS
+from .utils import tr, conversionToMeters, DISTANCE_LABELS, BufferedSink
 
 class GeodesicLineDecimateAlgorithm(QgsProcessingAlgorithm):
     """
@@ -94,6 +94,7 @@ class GeodesicLineDecimateAlgorithm(QgsProcessingAlgorithm):
         layercrs = source.sourceCrs()
         (sink, dest_id) = self.parameterAsSink(
             parameters, self.PrmOutputLayer, context, source.fields(), wkbtype, layercrs)
+        sink = BufferedSink(sink)
 
         if layercrs != epsg4326:
             transto4326 = QgsCoordinateTransform(layercrs, epsg4326, QgsProject.instance())
@@ -167,6 +168,7 @@ class GeodesicLineDecimateAlgorithm(QgsProcessingAlgorithm):
                 num_bad += 1
             
             feedback.setProgress(int(cnt * total))
+        sink.flush()
 
         if num_bad > 0:
             feedback.pushInfo(tr("{} out of {} features from input layer were invalid and were skipped.".format(num_bad, source.featureCount())))
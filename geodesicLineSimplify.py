@@ -0,0 +1,283 @@
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import os
+import math
+import heapq
+
+from qgis.core import (
+    QgsCoordinateTransform, QgsFeature, QgsGeometry,
+    QgsProject, QgsWkbTypes)
+
+from qgis.core import (
+    QgsProcessing,
+    QgsProcessingAlgorithm,
+    QgsProcessingParameterEnum,
+    QgsProcessingParameterNumber,
+    QgsProcessingParameterFeatureSource,
+    QgsProcessingParameterFeatureSink)
+
+from qgis.PyQt.QtGui import QIcon
+from qgis.PyQt.QtCore import QUrl
+
+from .settings import epsg4326, geod
+from .utils import tr, conversionToMeters, DISTANCE_LABELS, geodesicInverse, geodesicLinePositions, BufferedSink
+
+SIMPLIFY_METHODS = [tr('Douglas-Peucker'), tr('Visvalingam-Whyatt')]
+
+def crossTrackDistances(lats, lons, start, end, geodesic=geod):
+    '''Return the distance of each vertex between start and end from the
+    geodesic segment joining the vertices at start and end. The foot of each
+    vertex on the geodesic is first estimated from its distance and azimuth
+    from the start vertex on a sphere with the mean radius of the ellipsoid.
+    The geodesic from that foot to the vertex then gives the distance, which
+    only has a second order error in the estimate. A vertex beyond either end
+    of the segment is measured to that end point.'''
+    radius = geodesic.a * (1 - geodesic.f / 3)
+    plats = lats[start + 1:end]
+    plons = lons[start + 1:end]
+    dists, azis = geodesicInverse(lats[start], lons[start], lats[start:end + 1], lons[start:end + 1], geodesic)
+    seg_len = dists[-1]
+    if seg_len == 0:
+        # The segment is a single point
+        return dists[1:-1]
+    seg_azi = math.radians(azis[-1])
+    along = []
+    for d, azi in zip(dists[1:-1], azis[1:-1]):
+        d /= radius
+        delta = math.radians(azi) - seg_azi
+        at = math.atan2(math.sin(d) * math.cos(delta), math.cos(d)) * radius
+        along.append(min(max(at, 0.0), seg_len))
+    gline = geodesic.InverseLine(lats[start], lons[start], lats[end], lons[end])
+    flats, flons, fazis = geodesicLinePositions(gline, along)
+    dists, azis = geodesicInverse(flats, flons, plats, plons, geodesic)
+    distances = []
+    for at, d, azi, fazi in zip(along, dists, azis, fazis):
+        delta = math.radians(azi - fazi)
+        if (at == 0 and math.cos(delta) <= 0) or (at == seg_len and math.cos(delta) >= 0):
+            distances.append(d)
+        else:
+            distances.append(d * abs(math.sin(delta)))
+    return distances
+
+def douglasPeucker(lats, lons, tolerance, geodesic=geod):
+    '''Return the indices of the vertices kept by a Douglas-Peucker
+    simplification with the maximum geodesic deviation tolerance in meters.
+    The segments still to be examined are kept on an explicit stack rather
+    than recursing so that long lines cannot exceed the recursion limit.'''
+    n = len(lats)
+    keep = bytearray(n)
+    keep[0] = 1
+    keep[n - 1] = 1
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        distances = crossTrackDistances(lats, lons, start, end, geodesic)
+        dmax = max(distances)
+        if dmax > tolerance:
+            k = start + 1 + distances.index(dmax)
+            keep[k] = 1
+            stack.append((start, k))
+            stack.append((k, end))
+    return [i for i in range(n) if keep[i]]
+
+def triangleArea(lats, lons, i, j, k, geodesic=geod):
+    '''Return the geodesic area of the triangle formed by three vertices.'''
+    poly = geodesic.Polygon(False)
+    poly.AddPoint(lats[i], lons[i])
+    poly.AddPoint(lats[j], lons[j])
+    poly.AddPoint(lats[k], lons[k])
+    num, perimeter, area = poly.Compute(False, True)
+    return abs(area)
+
+def visvalingamWhyatt(lats, lons, min_area, geodesic=geod):
+    '''Return the indices of the vertices kept by a Visvalingam-Whyatt
+    simplification. The vertex with the smallest effective area, the geodesic
+    area of the triangle it forms with its neighbors, is removed until every
+    remaining vertex has an area of at least min_area square meters. The
+    areas are kept in a heap; entries made stale by the removal of a neighbor
+    are skipped when they are popped.'''
+    n = len(lats)
+    prev = list(range(-1, n - 1))
+    nxt = list(range(1, n + 1))
+    areas = [None] * n
+    heap = []
+    for i in range(1, n - 1):
+        areas[i] = triangleArea(lats, lons, i - 1, i, i + 1, geodesic)
+        heap.append((areas[i], i))
+    heapq.heapify(heap)
+    removed = bytearray(n)
+    last_area = 0
+    while heap:
+        area, i = heapq.heappop(heap)
+        if removed[i] or area != areas[i]:
+            continue
+        if area >= min_area:
+            break
+        # A vertex can not be removed with a smaller area than the last one
+        # so that its neighbors are not removed out of order.
+        last_area = max(last_area, area)
+        removed[i] = 1
+        p = prev[i]
+        q = nxt[i]
+        nxt[p] = q
+        prev[q] = p
+        for j in (p, q):
+            if 0 < j < n - 1:
+                areas[j] = max(last_area, triangleArea(lats, lons, prev[j], j, nxt[j], geodesic))
+                heapq.heappush(heap, (areas[j], j))
+    return [i for i in range(n) if not removed[i]]
+
+class GeodesicLineSimplifyAlgorithm(QgsProcessingAlgorithm):
+    """
+    Algorithm to simplify lines using geodesic calculations.
+    """
+    PrmInputLayer = 'InputLayer'
+    PrmOutputLayer = 'OutputLayer'
+    PrmSimplifyMethod = 'SimplifyMethod'
+    PrmTolerance = 'Tolerance'
+    PrmUnitsOfMeasure = 'UnitsOfMeasure'
+
+    def initAlgorithm(self, config):
+        self.addParameter(
+            QgsProcessingParameterFeatureSource(
+                self.PrmInputLayer,
+                tr('Input line layer'),
+                [QgsProcessing.TypeVectorLine])
+        )
+        self.addParameter(
+            QgsProcessingParameterEnum(
+                self.PrmSimplifyMethod,
+                tr('Simplification method'),
+                options=SIMPLIFY_METHODS,
+                defaultValue=0)
+        )
+        self.addParameter(
+            QgsProcessingParameterNumber(
+                self.PrmTolerance,
+                tr('Tolerance'),
+                QgsProcessingParameterNumber.Double,
+                defaultValue=10,
+                minValue=0)
+        )
+        self.addParameter(
+            QgsProcessingParameterEnum(
+                self.PrmUnitsOfMeasure,
+                tr('Distance units'),
+                options=DISTANCE_LABELS,
+                defaultValue=1)
+        )
+        self.addParameter(
+            QgsProcessingParameterFeatureSink(
+                self.PrmOutputLayer,
+                tr('Output layer'))
+        )
+
+    def processAlgorithm(self, parameters, context, feedback):
+        source = self.parameterAsSource(parameters, self.PrmInputLayer, context)
+        method = self.parameterAsInt(parameters, self.PrmSimplifyMethod, context)
+        tolerance = self.parameterAsDouble(parameters, self.PrmTolerance, context)
+        units = self.parameterAsInt(parameters, self.PrmUnitsOfMeasure, context)
+
+        # Get the tolerance in meters
+        tolerance = tolerance * conversionToMeters(units)
+
+        wkbtype = source.wkbType()
+        if QgsWkbTypes.geometryType(wkbtype) != QgsWkbTypes.LineGeometry:
+            feedback.reportError(tr("Please select a valid line layer."))
+            return({})
+
+        layercrs = source.sourceCrs()
+        (sink, dest_id) = self.parameterAsSink(
+            parameters, self.PrmOutputLayer, context, source.fields(), wkbtype, layercrs)
+        sink = BufferedSink(sink)
+
+        if layercrs != epsg4326:
+            transto4326 = QgsCoordinateTransform(layercrs, epsg4326, QgsProject.instance())
+            transfrom4326 = QgsCoordinateTransform(epsg4326, layercrs, QgsProject.instance())
+
+        total = 100.0 / source.featureCount() if source.featureCount() else 0
+        iterator = source.getFeatures()
+        num_bad = 0
+        for cnt, feature in enumerate(iterator):
+            if feedback.isCanceled():
+                break
+            geom = feature.geometry()
+            # Force the geometry to be in degrees so that we can use the geodesic algorithms
+            if layercrs != epsg4326:
+                geom.transform(transto4326)
+            try:
+                fline = QgsFeature()
+                fgeom = QgsGeometry()
+                is_valid = False
+                for part in geom.constGet().parts():
+                    pts = list(part.vertices())
+                    if len(pts) <= 1:  # line of 1 or less points is invalid
+                        continue
+                    lats = [pt.y() for pt in pts]
+                    lons = [pt.x() for pt in pts]
+                    if method == 0:
+                        kept = douglasPeucker(lats, lons, tolerance)
+                    else:
+                        kept = visvalingamWhyatt(lats, lons, tolerance * tolerance)
+                    fgeom.addPoints([pts[i] for i in kept], QgsWkbTypes.LineGeometry)
+                    is_valid = True
+                if is_valid:  # Only save the feature if it is valid
+                    fline.setAttributes(feature.attributes())
+                    if layercrs != epsg4326:
+                        fgeom.transform(transfrom4326)
+                    fline.setGeometry(fgeom)
+                    sink.addFeature(fline)
+                else:
+                    num_bad += 1
+            except Exception:
+                num_bad += 1
+
+            feedback.setProgress(int(cnt * total))
+        sink.flush()
+
+        if num_bad > 0:
+            feedback.pushInfo(tr("{} out of {} features from input layer were invalid and were skipped.".format(num_bad, source.featureCount())))
+
+        return {self.PrmOutputLayer: dest_id}
+
+    def name(self):
+        return 'geodesiclinesimplify'
+
+    def icon(self):
+        return QIcon(os.path.dirname(__file__) + '/images/geodesicLineDecimate.svg')
+
+    def displayName(self):
+        return tr('Geodesic line simplify')
+
+    def group(self):
+        return tr('Vector geometry')
+
+    def groupId(self):
+        return 'vectorgeometry'
+
+    def helpUrl(self):
+        file = os.path.dirname(__file__) + '/index.html'
+        if not os.path.exists(file):
+            return ''
+        return QUrl.fromLocalFile(file).toString(QUrl.FullyEncoded)
+
+    def shortHelpString(self):
+        file = os.path.dirname(__file__) + '/doc/GeodesicLineSimplifyAlgorithm.help'
+        if not os.path.exists(file):
+            return ''
+        with open(file) as helpf:
+            help = helpf.read()
+        return help
+
+    def createInstance(self):
+        return GeodesicLineSimplifyAlgorithm()
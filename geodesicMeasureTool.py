@@ -11,7 +11,6 @@
 import os
 import re
 import math
-from geographiclib.geodesic import Geodesic
 
 from qgis.PyQt.QtGui import QIcon, QColor
 from qgis.PyQt.QtCore import QSize, Qt, QSettings, QVariant, QByteArray
@@ -27,7 +26,7 @@ from qgis.PyQt import uic
 
 from .settings import epsg4326, settings, geod
 from .compass import Compass
-from .utils import tr, DISTANCE_LABELS, parseDMSString
+from .utils import tr, geodesicLinePoints, transformPoints, DISTANCE_LABELS, parseDMSString
 unitsAbbr = ['km', 'm', 'cm', 'mi', 'yd', 'ft', 'in', 'nm']
 
 class GeodesicMeasureTool(QgsMapTool):
@@ -36,9 +35,18 @@ class GeodesicMeasureTool(QgsMapTool):
         QgsMapTool.__init__(self, iface.mapCanvas())
         self.iface = iface
         self.canvas = iface.mapCanvas()
-        self.measureDialog = GeodesicMeasureDialog(shapetools, iface, parent)
+        self.shapetools = shapetools
+        self.dialogParent = parent
+        self._measureDialog = None
         self.vertex = None
 
+    @property
+    def measureDialog(self):
+        '''The measure dialog is created the first time the tool is used.'''
+        if self._measureDialog is None:
+            self._measureDialog = GeodesicMeasureDialog(self.shapetools, self.iface, self.dialogParent)
+        return self._measureDialog
+
     def activate(self):
         '''When activated set the cursor to a crosshair.'''
         self.canvas.setCursor(Qt.CrossCursor)
@@ -49,11 +57,11 @@ class GeodesicMeasureTool(QgsMapTool):
     def closeDialog(self):
         '''Close the geodesic measure tool dialog box.'''
         self.removeVertexMarker()
-        if self.measureDialog.isVisible():
+        if self._measureDialog is not None and self.measureDialog.isVisible():
             self.measureDialog.closeDialog()
 
     def endInteractiveLine(self):
-        if self.measureDialog.isVisible():
+        if self._measureDialog is not None and self.measureDialog.isVisible():
             self.measureDialog.endRubberband()
 
     def keyPressEvent(self, event):
@@ -119,13 +127,10 @@ class GeodesicMeasureTool(QgsMapTool):
             self.vertex = None
 
 
-FORM_CLASS, _ = uic.loadUiType(os.path.join(
-    os.path.dirname(__file__), 'ui/geodesicMeasureDialog.ui'))
-
-class GeodesicMeasureDialog(QDialog, FORM_CLASS):
+class GeodesicMeasureDialog(QDialog):
     def __init__(self, shapetools, iface, parent):
         super(GeodesicMeasureDialog, self).__init__(parent)
-        self.setupUi(self)
+        uic.loadUi(os.path.join(os.path.dirname(__file__), 'ui/geodesicMeasureDialog.ui'), self)
         self.shapetools = shapetools
         self.iface = iface
         self.canvas = iface.mapCanvas()
@@ -372,11 +377,7 @@ class GeodesicMeasureDialog(QDialog, FORM_CLASS):
             n = 20
         seglen = distance / n
         pts = [pt1c]
-        for i in range(1, n):
-            s = seglen * i
-            g = gline.Position(s, Geodesic.LATITUDE | Geodesic.LONGITUDE | Geodesic.LONG_UNROLL)
-            ptc = transform.transform(g['lon2'], g['lat2'])
-            pts.append(ptc)
+        pts.extend(transformPoints(transform, geodesicLinePoints(gline, [seglen * i for i in range(1, n)])))
         pts.append(pt2c)
         return pts
 
@@ -537,17 +538,14 @@ class GeodesicMeasureDialog(QDialog, FORM_CLASS):
             s =self.comp.abbr04(degree)
         return(s)
 
-FORM_CLASS2, _ = uic.loadUiType(os.path.join(
-    os.path.dirname(__file__), 'ui/measureaddnode.ui'))
-
 
-class AddMeasurePointWidget(QDialog, FORM_CLASS2):
+class AddMeasurePointWidget(QDialog):
     inputProjection = 0
     inputXYOrder = 1
 
     def __init__(self, md, iface, parent):
         super(AddMeasurePointWidget, self).__init__(parent)
-        self.setupUi(self)
+        uic.loadUi(os.path.join(os.path.dirname(__file__), 'ui/measureaddnode.ui'), self)
         self.measureDialog = md
         self.iface = iface
         self.canvas = iface.mapCanvas()
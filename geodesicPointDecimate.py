@@ -15,7 +15,7 @@ from geographiclib.geodesic import Geodesic
 
 from qgis.core import (
     QgsCoordinateTransform, QgsPointXY, QgsFeature, QgsGeometry,
-    QgsProject, QgsWkbTypes, QgsFeatureRequest)
+    QgsProject, QgsWkbTypes, QgsFeatureRequest, QgsExpression, NULL)
 
 from qgis.core import (
     QgsProcessing,
@@ -32,7 +32,135 @@ from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtCore import QUrl
 
 from .settings import settings, epsg4326, geod
-from .utils import tr, conversionToMeters, DISTANCE_LABELS
+from .utils import tr, conversionToMeters, DISTANCE_LABELS, BufferedSink
+
+class PointDecimator():
+    '''Decimate one sequence of points. Each feature passed to add is written
+    to the sink if it is far enough in distance and/or time from the last
+    feature that was kept.'''
+    def __init__(self, sink, transto4326, decimate_by_distance, min_distance,
+                 decimate_by_time, time_idx, min_time_s, is_or_condition):
+        self.sink = sink
+        self.transto4326 = transto4326
+        self.decimate_by_distance = decimate_by_distance
+        self.min_distance = min_distance
+        self.decimate_by_time = decimate_by_time
+        self.time_idx = time_idx
+        self.min_time_s = min_time_s
+        self.is_or_condition = is_or_condition
+        self.pt_last = None
+        self.last_time = None
+        self.last_feature = None
+        self.last_decimated = False
+
+    def add(self, feature):
+        pt = feature.geometry().asPoint()
+        if self.transto4326:  # Convert to 4326
+            pt = self.transto4326.transform(pt)
+        if self.last_feature is None:  # This is the first point so it is saved
+            self.keep(feature, pt, feature[self.time_idx] if self.decimate_by_time else None)
+            return
+        d_keep = True
+        t_keep = True
+        cur_time = None
+        if self.decimate_by_distance:
+            gline = geod.InverseLine(self.pt_last.y(), self.pt_last.x(), pt.y(), pt.x())
+            if gline.s13 < self.min_distance:
+                d_keep = False
+        if self.decimate_by_time:
+            cur_time = feature[self.time_idx]
+            try:
+                diff = abs(cur_time.toMSecsSinceEpoch() - self.last_time.toMSecsSinceEpoch()) / 1000.0
+                if diff < self.min_time_s:
+                    t_keep = False
+            except Exception:
+                pass
+        if (self.is_or_condition and (d_keep or t_keep)) or (d_keep and t_keep):
+            self.keep(feature, pt, cur_time)
+        else:
+            self.last_feature = feature
+            self.last_decimated = True
+
+    def keep(self, feature, pt, cur_time):
+        if self.decimate_by_distance or self.pt_last is None:
+            self.pt_last = pt
+        if self.decimate_by_time:
+            self.last_time = cur_time
+        self.last_feature = feature
+        self.last_decimated = False
+        self.sink.addFeature(feature)
+
+    def addFinal(self):
+        '''Write the last point of the sequence if it was decimated.'''
+        if self.last_decimated:
+            self.sink.addFeature(self.last_feature)
+            self.last_decimated = False
+
+def processTracks(source, order_field, group_field, new_track, preserve_final_pt, feedback):
+    '''Pass each feature of the source to the track of its group in a single
+    read of the layer. new_track is called to create the object that
+    processes a group. It must have an add method called with each feature in
+    order and an addFinal method called once the group is complete when
+    preserve_final_pt is set. Only the state of the tracks is kept in memory,
+    never the features.'''
+    num_pts = source.featureCount()
+    total = 100.0 / num_pts if num_pts else 0
+    request = QgsFeatureRequest()
+    if group_field:
+        grp_indx = source.fields().indexOf(group_field)
+        if order_field:
+            # Read the layer once sorted by group and then by the order
+            # field. Each group is complete before the next one starts.
+            request.addOrderBy(QgsExpression.quotedColumnRef(group_field))
+            request.addOrderBy(QgsExpression.quotedColumnRef(order_field))
+            track = None
+            group = None
+            for cnt, feature in enumerate(source.getFeatures(request)):
+                if feedback.isCanceled():
+                    break
+                if track is None or feature[grp_indx] != group:
+                    if track and preserve_final_pt:
+                        track.addFinal()
+                    group = feature[grp_indx]
+                    track = new_track()
+                track.add(feature)
+                if cnt % 100 == 0:
+                    feedback.setProgress(int(cnt * total))
+            if track and preserve_final_pt:
+                track.addFinal()
+        else:
+            # The features are already in their processing order so
+            # keep the state of each group and read the layer once.
+            tracks = {}
+            for cnt, feature in enumerate(source.getFeatures()):
+                if feedback.isCanceled():
+                    break
+                group = feature[grp_indx]
+                # NULL is an unhashable QVariant so it is keyed as None
+                if group == NULL:
+                    group = None
+                track = tracks.get(group)
+                if track is None:
+                    track = new_track()
+                    tracks[group] = track
+                track.add(feature)
+                if cnt % 100 == 0:
+                    feedback.setProgress(int(cnt * total))
+            if preserve_final_pt:
+                for track in tracks.values():
+                    track.addFinal()
+    else:
+        if order_field:
+            request.addOrderBy(QgsExpression.quotedColumnRef(order_field))
+        track = new_track()
+        for cnt, feature in enumerate(source.getFeatures(request)):
+            if feedback.isCanceled():
+                break
+            track.add(feature)
+            if cnt % 100 == 0:
+                feedback.setProgress(int(cnt * total))
+        if preserve_final_pt:
+            track.addFinal()
 
 class GeodesicPointDecimateAlgorithm(QgsProcessingAlgorithm):
     """
@@ -194,133 +322,22 @@ class GeodesicPointDecimateAlgorithm(QgsProcessingAlgorithm):
 
         (sink, dest_id) = self.parameterAsSink(
             parameters, self.PrmOutputLayer, context, fields, wkbtype, layercrs)
+        sink = BufferedSink(sink)
 
         if layercrs != epsg4326:
             transto4326 = QgsCoordinateTransform(layercrs, epsg4326, QgsProject.instance())
-        
-        num_pts = source.featureCount()
-        total = 100.0 / num_pts if num_pts else 0
+        else:
+            transto4326 = None
+
         min_time_s = self.convert_time_to_s(min_time, time_units)
         min_distance = min_distance * conversionToMeters(units)
-        if group_field:
-            grp_indx = fields.indexOf(group_field)
-            groups = source.uniqueValues(grp_indx)
-            request = QgsFeatureRequest()
-            if order_field:
-                request.addOrderBy(order_field)
-            index = 0
-            for group in groups:
-                filter = '"{}" = \'{}\''.format(group_field, group)
-                request.setFilterExpression( filter )
-                iterator = source.getFeatures(request)
-                last_decimated = False
-                first_feature = True
-                for feature in iterator:
-                    index += 1
-                    if feedback.isCanceled():
-                        break
-                    pt = feature.geometry().asPoint()
-                    if layercrs != epsg4326:  # Convert to 4326
-                        pt4326 = transto4326.transform(pt)
-                    else:
-                        pt4326 = pt
-
-                    if first_feature:
-                        first_feature = False
-                        sink.addFeature(feature)
-                        pt_last = pt4326
-                        if decimate_by_time:
-                            last_time = feature[time_idx]
-                    else:
-                        d_keep = True
-                        t_keep = True
-                        if decimate_by_distance:
-                            gline = geod.InverseLine(pt_last.y(), pt_last.x(), pt4326.y(), pt4326.x())
-                            if gline.s13 < min_distance:
-                                d_keep = False
-                        if decimate_by_time:
-                            cur_time = feature[time_idx]
-                            try:
-                                diff = abs(cur_time.toMSecsSinceEpoch() - last_time.toMSecsSinceEpoch()) / 1000.0
-                                if diff < min_time_s:
-                                    t_keep = False
-                            except Exception:
-                                pass
-
-                        if is_or_condition and (d_keep or t_keep):
-                            if decimate_by_distance:
-                                pt_last = pt4326
-                            if decimate_by_time:
-                                last_time = cur_time
-                            last_decimated = False
-                            sink.addFeature(feature)
-                        elif d_keep and t_keep:
-                            if decimate_by_distance:
-                                pt_last = pt4326
-                            if decimate_by_time:
-                                last_time = cur_time
-                            last_decimated = False
-                            sink.addFeature(feature)
-                        else:
-                            last_decimated = True
-
-                    if index % 100:
-                        feedback.setProgress(int(index * total))
-
-                if preserve_final_pt and last_decimated:
-                    # feature contains the last item from the above for loop which is valid in Python
-                    sink.addFeature(feature)
-        else:
-            if order_field:
-                request = QgsFeatureRequest()
-                request.addOrderBy(order_field)
-                iterator = source.getFeatures(request)
-            else:
-                iterator = source.getFeatures()
-            for cnt, feature in enumerate(iterator):
-                if feedback.isCanceled():
-                    break
-                pt = feature.geometry().asPoint()
-                if layercrs != epsg4326:  # Convert to 4326
-                    pt4326 = transto4326.transform(pt)
-                else:
-                    pt4326 = pt
-                if cnt == 0: # This is the first point so it is saved
-                    sink.addFeature(feature)
-                    pt_last = pt4326
-                    if decimate_by_time:
-                        last_time = feature[time_idx]
-                else:
-                    d_keep = True
-                    t_keep = True
-                    if decimate_by_distance:
-                        gline = geod.InverseLine(pt_last.y(), pt_last.x(), pt4326.y(), pt4326.x())
-                        if gline.s13 < min_distance:
-                            d_keep = False
-                    if decimate_by_time:
-                        cur_time = feature[time_idx]
-                        try:
-                            diff = abs(cur_time.toMSecsSinceEpoch() - last_time.toMSecsSinceEpoch()) / 1000.0
-                            if diff < min_time_s:
-                                t_keep = False
-                        except Exception:
-                            pass
-                    if is_or_condition and (d_keep or t_keep):
-                        if decimate_by_distance:
-                            pt_last = pt4326
-                        if decimate_by_time:
-                            last_time = cur_time
-                        sink.addFeature(feature)
-                    elif d_keep and t_keep:
-                        if decimate_by_distance:
-                            pt_last = pt4326
-                        if decimate_by_time:
-                            last_time = cur_time
-                        sink.addFeature(feature)
-                    elif preserve_final_pt and (cnt == num_pts - 1):
-                        sink.addFeature(feature)
-                if cnt % 100:
-                    feedback.setProgress(int(cnt * total))
+        decimator_args = (
+            sink, transto4326, decimate_by_distance, min_distance,
+            decimate_by_time, time_idx, min_time_s, is_or_condition)
+        processTracks(
+            source, order_field, group_field, lambda: PointDecimator(*decimator_args),
+            preserve_final_pt, feedback)
+        sink.flush()
 
         return {self.PrmOutputLayer: dest_id}
 
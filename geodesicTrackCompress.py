@@ -0,0 +1,405 @@
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import os
+from geographiclib.geodesic import Geodesic
+
+from qgis.core import (
+    QgsCoordinateTransform, QgsProject, QgsWkbTypes)
+
+from qgis.core import (
+    QgsProcessing,
+    QgsProcessingException,
+    QgsProcessingAlgorithm,
+    QgsProcessingParameterEnum,
+    QgsProcessingParameterBoolean,
+    QgsProcessingParameterNumber,
+    QgsProcessingParameterField,
+    QgsProcessingParameterFeatureSource,
+    QgsProcessingParameterFeatureSink)
+
+from qgis.PyQt.QtGui import QIcon
+from qgis.PyQt.QtCore import QUrl
+
+from .settings import epsg4326, geod
+from .utils import tr, conversionToMeters, DISTANCE_LABELS, geodesicInverse, geodesicLinePositions, BufferedSink
+from .geodesicPointDecimate import processTracks
+
+COMPRESSION_METHODS = [tr('Dead reckoning'), tr('Synchronized distance window')]
+SPEED_LABELS = [tr('Meters per second'), tr('Kilometers per hour'), tr('Knots'), tr('Miles per hour')]
+SPEED_TO_MPS = [1.0, 1000.0 / 3600.0, 1852.0 / 3600.0, 1609.344 / 3600.0]
+# The most fixes held between two kept fixes by the synchronized distance window
+MAX_WINDOW = 64
+
+def fixTime(feature, time_idx):
+    '''Return the time of the fix in seconds or None if it is not valid.'''
+    try:
+        return feature[time_idx].toMSecsSinceEpoch() / 1000.0
+    except Exception:
+        return None
+
+class TrackCompressor():
+    '''Base class of the track compressors. Each feature passed to add is
+    either written to the sink when it is kept or held as the last fix of the
+    track so that addFinal can write it when the track is complete.'''
+    def __init__(self, sink, transto4326, time_idx, tolerance):
+        self.sink = sink
+        self.transto4326 = transto4326
+        self.time_idx = time_idx
+        self.tolerance = tolerance
+        self.last_feature = None
+        self.last_decimated = False
+
+    def position(self, feature):
+        pt = feature.geometry().asPoint()
+        if self.transto4326:  # Convert to 4326
+            pt = self.transto4326.transform(pt)
+        return pt.y(), pt.x()
+
+    def write(self, feature):
+        self.last_feature = feature
+        self.last_decimated = False
+        self.sink.addFeature(feature)
+
+    def hold(self, feature):
+        self.last_feature = feature
+        self.last_decimated = True
+
+    def addFinal(self):
+        '''Write the last fix of the track if it was removed.'''
+        if self.last_decimated:
+            self.write(self.last_feature)
+
+class DeadReckoningCompressor(TrackCompressor):
+    '''Compress one track with dead reckoning. The position of each fix is
+    predicted along the geodesic from the last kept fix using its speed and
+    heading. A fix is only kept when it is further than the tolerance from
+    its predicted position. Only the last kept fix is held so a track of any
+    length is compressed in a single pass with constant memory.
+
+    When there are no speed and heading fields, the velocity at a kept fix is
+    the one needed to reach the fix that follows it.'''
+    def __init__(self, sink, transto4326, time_idx, tolerance,
+                 speed_idx=None, course_idx=None, speed_to_mps=1.0):
+        TrackCompressor.__init__(self, sink, transto4326, time_idx, tolerance)
+        self.speed_idx = speed_idx
+        self.course_idx = course_idx
+        self.speed_to_mps = speed_to_mps
+        self.anchor = None
+        self.speed = None
+        self.azimuth = None
+
+    def add(self, feature):
+        lat, lon = self.position(feature)
+        t = fixTime(feature, self.time_idx)
+        if self.anchor is None or t is None:
+            # The first fix and fixes without a valid time are always kept
+            self.keep(feature, lat, lon, t)
+            return
+        lat1, lon1, t1 = self.anchor
+        dt = t - t1
+        if self.speed is None:
+            g = geod.Inverse(lat1, lon1, lat, lon, Geodesic.DISTANCE | Geodesic.AZIMUTH)
+            if dt > 0:
+                # The fix following the kept fix gives its velocity
+                self.speed = g['s12'] / dt
+                self.azimuth = g['azi1']
+                self.hold(feature)
+            elif g['s12'] > self.tolerance:
+                self.keep(feature, lat, lon, t)
+            else:
+                self.hold(feature)
+            return
+        g = geod.Direct(lat1, lon1, self.azimuth, self.speed * dt, Geodesic.LATITUDE | Geodesic.LONGITUDE)
+        deviation = geod.Inverse(g['lat2'], g['lon2'], lat, lon, Geodesic.DISTANCE)['s12']
+        if deviation > self.tolerance:
+            self.keep(feature, lat, lon, t)
+        else:
+            self.hold(feature)
+
+    def keep(self, feature, lat, lon, t):
+        self.anchor = None if t is None else (lat, lon, t)
+        self.speed = None
+        self.azimuth = None
+        if self.speed_idx is not None:
+            try:
+                self.speed = float(feature[self.speed_idx]) * self.speed_to_mps
+                self.azimuth = float(feature[self.course_idx])
+            except Exception:
+                # Fall back to the velocity from the next fix
+                self.speed = None
+                self.azimuth = None
+        self.write(feature)
+
+class WindowCompressor(TrackCompressor):
+    '''Compress one track with an opening window. The fixes after the last
+    kept fix are held in a window for as long as each of them is within the
+    tolerance of its time synchronized position on the geodesic from the
+    last kept fix to the newest fix. When a new fix breaks this, the fix
+    before it is kept and the window starts again from there. Every removed
+    fix is therefore within the tolerance of the compressed track at the same
+    time. The window never holds more than MAX_WINDOW fixes.'''
+    def __init__(self, sink, transto4326, time_idx, tolerance):
+        TrackCompressor.__init__(self, sink, transto4326, time_idx, tolerance)
+        self.anchor = None
+        self.lats = []
+        self.lons = []
+        self.times = []
+
+    def add(self, feature):
+        lat, lon = self.position(feature)
+        t = fixTime(feature, self.time_idx)
+        if t is None:
+            # A fix without a valid time ends the track so far
+            if self.last_decimated:
+                self.write(self.last_feature)
+            self.anchor = None
+            self.lats = []
+            self.lons = []
+            self.times = []
+            self.write(feature)
+            return
+        if self.anchor is not None and self.last_decimated:
+            if len(self.times) >= MAX_WINDOW or not self.fits(lat, lon, t):
+                lat1, lon1, t1 = self.lats[-1], self.lons[-1], self.times[-1]
+                self.write(self.last_feature)
+                self.anchor = (lat1, lon1, t1)
+                self.lats = []
+                self.lons = []
+                self.times = []
+        if self.anchor is None:
+            self.anchor = (lat, lon, t)
+            self.write(feature)
+            return
+        self.lats.append(lat)
+        self.lons.append(lon)
+        self.times.append(t)
+        self.hold(feature)
+
+    def fits(self, lat, lon, t):
+        '''Return whether every fix in the window is within the tolerance of
+        the geodesic from the anchor to the new fix.'''
+        lat1, lon1, t1 = self.anchor
+        gline = geod.InverseLine(lat1, lon1, lat, lon)
+        dt = t - t1
+        if dt > 0:
+            distances = [gline.s13 * (ti - t1) / dt for ti in self.times]
+        else:
+            distances = [0.0] * len(self.times)
+        lats, lons, azis = geodesicLinePositions(gline, distances)
+        deviations, azis = geodesicInverse(lats, lons, self.lats, self.lons)
+        return max(deviations) <= self.tolerance
+
+class GeodesicTrackCompressAlgorithm(QgsProcessingAlgorithm):
+    """
+    Algorithm to compress time stamped point tracks using geodesic dead reckoning.
+    """
+    PrmInputLayer = 'InputLayer'
+    PrmOutputLayer = 'OutputLayer'
+    PrmCompressionMethod = 'CompressionMethod'
+    PrmOrderField = 'OrderField'
+    PrmGroupField = 'GroupField'
+    PrmTimeField = 'TimeField'
+    PrmTolerance = 'Tolerance'
+    PrmUnitsOfMeasure = 'UnitsOfMeasure'
+    PrmSpeedField = 'SpeedField'
+    PrmSpeedUnits = 'SpeedUnits'
+    PrmCourseField = 'CourseField'
+    PrmPreserveFinalPoint = 'PreserveFinalPoint'
+
+    def initAlgorithm(self, config):
+        self.addParameter(
+            QgsProcessingParameterFeatureSource(
+                self.PrmInputLayer,
+                tr('Input point layer'),
+                [QgsProcessing.TypeVectorPoint])
+        )
+        self.addParameter(
+            QgsProcessingParameterField(
+                self.PrmTimeField,
+                tr('Time field (Must be a DateTime field)'),
+                parentLayerParameterName=self.PrmInputLayer,
+                type=QgsProcessingParameterField.DateTime)
+        )
+        self.addParameter(
+            QgsProcessingParameterField(
+                self.PrmOrderField,
+                tr('Point order field (Defaults to the time field)'),
+                parentLayerParameterName=self.PrmInputLayer,
+                type=QgsProcessingParameterField.Any,
+                optional=True
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterField(
+                self.PrmGroupField,
+                tr('Track grouping field'),
+                parentLayerParameterName=self.PrmInputLayer,
+                type=QgsProcessingParameterField.Any,
+                optional=True
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterEnum(
+                self.PrmCompressionMethod,
+                tr('Compression method'),
+                options=COMPRESSION_METHODS,
+                defaultValue=1)
+        )
+        self.addParameter(
+            QgsProcessingParameterNumber(
+                self.PrmTolerance,
+                tr('Maximum deviation'),
+                QgsProcessingParameterNumber.Double,
+                defaultValue=10,
+                minValue=0)
+        )
+        self.addParameter(
+            QgsProcessingParameterEnum(
+                self.PrmUnitsOfMeasure,
+                tr('Distance units'),
+                options=DISTANCE_LABELS,
+                defaultValue=1)
+        )
+        self.addParameter(
+            QgsProcessingParameterField(
+                self.PrmSpeedField,
+                tr('Speed field (Dead reckoning only)'),
+                parentLayerParameterName=self.PrmInputLayer,
+                type=QgsProcessingParameterField.Numeric,
+                optional=True
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterEnum(
+                self.PrmSpeedUnits,
+                tr('Speed units'),
+                options=SPEED_LABELS,
+                defaultValue=2)
+        )
+        self.addParameter(
+            QgsProcessingParameterField(
+                self.PrmCourseField,
+                tr('Heading field in degrees from north (Dead reckoning only)'),
+                parentLayerParameterName=self.PrmInputLayer,
+                type=QgsProcessingParameterField.Numeric,
+                optional=True
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterBoolean(
+                self.PrmPreserveFinalPoint,
+                tr('Preserve final point'),
+                True)
+        )
+        self.addParameter(
+            QgsProcessingParameterFeatureSink(
+                self.PrmOutputLayer,
+                tr('Output layer'))
+        )
+
+    def processAlgorithm(self, parameters, context, feedback):
+        source = self.parameterAsSource(parameters, self.PrmInputLayer, context)
+        method = self.parameterAsInt(parameters, self.PrmCompressionMethod, context)
+        tolerance = self.parameterAsDouble(parameters, self.PrmTolerance, context)
+        units = self.parameterAsInt(parameters, self.PrmUnitsOfMeasure, context)
+        speed_units = self.parameterAsInt(parameters, self.PrmSpeedUnits, context)
+        preserve_final_pt = self.parameterAsBool(parameters, self.PrmPreserveFinalPoint, context)
+        time_field = self.parameterAsString(parameters, self.PrmTimeField, context)
+        fields = source.fields()
+
+        if self.PrmOrderField not in parameters or parameters[self.PrmOrderField] is None or parameters[self.PrmOrderField] == '':
+            order_field = time_field
+        else:
+            order_field = self.parameterAsString(parameters, self.PrmOrderField, context)
+
+        if self.PrmGroupField not in parameters or parameters[self.PrmGroupField] is None or parameters[self.PrmGroupField] == '':
+            group_field = None
+        else:
+            group_field = self.parameterAsString(parameters, self.PrmGroupField, context)
+
+        speed_field = self.parameterAsString(parameters, self.PrmSpeedField, context)
+        course_field = self.parameterAsString(parameters, self.PrmCourseField, context)
+        if bool(speed_field) != bool(course_field):
+            msg = tr('Please select both a speed and a heading field or neither of them')
+            feedback.reportError(msg)
+            raise QgsProcessingException(msg)
+        if speed_field:
+            speed_idx = fields.indexOf(speed_field)
+            course_idx = fields.indexOf(course_field)
+        else:
+            speed_idx = None
+            course_idx = None
+
+        wkbtype = source.wkbType()
+
+        if QgsWkbTypes.isMultiType(wkbtype):
+            msg = tr('Only supports single part Point geometry')
+            feedback.reportError(msg)
+            raise QgsProcessingException(msg)
+
+        layercrs = source.sourceCrs()
+
+        (sink, dest_id) = self.parameterAsSink(
+            parameters, self.PrmOutputLayer, context, fields, wkbtype, layercrs)
+        sink = BufferedSink(sink)
+
+        if layercrs != epsg4326:
+            transto4326 = QgsCoordinateTransform(layercrs, epsg4326, QgsProject.instance())
+        else:
+            transto4326 = None
+
+        tolerance = tolerance * conversionToMeters(units)
+        time_idx = fields.indexOf(time_field)
+        if method == 0:
+            def new_track():
+                return DeadReckoningCompressor(
+                    sink, transto4326, time_idx, tolerance,
+                    speed_idx, course_idx, SPEED_TO_MPS[speed_units])
+        else:
+            def new_track():
+                return WindowCompressor(sink, transto4326, time_idx, tolerance)
+        processTracks(
+            source, order_field, group_field, new_track, preserve_final_pt, feedback)
+        sink.flush()
+
+        return {self.PrmOutputLayer: dest_id}
+
+    def name(self):
+        return 'geodesictrackcompress'
+
+    def icon(self):
+        return QIcon(os.path.dirname(__file__) + '/images/geodesicPointDecimate.svg')
+
+    def displayName(self):
+        return tr('Geodesic track compression')
+
+    def group(self):
+        return tr('Vector geometry')
+
+    def groupId(self):
+        return 'vectorgeometry'
+
+    def helpUrl(self):
+        file = os.path.dirname(__file__) + '/index.html'
+        if not os.path.exists(file):
+            return ''
+        return QUrl.fromLocalFile(file).toString(QUrl.FullyEncoded)
+
+    def shortHelpString(self):
+        file = os.path.dirname(__file__) + '/doc/GeodesicTrackCompressAlgorithm.help'
+        if not os.path.exists(file):
+            return ''
+        with open(file) as helpf:
+            help = helpf.read()
+        return help
+
+    def createInstance(self):
+        return GeodesicTrackCompressAlgorithm()
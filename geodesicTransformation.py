@@ -11,7 +11,7 @@
 import os
 from geographiclib.geodesic import Geodesic
 
-from qgis.core import (QgsPoint, QgsProject, QgsCoordinateTransform, QgsPropertyDefinition)
+from qgis.core import (QgsPoint, QgsPointXY, QgsProject, QgsCoordinateTransform, QgsPropertyDefinition)
 
 from qgis.core import (
     QgsProcessing,
@@ -24,7 +24,7 @@ from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtCore import QUrl
 
 from .settings import epsg4326, geod
-from .utils import tr, conversionToMeters, DISTANCE_LABELS
+from .utils import tr, conversionToMeters, DISTANCE_LABELS, geodesicFan, geodesicInverse, transformPoints
 
 
 class GeodesicTransformationsAlgorithm(QgsProcessingFeatureBasedAlgorithm):
@@ -215,18 +215,14 @@ class GeodesicTransformationsAlgorithm(QgsProcessingFeatureBasedAlgorithm):
         ncy = new_centroid.y()
         ncx = new_centroid.x()
 
-        vertices = geom.vertices()
-        for vcnt, vertex in enumerate(vertices):
-            v = self.geom_to_4326.transform(vertex.x(), vertex.y())
-            gline = geod.Inverse(cy, cx, v.y(), v.x())
-            vdist = gline['s12']
-            vazi = gline['azi1']
-            if scale != 1:
-                vdist = vdist * scale
-            if angle != 0:
-                vazi += angle
-            g = geod.Direct(ncy, ncx, vazi, vdist, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-            new_vertex = self.to_sink_crs.transform(g['lon2'], g['lat2'])
+        vertices = transformPoints(self.geom_to_4326, [QgsPointXY(vertex) for vertex in geom.vertices()])
+        vdists, vazis = geodesicInverse(cy, cx, [v.y() for v in vertices], [v.x() for v in vertices])
+        if scale != 1:
+            vdists = [vdist * scale for vdist in vdists]
+        if angle != 0:
+            vazis = [vazi + angle for vazi in vazis]
+        new_vertices = transformPoints(self.to_sink_crs, geodesicFan(ncy, ncx, vazis, vdists))
+        for vcnt, new_vertex in enumerate(new_vertices):
             geom.moveVertex(new_vertex.x(), new_vertex.y(), vcnt)
         feature.setGeometry(geom)
         return [feature]
@@ -10,7 +10,7 @@
 """
 import os
 
-from qgis.core import QgsCoordinateTransform, QgsFeature, QgsGeometry, QgsProject, QgsWkbTypes
+from qgis.core import QgsCoordinateTransform, QgsFeature, QgsProject, QgsWkbTypes
 
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtCore import QUrl
@@ -22,7 +22,8 @@ from qgis.core import (
     QgsProcessingParameterFeatureSink)
 
 from .settings import epsg4326
-from .utils import checkIdlCrossings, normalizeLongitude, tr
+from .utils import splitAtAntimeridian, tr, transformPoints, BufferedSink
+from .wkbGeometry import multiPolylineGeometry
 # import traceback
 
 class IdlBreakLineAlgorithm(QgsProcessingAlgorithm):
@@ -55,11 +56,14 @@ class IdlBreakLineAlgorithm(QgsProcessingAlgorithm):
         (sink, dest_id) = self.parameterAsSink(
             parameters, self.PrmOutputLayer, context, source.fields(),
             QgsWkbTypes.MultiLineString, srcCRS)
+        sink = BufferedSink(sink)
 
         # Set up CRS transformations
         if srcCRS != epsg4326:
             geomTo4326 = QgsCoordinateTransform(srcCRS, epsg4326, QgsProject.instance())
             toSinkCrs = QgsCoordinateTransform(epsg4326, srcCRS, QgsProject.instance())
+        else:
+            toSinkCrs = None
 
         featureCount = source.featureCount()
         total = 100.0 / featureCount if featureCount else 0
@@ -80,18 +84,14 @@ class IdlBreakLineAlgorithm(QgsProcessingAlgorithm):
                 outseg = []
                 for pts in seg:
                     if srcCRS != epsg4326:
-                        for x, pt in enumerate(pts):
-                            pts[x] = geomTo4326.transform(pt)
-                    normalizeLongitude(pts)
-                    newseg = checkIdlCrossings(pts)
-                    outseg.extend(newseg)
-                if srcCRS != epsg4326:  # Convert each point to the output CRS
-                    for y in range(len(outseg)):
-                        for x, pt in enumerate(outseg[y]):
-                            outseg[y][x] = toSinkCrs.transform(pt)
+                        pts = transformPoints(geomTo4326, pts)
+                    xs = [(pt.x() + 180) % 360 - 180 for pt in pts]
+                    ys = [pt.y() for pt in pts]
+                    outseg.extend(splitAtAntimeridian(xs, ys))
 
                 f = QgsFeature()
-                f.setGeometry(QgsGeometry.fromMultiPolylineXY(outseg))
+                # If the layer crs is not 4326 the geometry is transformed back to it as it is built
+                f.setGeometry(multiPolylineGeometry(outseg, toSinkCrs))
                 f.setAttributes(feature.attributes())
                 sink.addFeature(f)
 
@@ -102,6 +102,7 @@ class IdlBreakLineAlgorithm(QgsProcessingAlgorithm):
 
             if cnt % 100 == 0:
                 feedback.setProgress(int(cnt * total))
+        sink.flush()
 
         return {self.PrmOutputLayer: dest_id}
 
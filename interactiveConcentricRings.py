@@ -10,10 +10,10 @@
 """
 import os
 import re
-from geographiclib.geodesic import Geodesic
+from array import array
 
 from qgis.core import (
-    QgsPointXY, QgsGeometry, QgsFeature, QgsField, QgsFields,
+    QgsFeature, QgsField, QgsFields,
     QgsProject, QgsWkbTypes, QgsCoordinateTransform, QgsPropertyDefinition)
 
 from qgis.core import (
@@ -29,8 +29,9 @@ from qgis.core import (
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtCore import QVariant, QUrl
 
-from .settings import settings, epsg4326, geod
-from .utils import tr, conversionToMeters, DISTANCE_LABELS, DISTANCE_ABBREVIATIONS, makeIdlCrossingsPositive, hasIdlCrossing
+from .settings import settings, epsg4326
+from .utils import tr, conversionToMeters, DISTANCE_LABELS, DISTANCE_ABBREVIATIONS, makeIdlCrossingsPositiveCoords, hasIdlCrossingCoords, fanAzimuths, geodesicRingsCoords, geodesicRadialsCoords, BufferedSink
+from .wkbGeometry import polylineGeometry
 
 class InteractiveConcentricRingsAlgorithm(QgsProcessingAlgorithm):
     """
@@ -195,6 +196,7 @@ class InteractiveConcentricRingsAlgorithm(QgsProcessingAlgorithm):
         (sink, dest_id) = self.parameterAsSink(
             parameters, self.PrmCircleOutput,
             context, fields, QgsWkbTypes.LineString, epsg4326)
+        sink = BufferedSink(sink)
         if radial_cnt:
             fields = QgsFields()
             fields.append(QgsField('id', QVariant.Int))
@@ -202,6 +204,7 @@ class InteractiveConcentricRingsAlgorithm(QgsProcessingAlgorithm):
             (sink_radials, dest_id_radials) = self.parameterAsSink(
                 parameters, self.PrmRadialLineOutput,
                 context, fields, QgsWkbTypes.LineString, epsg4326)
+            sink_radials = BufferedSink(sink_radials)
             
         if ring_distance_str:
             try:
@@ -217,40 +220,35 @@ class InteractiveConcentricRingsAlgorithm(QgsProcessingAlgorithm):
         lon = pt.x()
 
         try:
-            for idx, dist in enumerate(rads):
-                pts_out = []
-                angle = 0
-                while angle < 360:
-                    g = geod.Direct(lat, lon, angle, dist, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-                    pts_out.append(QgsPointXY(g['lon2'], g['lat2']))
-                    angle += pt_spacing
-                pts_out.append(pts_out[0])
-                crosses_idl = hasIdlCrossing(pts_out)
+            azimuths = fanAzimuths(pt_spacing)
+            for idx, (dist, pts_out) in enumerate(zip(rads, geodesicRingsCoords(lat, lon, azimuths, rads))):
+                pts_out.extend(pts_out[0:2])
+                crosses_idl = hasIdlCrossingCoords(pts_out)
                 if crosses_idl:
-                    makeIdlCrossingsPositive(pts_out, True)
+                    makeIdlCrossingsPositiveCoords(pts_out, True)
                 f = QgsFeature()
                 f.setAttributes([idx, dist, unit_str])
-                f.setGeometry(QgsGeometry.fromPolylineXY(pts_out))
+                f.setGeometry(polylineGeometry(pts_out))
                 sink.addFeature(f)
             if radial_cnt:
                 # This will be the number of points to draw the radials
                 num_radial_pts = int(segments / 6)
                 if num_radial_pts < 2:
                     num_radial_pts = 2
-                for i in range(radial_cnt):
-                    angle = starting_radial_angle + i * 360 / radial_cnt
-                    pts_out = [pt]
-                    for j in range(1, num_radial_pts + 1):
-                        dist2 = dist * j / num_radial_pts
-                        g = geod.Direct(lat, lon, angle, dist2, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-                        pts_out.append(QgsPointXY(g['lon2'], g['lat2']))
+                angles = [starting_radial_angle + i * 360 / radial_cnt for i in range(radial_cnt)]
+                dists = [dist * j / num_radial_pts for j in range(1, num_radial_pts + 1)]
+                for i, (angle, radial) in enumerate(zip(angles, geodesicRadialsCoords(lat, lon, angles, dists))):
+                    pts_out = array('d', (pt.x(), pt.y()))
+                    pts_out.extend(radial)
                     f = QgsFeature()
                     f.setAttributes([i, angle])
-                    f.setGeometry(QgsGeometry.fromPolylineXY(pts_out))
+                    f.setGeometry(polylineGeometry(pts_out))
                     sink_radials.addFeature(f)
         except Exception:
             raise QgsProcessingException('Somthing went wrong')
+        sink.flush()
 
         if radial_cnt:
+            sink_radials.flush()
             return {self.PrmRadialLineOutput: dest_id_radials, self.PrmCircleOutput: dest_id}
         return {self.PrmCircleOutput: dest_id}
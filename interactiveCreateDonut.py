@@ -9,10 +9,10 @@
  ***************************************************************************/
 """
 import os
-from geographiclib.geodesic import Geodesic
+from array import array
 
 from qgis.core import (
-    QgsPointXY, QgsGeometry, QgsFeature,
+    QgsFeature,
     QgsProject, QgsWkbTypes, QgsCoordinateTransform, QgsFields, QgsPropertyDefinition)
 
 from qgis.core import (
@@ -29,8 +29,9 @@ from qgis.core import (
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtCore import QVariant, QUrl
 
-from .settings import settings, epsg4326, geod
-from .utils import tr, conversionToMeters, DISTANCE_LABELS, makeIdlCrossingsPositive, hasIdlCrossing
+from .settings import settings, epsg4326
+from .utils import tr, conversionToMeters, DISTANCE_LABELS, makeIdlCrossingsPositiveCoords, hasIdlCrossingCoords, fanAzimuths, geodesicCircleCoords, geodesicRingsCoords, BufferedSink
+from .wkbGeometry import polygonGeometry, multiPolylineGeometry
 
 SHAPE_TYPE = [tr("Polygon"), tr("Line")]
 
@@ -158,41 +159,40 @@ class InteractiveCreateDonutAlgorithm(QgsProcessingAlgorithm):
             (sink, dest_id) = self.parameterAsSink(
                 parameters, self.PrmOutput,
                 context, QgsFields(), QgsWkbTypes.MultiLineString, epsg4326)
+        sink = BufferedSink(sink)
 
         try:
-            pts_in = []
-            pts_out = []
+            pts_in = array('d')
+            pts_out = array('d')
             lat = pt.y()
             lon = pt.x()
-            angle = 0
-            while angle < 360:
-                if inner_rad != 0:
-                    g = geod.Direct(lat, lon, angle, inner_rad, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-                    pts_in.append(QgsPointXY(g['lon2'], g['lat2']))
-                g = geod.Direct(lat, lon, angle, outer_rad, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-                pts_out.append(QgsPointXY(g['lon2'], g['lat2']))
-                angle += pt_spacing
+            azimuths = fanAzimuths(pt_spacing)
+            if inner_rad != 0:
+                pts_out, pts_in = geodesicRingsCoords(lat, lon, azimuths, [outer_rad, inner_rad])
+            else:
+                pts_out = geodesicCircleCoords(lat, lon, azimuths, outer_rad)
             if inner_rad != 0:
-                pts_in.append(pts_in[0])
-            pts_out.append(pts_out[0])
-            crosses_idl = hasIdlCrossing(pts_out)
+                pts_in.extend(pts_in[0:2])
+            pts_out.extend(pts_out[0:2])
+            crosses_idl = hasIdlCrossingCoords(pts_out)
             if crosses_idl:
                 if inner_rad != 0:
-                    makeIdlCrossingsPositive(pts_in, True)
-                makeIdlCrossingsPositive(pts_out, True)
+                    makeIdlCrossingsPositiveCoords(pts_in, True)
+                makeIdlCrossingsPositiveCoords(pts_out, True)
             feature = QgsFeature()
             if shape_type == 0:
                 if inner_rad == 0:
-                    feature.setGeometry(QgsGeometry.fromPolygonXY([pts_out]))
+                    feature.setGeometry(polygonGeometry([pts_out]))
                 else:
-                    feature.setGeometry(QgsGeometry.fromPolygonXY([pts_out, pts_in]))
+                    feature.setGeometry(polygonGeometry([pts_out, pts_in]))
             else:
                 if inner_rad == 0:
-                    feature.setGeometry(QgsGeometry.fromMultiPolylineXY([pts_out]))
+                    feature.setGeometry(multiPolylineGeometry([pts_out]))
                 else:
-                    feature.setGeometry(QgsGeometry.fromMultiPolylineXY([pts_out, pts_in]))
+                    feature.setGeometry(multiPolylineGeometry([pts_out, pts_in]))
             sink.addFeature(feature)
         except Exception:
             raise QgsProcessingException('Invalid coordinate')
+        sink.flush()
 
         return {self.PrmOutput: dest_id}
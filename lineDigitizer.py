@@ -14,7 +14,7 @@ import re
 from qgis.PyQt.QtCore import Qt, QCoreApplication
 from qgis.PyQt.QtGui import QColor
 from qgis.PyQt.QtWidgets import QDialog
-from qgis.PyQt.uic import loadUiType
+from qgis.PyQt.uic import loadUi
 from qgis.core import Qgis, QgsCoordinateTransform, QgsFeature, QgsGeometry, QgsPoint, QgsProject, QgsWkbTypes, QgsSettings
 from qgis.gui import QgsMapToolEmitPoint, QgsVertexMarker
 
@@ -26,9 +26,6 @@ def tr(string):
     return QCoreApplication.translate('Processing', string)
 
 
-FORM_CLASS, _ = loadUiType(os.path.join(
-    os.path.dirname(__file__), 'ui/lineDigitizer.ui'))
-
 class LineDigitizerTool(QgsMapToolEmitPoint):
     '''Class to interact with the map canvas to capture the coordinate
     when the mouse button is pressed and to display the coordinate in
@@ -98,10 +95,10 @@ class LineDigitizerTool(QgsMapToolEmitPoint):
             self.canvas.scene().removeItem(self.vertex)
             self.vertex = None
 
-class LineDigitizerWidget(QDialog, FORM_CLASS):
+class LineDigitizerWidget(QDialog):
     def __init__(self, iface, parent):
         super(LineDigitizerWidget, self).__init__(parent)
-        self.setupUi(self)
+        loadUi(os.path.join(os.path.dirname(__file__), 'ui/lineDigitizer.ui'), self)
         self.iface = iface
         self.canvas = iface.mapCanvas()
         self.unitsComboBox.addItems(DISTANCE_LABELS)
@@ -9,35 +9,143 @@
  ***************************************************************************/
 """
 import os
-from qgis.core import QgsProcessingProvider
+from importlib import import_module
+from qgis.core import QgsProcessingAlgorithm, QgsProcessingProvider, QgsVectorLayer, QgsWkbTypes
+from qgis.PyQt.QtCore import QCoreApplication, QUrl
 from qgis.PyQt.QtGui import QIcon
-from .geodesicDensify import GeodesicDensifyAlgorithm
-from .geodesicPointDecimate import GeodesicPointDecimateAlgorithm
-from .geodesicLineDecimate import GeodesicLineDecimateAlgorithm
-from .geodesicLayerMeasure import GeodesicLayerMeasureAlgorithm
-from .geodesicTransformation import GeodesicTransformationsAlgorithm
-from .xyToLine import XYToLineAlgorithm
-from .geodesicFlip import GeodesicFlipAlgorithm
-from .createCircle import CreateCircleAlgorithm
-from .createDonut import CreateDonutAlgorithm
-from .createEllipse import CreateEllipseAlgorithm
-from .createLob import CreateLobAlgorithm
-from .createPolygon import CreatePolygonAlgorithm
-from .idlbreakline import IdlBreakLineAlgorithm
-from .createPie import CreatePieAlgorithm
-from .createArc import CreateArcAlgorithm
-from .createStar import CreateStarAlgorithm
-from .createGear import CreateGearAlgorithm
-from .createRose import CreateRoseAlgorithm
-from .createHypocycloid import CreateHypocycloidAlgorithm
-from .createEpicycloid import CreateEpicycloidAlgorithm
-from .createPolyfoil import CreatePolyfoilAlgorithm
-from .createHeart import CreateHeartAlgorithm
-from .createRadialLines import CreateRadialLinesAlgorithm
-from .createPointsAlongLob import CreatePointsAlongLobAlgorithm
-from .createRings import ConcentricRingsAlgorithm
-from .interactiveCreateDonut import InteractiveCreateDonutAlgorithm
-from . interactiveConcentricRings import InteractiveConcentricRingsAlgorithm
+
+def tr(string):
+    return QCoreApplication.translate('@default', string)
+
+GEOMETRY = ('Vector geometry', 'vectorgeometry')
+SHAPES = ('Geodesic shapes', 'vectorcreation')
+INTERACTIVE = ('Interactive geodesic shapes', 'interactiveshapes')
+
+# The layers that an algorithm can edit in place
+NO_LAYERS = ()
+POINT_LAYERS = (QgsWkbTypes.PointGeometry,)
+GEOMETRY_LAYERS = (QgsWkbTypes.PointGeometry, QgsWkbTypes.LineGeometry, QgsWkbTypes.PolygonGeometry)
+ANY_LAYER = None
+
+# The algorithms of the provider. Each entry is the algorithm id, the module
+# and class that implement it, its display name, group and icon, whether it
+# is a QgsProcessingFeatureBasedAlgorithm and the layers it can edit in
+# place. These must match what the algorithm class itself returns.
+ALGORITHMS = [
+    ('geodesicdensifier', 'geodesicDensify', 'GeodesicDensifyAlgorithm', 'Geodesic densifier', GEOMETRY, 'geodesicDensifier.svg', False, NO_LAYERS),
+    ('geodesicpointdecimate', 'geodesicPointDecimate', 'GeodesicPointDecimateAlgorithm', 'Geodesic point decimate', GEOMETRY, 'geodesicPointDecimate.svg', False, NO_LAYERS),
+    ('geodesiclinedecimate', 'geodesicLineDecimate', 'GeodesicLineDecimateAlgorithm', 'Geodesic line decimate', GEOMETRY, 'geodesicLineDecimate.svg', False, NO_LAYERS),
+    ('geodesiclinesimplify', 'geodesicLineSimplify', 'GeodesicLineSimplifyAlgorithm', 'Geodesic line simplify', GEOMETRY, 'geodesicLineDecimate.svg', False, NO_LAYERS),
+    ('geodesicarea', 'geodesicArea', 'GeodesicAreaAlgorithm', 'Geodesic area and perimeter', GEOMETRY, 'measureLine.svg', False, NO_LAYERS),
+    ('geodesictrackcompress', 'geodesicTrackCompress', 'GeodesicTrackCompressAlgorithm', 'Geodesic track compression', GEOMETRY, 'geodesicPointDecimate.svg', False, NO_LAYERS),
+    ('linebreak', 'idlbreakline', 'IdlBreakLineAlgorithm', 'Geodesic line break at -180,180', GEOMETRY, 'idlbreak.svg', False, NO_LAYERS),
+    ('measurelayer', 'geodesicLayerMeasure', 'GeodesicLayerMeasureAlgorithm', 'Geodesic measurement layer', GEOMETRY, 'measureLine.svg', False, NO_LAYERS),
+    ('geodesictransformations', 'geodesicTransformation', 'GeodesicTransformationsAlgorithm', 'Geodesic transformations', GEOMETRY, 'transformShape.svg', True, GEOMETRY_LAYERS),
+    ('xy2line', 'xyToLine', 'XYToLineAlgorithm', 'XY to line', GEOMETRY, 'xyline.svg', False, NO_LAYERS),
+    ('geodesicflip', 'geodesicFlip', 'GeodesicFlipAlgorithm', 'Geodesic flip and rotate', GEOMETRY, 'flip.svg', False, NO_LAYERS),
+    ('createellipse', 'createEllipse', 'CreateEllipseAlgorithm', 'Create ellipse', SHAPES, 'ellipse.png', True, NO_LAYERS),
+    ('createcircle', 'createCircle', 'CreateCircleAlgorithm', 'Create circle', SHAPES, 'circle.png', True, NO_LAYERS),
+    ('createdonut', 'createDonut', 'CreateDonutAlgorithm', 'Create donut', SHAPES, 'donut.png', True, NO_LAYERS),
+    ('createlob', 'createLob', 'CreateLobAlgorithm', 'Create line of bearing', SHAPES, 'line.png', True, NO_LAYERS),
+    ('createpointsalonglob', 'createPointsAlongLob', 'CreatePointsAlongLobAlgorithm', 'Create points along a bearing', SHAPES, 'ptline.png', True, POINT_LAYERS),
+    ('createpie', 'createPie', 'CreatePieAlgorithm', 'Create pie wedge', SHAPES, 'pie.png', True, NO_LAYERS),
+    ('createarc', 'createArc', 'CreateArcAlgorithm', 'Create arc wedge', SHAPES, 'arc.png', True, NO_LAYERS),
+    ('createpolygon', 'createPolygon', 'CreatePolygonAlgorithm', 'Create polygon', SHAPES, 'polygon.png', True, NO_LAYERS),
+    ('createstar', 'createStar', 'CreateStarAlgorithm', 'Create star', SHAPES, 'star.png', True, NO_LAYERS),
+    ('creategear', 'createGear', 'CreateGearAlgorithm', 'Create gear', SHAPES, 'gear.png', True, NO_LAYERS),
+    ('createrose', 'createRose', 'CreateRoseAlgorithm', 'Create ellipse rose', SHAPES, 'rose.png', True, NO_LAYERS),
+    ('createepicycloid', 'createEpicycloid', 'CreateEpicycloidAlgorithm', 'Create epicycloid', SHAPES, 'epicycloid.png', True, NO_LAYERS),
+    ('createhypocycloid', 'createHypocycloid', 'CreateHypocycloidAlgorithm', 'Create hypocycloid', SHAPES, 'hypocycloid.png', True, NO_LAYERS),
+    ('createpolyfoil', 'createPolyfoil', 'CreatePolyfoilAlgorithm', 'Create polyfoil', SHAPES, 'polyfoil.png', True, NO_LAYERS),
+    ('createheart', 'createHeart', 'CreateHeartAlgorithm', 'Create heart', SHAPES, 'heart.png', True, NO_LAYERS),
+    ('createradiallines', 'createRadialLines', 'CreateRadialLinesAlgorithm', 'Create radial lines', SHAPES, 'radialLines.png', True, NO_LAYERS),
+    ('interactivedonut', 'interactiveCreateDonut', 'InteractiveCreateDonutAlgorithm', 'Interactive donut', INTERACTIVE, 'donut.png', False, ANY_LAYER),
+    ('createrings', 'createRings', 'ConcentricRingsAlgorithm', 'Create rings', SHAPES, 'concentricrings.png', False, NO_LAYERS),
+    ('interactiverings', 'interactiveConcentricRings', 'InteractiveConcentricRingsAlgorithm', 'Interactive concentric rings', INTERACTIVE, 'concentricrings.png', False, ANY_LAYER),
+]
+
+class LazyAlgorithm(QgsProcessingAlgorithm):
+    '''The algorithm registered with the provider in place of each of the
+    Shape Tools algorithms. It describes the algorithm for the toolbox,
+    including its flags and in place edit support, from the table above. The
+    module implementing it, along with everything that module imports, is
+    loaded the first time the algorithm is run or its help, parameters or
+    outputs are asked for. createInstance returns the real algorithm, so a
+    feature based one is run, in place as well, through processFeature.'''
+    def __init__(self, algorithm_id, module, class_name, display_name, group, icon, feature_based, inplace):
+        super(LazyAlgorithm, self).__init__()
+        self.algorithm_id = algorithm_id
+        self.module = module
+        self.class_name = class_name
+        self.display_name = display_name
+        self.group_name, self.group_id = group
+        self.icon_file = icon
+        self.feature_based = feature_based
+        self.inplace = inplace
+        self.instance = None
+
+    def algorithmClass(self):
+        module = import_module('.' + self.module, __package__)
+        return getattr(module, self.class_name)
+
+    def algorithm(self):
+        '''Return the initialized instance of the real algorithm, creating it
+        the first time. Its parameters are also added to this algorithm so that
+        callers reading them directly, such as qgis_process help, see them.'''
+        if self.instance is None:
+            self.instance = self.create()
+            for param in self.instance.parameterDefinitions():
+                self.addParameter(param.clone())
+        return self.instance
+
+    def initAlgorithm(self, config=None):
+        # The parameters are added by algorithm() when they are first needed
+        pass
+
+    def name(self):
+        return self.algorithm_id
+
+    def icon(self):
+        return QIcon(os.path.join(os.path.dirname(__file__), 'images', self.icon_file))
+
+    def displayName(self):
+        return tr(self.display_name)
+
+    def group(self):
+        return tr(self.group_name)
+
+    def groupId(self):
+        return self.group_id
+
+    def helpUrl(self):
+        file = os.path.dirname(__file__) + '/index.html'
+        if not os.path.exists(file):
+            return ''
+        return QUrl.fromLocalFile(file).toString(QUrl.FullyEncoded)
+
+    def shortHelpString(self):
+        return self.algorithm().shortHelpString()
+
+    def flags(self):
+        flags = super(LazyAlgorithm, self).flags()
+        if self.feature_based:
+            # As QgsProcessingFeatureBasedAlgorithm.flags
+            flags |= QgsProcessingAlgorithm.FlagSupportsInPlaceEdits
+        return flags
+
+    def supportInPlaceEdit(self, layer):
+        if self.inplace is ANY_LAYER:
+            return True
+        return isinstance(layer, QgsVectorLayer) and layer.geometryType() in self.inplace
+
+    def parameterDefinitions(self):
+        return self.algorithm().parameterDefinitions()
+
+    def outputDefinitions(self):
+        return self.algorithm().outputDefinitions()
+
+    def createInstance(self):
+        return self.algorithmClass()()
 
 class ShapeToolsProvider(QgsProcessingProvider):
 
@@ -45,33 +153,8 @@ class ShapeToolsProvider(QgsProcessingProvider):
         QgsProcessingProvider.unload(self)
 
     def loadAlgorithms(self):
-        self.addAlgorithm(GeodesicDensifyAlgorithm())
-        self.addAlgorithm(GeodesicPointDecimateAlgorithm())
-        self.addAlgorithm(GeodesicLineDecimateAlgorithm())
-        self.addAlgorithm(IdlBreakLineAlgorithm())
-        self.addAlgorithm(GeodesicLayerMeasureAlgorithm())
-        self.addAlgorithm(GeodesicTransformationsAlgorithm())
-        self.addAlgorithm(XYToLineAlgorithm())
-        self.addAlgorithm(GeodesicFlipAlgorithm())
-        self.addAlgorithm(CreateEllipseAlgorithm())
-        self.addAlgorithm(CreateCircleAlgorithm())
-        self.addAlgorithm(CreateDonutAlgorithm())
-        self.addAlgorithm(CreateLobAlgorithm())
-        self.addAlgorithm(CreatePointsAlongLobAlgorithm())
-        self.addAlgorithm(CreatePieAlgorithm())
-        self.addAlgorithm(CreateArcAlgorithm())
-        self.addAlgorithm(CreatePolygonAlgorithm())
-        self.addAlgorithm(CreateStarAlgorithm())
-        self.addAlgorithm(CreateGearAlgorithm())
-        self.addAlgorithm(CreateRoseAlgorithm())
-        self.addAlgorithm(CreateEpicycloidAlgorithm())
-        self.addAlgorithm(CreateHypocycloidAlgorithm())
-        self.addAlgorithm(CreatePolyfoilAlgorithm())
-        self.addAlgorithm(CreateHeartAlgorithm())
-        self.addAlgorithm(CreateRadialLinesAlgorithm())
-        self.addAlgorithm(InteractiveCreateDonutAlgorithm())
-        self.addAlgorithm(ConcentricRingsAlgorithm())
-        self.addAlgorithm(InteractiveConcentricRingsAlgorithm())
+        for algorithm in ALGORITHMS:
+            self.addAlgorithm(LazyAlgorithm(*algorithm))
 
     def icon(self):
         return QIcon(os.path.dirname(__file__) + '/images/shapes.png')
@@ -21,9 +21,6 @@ from qgis.core import QgsCoordinateReferenceSystem, QgsEllipsoidUtils
 epsg4326 = QgsCoordinateReferenceSystem("EPSG:4326")
 geod = Geodesic.WGS84
 
-FORM_CLASS, _ = uic.loadUiType(os.path.join(
-    os.path.dirname(__file__), 'ui/settings.ui'))
-
 def tr(string):
     return QCoreApplication.translate('Processing', string)
 
@@ -36,15 +33,23 @@ historical_ellipsoids = {
 }
 
 class Ellipsoids():
-    acronymList = {}
-
     def __init__(self):
-        # This returns the acronym, description, & parameters
-        definitions = QgsEllipsoidUtils.definitions()
+        self._acronymList = None
+
+    @property
+    def acronymList(self):
+        '''The system ellipsoid definitions keyed on their acronym. Querying
+        them is slow so it is only done the first time a system ellipsoid is
+        needed rather than when the plugin is loaded.'''
+        if self._acronymList is None:
+            # This returns the acronym, description, & parameters
+            definitions = QgsEllipsoidUtils.definitions()
 
-        # Create a dictionary of definitions keyed on the acronym
-        for item in definitions:
-            self.acronymList[item.acronym] = item
+            # Create a dictionary of definitions keyed on the acronym
+            self._acronymList = {}
+            for item in definitions:
+                self._acronymList[item.acronym] = item
+        return self._acronymList
 
     def ellipsoidDescription(self, acronym):
         '''Return an acronym's description'''
@@ -151,11 +156,12 @@ class Settings():
 
 settings = Settings()
 
-class SettingsWidget(QDialog, FORM_CLASS):
+class SettingsWidget(QDialog):
     '''Settings Dialog box.'''
     def __init__(self, iface, parent):
         super(SettingsWidget, self).__init__(parent)
-        self.setupUi(self)
+        # The form is compiled when the dialog is first opened
+        uic.loadUi(os.path.join(os.path.dirname(__file__), 'ui/settings.ui'), self)
         self.iface = iface
         ellipseDef = QgsEllipsoidUtils.definitions()
         self.wgs84index = 0
@@ -22,7 +22,6 @@ from .lineDigitizer import LineDigitizerTool
 import os.path
 import webbrowser
 from .provider import ShapeToolsProvider
-from .geodesicFlip import flipLayer
 from .stFunctions import InitShapeToolsFunctions, UnloadShapeToolsFunctions
 
 def tr(string):
@@ -201,9 +200,15 @@ class ShapeTools(object):
         icon = QIcon(self.plugin_dir + '/images/geodesicLineDecimate.svg')
         self.lineDecimateAction = menu.addAction(icon, tr('Geodesic line decimate'), self.lineDecimateTool)
         self.lineDecimateAction.setObjectName('stGeodesicLineDecimate')
+        icon = QIcon(self.plugin_dir + '/images/geodesicLineDecimate.svg')
+        self.lineSimplifyAction = menu.addAction(icon, tr('Geodesic line simplify'), self.lineSimplifyTool)
+        self.lineSimplifyAction.setObjectName('stGeodesicLineSimplify')
         icon = QIcon(self.plugin_dir + '/images/geodesicPointDecimate.svg')
         self.pointDecimateAction = menu.addAction(icon, tr('Geodesic point decimate'), self.pointDecimateTool)
         self.pointDecimateAction.setObjectName('stGeodesicPointDecimate')
+        icon = QIcon(self.plugin_dir + '/images/geodesicPointDecimate.svg')
+        self.trackCompressAction = menu.addAction(icon, tr('Geodesic track compression'), self.trackCompressTool)
+        self.trackCompressAction.setObjectName('stGeodesicTrackCompress')
         # Add the decimation tools to the menu
         icon = QIcon(self.plugin_dir + '/images/geodesicLineDecimate.svg')
         self.simplifyGeomAction = QAction(icon, tr('Geodesic geometry simplification'), self.iface.mainWindow())
@@ -244,6 +249,13 @@ class ShapeTools(object):
         self.iface.addPluginToVectorMenu('Shape Tools', self.measureLayerAction)
         self.toolbar.addAction(self.measureLayerAction)
 
+        # Initialize Geodesic area and perimeter
+        icon = QIcon(self.plugin_dir + '/images/measureLine.svg')
+        self.measureAreaAction = QAction(icon, tr('Add geodesic area and perimeter fields'), self.iface.mainWindow())
+        self.measureAreaAction.setObjectName('stGeodesicArea')
+        self.measureAreaAction.triggered.connect(self.measureAreaTool)
+        self.iface.addPluginToVectorMenu('Shape Tools', self.measureAreaAction)
+
         menu = QMenu()
         menu.setObjectName('stGeodesicTransformationsMenu')
         # Initialize Geodesic transformation tool
@@ -355,6 +367,7 @@ class ShapeTools(object):
         self.iface.removePluginVectorMenu('Shape Tools', self.geodesicLineBreakAction)
         self.iface.removePluginVectorMenu('Shape Tools', self.measureAction)
         self.iface.removePluginVectorMenu('Shape Tools', self.measureLayerAction)
+        self.iface.removePluginVectorMenu('Shape Tools', self.measureAreaAction)
         self.iface.removePluginVectorMenu('Shape Tools', self.transformsAction)
         self.iface.removePluginVectorMenu('Shape Tools', self.digitizeAction)
         self.iface.removePluginVectorMenu('Shape Tools', self.lineDigitizeAction)
@@ -410,9 +423,15 @@ class ShapeTools(object):
     def pointDecimateTool(self):
         processing.execAlgorithmDialog('shapetools:geodesicpointdecimate', {})
 
+    def trackCompressTool(self):
+        processing.execAlgorithmDialog('shapetools:geodesictrackcompress', {})
+
     def lineDecimateTool(self):
         processing.execAlgorithmDialog('shapetools:geodesiclinedecimate', {})
 
+    def lineSimplifyTool(self):
+        processing.execAlgorithmDialog('shapetools:geodesiclinesimplify', {})
+
     def geodesicLineBreakTool(self):
         processing.execAlgorithmDialog('shapetools:linebreak', {})
 
@@ -480,31 +499,35 @@ class ShapeTools(object):
     def measureLayerTool(self):
         processing.execAlgorithmDialog('shapetools:measurelayer', {})
 
+    def measureAreaTool(self):
+        processing.execAlgorithmDialog('shapetools:geodesicarea', {})
+
     def transformTool(self):
         processing.execAlgorithmDialog('shapetools:geodesictransformations', {})
 
     def flipRotateTool(self):
         processing.execAlgorithmDialog('shapetools:geodesicflip', {})
 
-    def flipHorizontalTool(self):
+    def flipActiveLayer(self, mode):
+        # The algorithm module is only imported when a flip is first used
+        from .geodesicFlip import flipLayer
         layer = self.iface.activeLayer()
-        flipLayer(self.iface, layer, 0)
+        flipLayer(self.iface, layer, mode)
+
+    def flipHorizontalTool(self):
+        self.flipActiveLayer(0)
 
     def flipVerticalTool(self):
-        layer = self.iface.activeLayer()
-        flipLayer(self.iface, layer, 1)
+        self.flipActiveLayer(1)
 
     def rotate180Tool(self):
-        layer = self.iface.activeLayer()
-        flipLayer(self.iface, layer, 2)
+        self.flipActiveLayer(2)
 
     def rotate90CWTool(self):
-        layer = self.iface.activeLayer()
-        flipLayer(self.iface, layer, 3)
+        self.flipActiveLayer(3)
 
     def rotate90CCWTool(self):
-        layer = self.iface.activeLayer()
-        flipLayer(self.iface, layer, 4)
+        self.flipActiveLayer(4)
 
     def settings(self):
         if self.settingsDialog is None:
@@ -0,0 +1,226 @@
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+
+The geodesic core of the shape algorithms. These functions only take the
+center latitude, longitude and numeric parameters and return the shape
+vertices as a list of (x, y) tuples in EPSG:4326. Nothing in this module may
+import QGIS so that it can be loaded by the worker processes used when an
+algorithm is run with parallel workers.
+"""
+import os
+import sys
+import math
+import multiprocessing
+from geographiclib.geodesic import Geodesic
+from . import arrayGeodesic
+
+# The same ellipsoid as settings.geod
+geod = Geodesic.WGS84
+
+def circleCoords(lat, lon, radius, azimuths, geodesic=geod):
+    coords = []
+    for azimuth in azimuths:
+        g = geodesic.Direct(lat, lon, azimuth, radius, Geodesic.LATITUDE | Geodesic.LONGITUDE)
+        coords.append((g['lon2'], g['lat2']))
+    return coords
+
+def ellipseCoords(lat, lon, sma, smi, orient, segments, geodesic=geod):
+    segments = int(math.ceil(segments / 2))
+    if smi < 0.0001:
+        smi = 0.0001
+    if sma < 0.0001:
+        sma = 0.0001
+    if sma < smi:
+        temp = sma
+        sma = smi
+        smi = temp
+        orient += 90
+    ab = sma * smi
+    step = 18.0 * smi / sma
+    if step < 1.0:
+        minimum = step
+    else:
+        minimum = 1.0
+
+    maxang = math.pi / 6 * minimum
+    delta = ab * math.pi / segments
+    coords = []
+    azi = 0
+    while azi < math.tau:
+        cos_azi = math.cos(azi)
+        sin_azi = math.sin(azi)
+        rad = ab / math.sqrt(sma * sma * sin_azi * sin_azi + smi * smi * cos_azi * cos_azi)
+        g = geodesic.Direct(lat, lon, math.degrees(azi) + orient, rad, Geodesic.LATITUDE | Geodesic.LONGITUDE)
+        coords.append((g['lon2'], g['lat2']))
+        delo = delta / (rad * rad)
+        if maxang < delo:
+            delo = maxang
+        azi += delo
+    return coords
+
+def lobCoords(lat, lon, bearing, distance, offset, maxseglen, maxSegments, geodesic=geod):
+    gline = geodesic.Line(lat, lon, bearing)
+    n = int(math.ceil((distance - offset) / maxseglen))
+    if n > maxSegments:
+        n = maxSegments
+    seglen = (distance - offset) / n
+    if offset == 0:
+        coords = [(lon, lat)]
+    else:
+        g = gline.Position(offset, Geodesic.LATITUDE | Geodesic.LONGITUDE | Geodesic.LONG_UNROLL)
+        coords = [(g['lon2'], g['lat2'])]
+    for i in range(1, n + 1):
+        g = gline.Position(offset + seglen * i, Geodesic.LATITUDE | Geodesic.LONGITUDE | Geodesic.LONG_UNROLL)
+        coords.append((g['lon2'], g['lat2']))
+    return coords
+
+def fanCoords(lat, lon, azimuths, distances, geodesic=geod):
+    '''Return the coordinates of the points at each azimuth and distance pair
+    from (lat, lon). When numpy is available all of the pairs are solved in
+    one batch DirectFan call.'''
+    if arrayGeodesic.available:
+        g = arrayGeodesic.DirectFan(geodesic, lat, lon, azimuths, distances, Geodesic.LATITUDE | Geodesic.LONGITUDE)
+        return list(zip(g['lon2'].tolist(), g['lat2'].tolist()))
+    coords = []
+    for azimuth, distance in zip(azimuths, distances):
+        g = geodesic.Direct(lat, lon, azimuth, distance, Geodesic.LATITUDE | Geodesic.LONGITUDE)
+        coords.append((g['lon2'], g['lat2']))
+    return coords
+
+# The polar shapes. Each function returns the azimuth in degrees and the
+# distance in meters from the center of every vertex of the shape, in drawing
+# order, as two lists. The geodesic projection of the vertices is left to
+# fanCoords or utils.polarShapeGeometry.
+
+def curveAngles(segments):
+    '''Return the segments + 1 parametric angles of a closed curve from 0 up to
+    and including 360 degrees. The angles are computed from their index so
+    that rounding never adds or drops the last one.'''
+    step = 360.0 / segments
+    return [i * step for i in range(segments + 1)]
+
+def epicycloidPolar(r, lobes, sangle, segments):
+    azimuths = []
+    distances = []
+    for angle in curveAngles(segments):
+        a = math.radians(angle)
+        x = r * (lobes + 1.0) * math.cos(a) - r * math.cos((lobes + 1.0) * a)
+        y = r * (lobes + 1.0) * math.sin(a) - r * math.sin((lobes + 1.0) * a)
+        azimuths.append(math.degrees(math.atan2(y, x)) + sangle)
+        distances.append(math.sqrt(x * x + y * y))
+    return azimuths, distances
+
+def hypocycloidPolar(r, cusps, sangle, segments):
+    azimuths = []
+    distances = []
+    for angle in curveAngles(segments):
+        a = math.radians(angle)
+        x = r * (cusps - 1.0) * math.cos(a) + r * math.cos((cusps - 1.0) * a)
+        y = r * (cusps - 1.0) * math.sin(a) - r * math.sin((cusps - 1.0) * a)
+        azimuths.append(math.degrees(math.atan2(y, x)) + sangle)
+        distances.append(math.sqrt(x * x + y * y))
+    return azimuths, distances
+
+def heartPolar(radius, sangle, segments):
+    azimuths = []
+    distances = []
+    for angle in curveAngles(segments):
+        a = math.radians(angle)
+        sina = math.sin(a)
+        x = 16 * sina * sina * sina
+        y = 13 * math.cos(a) - 5 * math.cos(2 * a) - 2 * math.cos(3 * a) - math.cos(4 * a)
+        azimuths.append(math.degrees(math.atan2(y, x)) + sangle)
+        distances.append(math.sqrt(x * x + y * y) * radius / 17.0)
+    return azimuths, distances
+
+def polyfoilPolar(r, lobes, sangle, segments):
+    azimuths = curveAngles(segments)
+    distances = []
+    for angle in azimuths:
+        a = math.radians(angle - sangle)
+        x = r * (lobes - 1.0) * math.cos(a) + r * math.cos((lobes - 1.0) * a)
+        y = r * (lobes - 1.0) * math.sin(a) - r * math.sin((lobes - 1.0) * a)
+        distances.append(math.sqrt(x * x + y * y))
+    return azimuths, distances
+
+def rosePolar(radius, petals, sangle):
+    # The petal profile is a cosine over each petal sampled every degree
+    profile = []
+    if petals == 1:
+        profile.append(0.0)
+    angle = -89.0
+    while angle < 90.0:
+        profile.append(math.cos(math.radians(angle)))
+        angle += 1
+    arange = 360.0 / petals
+    astep = arange / len(profile)
+    aoffset = arange * (petals - 1)
+    azimuths = []
+    distances = []
+    angle = -arange / 2.0
+    for i in range(petals):
+        for d in profile:
+            azimuths.append(angle + aoffset + sangle)
+            distances.append(d * radius)
+            angle += astep
+    return azimuths, distances
+
+def starPolar(oradius, iradius, sangle, spoints):
+    shalf = (360.0 / spoints) / 2.0
+    azimuths = []
+    distances = []
+    for i in range(spoints - 2, -2, -1):
+        angle = (i * 360.0 / spoints) + sangle
+        azimuths.extend((angle, angle - shalf))
+        distances.extend((oradius, iradius))
+    return azimuths, distances
+
+def gearPolar(oradius, iradius, sangle, num_teeth, teeth_percent, slot_percent):
+    half = (360.0 / num_teeth) / 2
+    teeth_half = (360.0 / num_teeth) * teeth_percent / 200
+    slot_half = (360.0 / num_teeth) * slot_percent / 200
+    azimuths = []
+    distances = []
+    for i in range(num_teeth):
+        angle = (i * 360.0 / num_teeth) + sangle
+        azimuths.extend((angle - teeth_half, angle + teeth_half, angle + half - slot_half, angle + half + slot_half))
+        distances.extend((oradius, oradius, iradius, iradius))
+    return azimuths, distances
+
+def polygonPolar(radius, sides, sangle):
+    azimuths = [(i * 360.0 / sides) + sangle for i in range(sides, -1, -1)]
+    return azimuths, [radius] * len(azimuths)
+
+def gearCoords(lat, lon, oradius, iradius, sangle, num_teeth, teeth_percent, slot_percent, geodesic=geod):
+    azimuths, distances = gearPolar(oradius, iradius, sangle, num_teeth, teeth_percent, slot_percent)
+    return fanCoords(lat, lon, azimuths, distances, geodesic)
+
+def callShape(func, args):
+    '''Run one of the shape functions in a worker. A failure only affects its
+    own feature so it is returned as None rather than raised.'''
+    try:
+        return func(*args)
+    except Exception:
+        return None
+
+def mpContext():
+    '''Return the multiprocessing context used for the worker pool. Workers are
+    always spawned as forking the QGIS application is not safe. Inside QGIS
+    sys.executable is the application itself so point multiprocessing at the
+    python interpreter that QGIS is using.'''
+    ctx = multiprocessing.get_context('spawn')
+    if not os.path.basename(sys.executable).lower().startswith('python'):
+        for folder in (sys.exec_prefix, os.path.join(sys.exec_prefix, 'bin')):
+            for name in ('python.exe', 'python3', 'python'):
+                path = os.path.join(folder, name)
+                if os.path.isfile(path):
+                    ctx.set_executable(path)
+                    return ctx
+    return ctx
@@ -9,41 +9,92 @@
  ***************************************************************************/
 """
 import re
+import threading
+from collections import OrderedDict
 from geographiclib.geodesic import Geodesic
 from qgis.core import QgsUnitTypes, QgsPointXY, QgsPoint, QgsGeometry, QgsExpression, QgsCoordinateReferenceSystem, QgsCoordinateTransform, QgsProject, QgsWkbTypes
 from qgis.utils import qgsfunction
 from .settings import epsg4326, geod, settings
 from .compass import Compass
+from .utils import geodesicFan, geodesicInverse, geodesicPolygonMeasure, transformPoints
 
 # import traceback
 
 group_name = 'Shape Tools'
 
+class TransformCache():
+    '''A process wide LRU cache of QgsCoordinateTransform objects keyed by
+    the source and destination CRS. The expression functions can be
+    evaluated from several threads at once so access is guarded by a lock and
+    each caller gets its own copy of the cached transform. The hits and misses
+    counters record how well the cache is working.'''
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._transforms = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, src_crs, dest_crs):
+        key = (self._key(src_crs), self._key(dest_crs))
+        with self._lock:
+            transform = self._transforms.get(key)
+            if transform is not None:
+                self._transforms.move_to_end(key)
+                self.hits += 1
+                return QgsCoordinateTransform(transform)
+            self.misses += 1
+        transform = QgsCoordinateTransform(
+            QgsCoordinateReferenceSystem(src_crs), QgsCoordinateReferenceSystem(dest_crs), QgsProject.instance())
+        with self._lock:
+            self._transforms[key] = transform
+            self._transforms.move_to_end(key)
+            if len(self._transforms) > self.maxsize:
+                self._transforms.popitem(last=False)
+        return QgsCoordinateTransform(transform)
+
+    def clear(self):
+        with self._lock:
+            self._transforms.clear()
+
+    @staticmethod
+    def _key(crs):
+        # CRS objects are not hashable by value so use their definition
+        if isinstance(crs, QgsCoordinateReferenceSystem):
+            return crs.authid() or crs.toWkt()
+        return crs
+
+transform_cache = TransformCache()
+
 def transform_coords(y, x, crs):
-    coord_crs = QgsCoordinateReferenceSystem(crs)
-    transform = QgsCoordinateTransform(coord_crs, epsg4326, QgsProject.instance())
+    transform = transform_cache.get(crs, epsg4326)
     pt = transform.transform(x, y)
     return(pt.y(), pt.x())
 
 def transform_geom(geom, crs):
-    coord_crs = QgsCoordinateReferenceSystem(crs)
-    transform = QgsCoordinateTransform(coord_crs, epsg4326, QgsProject.instance())
+    transform = transform_cache.get(crs, epsg4326)
     geom = transform.transform(geom)
     return(geom)
 
 def InitShapeToolsFunctions():
+    # Cached transforms are only valid for the current datum transformations
+    QgsProject.instance().transformContextChanged.connect(transform_cache.clear)
     QgsExpression.registerFunction(st_from_meters)
     QgsExpression.registerFunction(st_to_meters)
     QgsExpression.registerFunction(st_geodesic_distance)
     QgsExpression.registerFunction(st_geodesic_bearing)
+    QgsExpression.registerFunction(st_geodesic_area)
     QgsExpression.registerFunction(st_geodesic_transform)
     QgsExpression.registerFunction(st_compass)
 
 def UnloadShapeToolsFunctions():
+    QgsProject.instance().transformContextChanged.disconnect(transform_cache.clear)
+    transform_cache.clear()
     QgsExpression.unregisterFunction('st_from_meters')
     QgsExpression.unregisterFunction('st_to_meters')
     QgsExpression.unregisterFunction('st_geodesic_distance')
     QgsExpression.unregisterFunction('st_geodesic_bearing')
+    QgsExpression.unregisterFunction('st_geodesic_area')
     QgsExpression.unregisterFunction('st_geodesic_transform')
     QgsExpression.unregisterFunction('st_compass')
 
@@ -313,6 +364,43 @@ def st_geodesic_bearing(values, feature, parent):
         parent.setEvalErrorString("Error: invalid  parameters")
         return
 
+@qgsfunction(-1, group=group_name)
+def st_geodesic_area(values, feature, parent):
+    """
+    Returns the geodesic area in square meters of a polygon geometry.
+
+    <h4>Syntax</h4>
+    <p><b>st_geodesic_area</b>( <i>geom[, crs='EPSG:4326']</i> )</p>
+
+    <h4>Arguments</h4>
+    <p><i>geom</i> &rarr; the polygon or multipolygon geometry. The area of any holes is excluded.</p>
+    <p><i>crs</i> &rarr; optional coordinate reference system of the geometry. Default value is 'EPSG:4326' if not specified.</p>
+
+    <h4>Example usage</h4>
+    <ul>
+      <li><b>st_geodesic_area</b>(<b>geom_from_wkt</b>('Polygon ((0 0, 1 0, 1 1, 0 1, 0 0))')) &rarr; 12308778361.469452</li>
+      <li><b>st_geodesic_area</b>($geometry, <b>layer_property</b>(@layer, 'crs'))</li>
+    </ul>
+    """
+    num_args = len(values)
+    if num_args < 1 or num_args > 2:
+        parent.setEvalErrorString("Error: invalid number of arguments")
+        return
+    try:
+        geom = QgsGeometry(values[0])
+        if geom.type() != QgsWkbTypes.PolygonGeometry:
+            parent.setEvalErrorString("Error: invalid polygon geometry")
+            return
+        if num_args == 2:
+            crs = values[1]
+            if crs and crs != 'EPSG:4326':
+                geom.transform(transform_cache.get(crs, epsg4326))
+        perimeter, area = geodesicPolygonMeasure(geom)
+        return(area)
+    except Exception:
+        parent.setEvalErrorString("Error: invalid parameters")
+        return
+
 @qgsfunction(args=-1, group=group_name)
 def st_geodesic_transform(values, feature, parent):
     """
@@ -371,9 +459,8 @@ def st_geodesic_transform(values, feature, parent):
         if num_args > 6:
             crs = values[6]
             
-        crs = QgsCoordinateReferenceSystem(crs)
-        geom_to_4326 = QgsCoordinateTransform(crs, epsg4326, QgsProject.instance())
-        to_crs = QgsCoordinateTransform(epsg4326, crs, QgsProject.instance())
+        geom_to_4326 = transform_cache.get(crs, epsg4326)
+        to_crs = transform_cache.get(epsg4326, crs)
 
 
         if unit == 'cm':
@@ -410,18 +497,14 @@ def st_geodesic_transform(values, feature, parent):
         ncy = new_centroid.y()
         ncx = new_centroid.x()
 
-        vertices = geom.vertices()
-        for vcnt, vertex in enumerate(vertices):
-            v = geom_to_4326.transform(vertex.x(), vertex.y())
-            gline = geod.Inverse(cy, cx, v.y(), v.x())
-            vdist = gline['s12']
-            vazi = gline['azi1']
-            if scale != 1:
-                vdist = vdist * scale
-            if rotate != 0:
-                vazi += rotate
-            g = geod.Direct(ncy, ncx, vazi, vdist, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-            new_vertex = to_crs.transform(g['lon2'], g['lat2'])
+        vertices = transformPoints(geom_to_4326, [QgsPointXY(vertex) for vertex in geom.vertices()])
+        vdists, vazis = geodesicInverse(cy, cx, [v.y() for v in vertices], [v.x() for v in vertices])
+        if scale != 1:
+            vdists = [vdist * scale for vdist in vdists]
+        if rotate != 0:
+            vazis = [vazi + rotate for vazi in vazis]
+        new_vertices = transformPoints(to_crs, geodesicFan(ncy, ncx, vazis, vdists))
+        for vcnt, new_vertex in enumerate(new_vertices):
             geom.moveVertex(new_vertex.x(), new_vertex.y(), vcnt)
         return(geom)
     except Exception:
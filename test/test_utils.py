@@ -0,0 +1,59 @@
+"""
+test_utils: test the antimeridian helpers of utils
+
+These tests need the QGIS python bindings and are skipped without them.
+Run them from the plugin directory with
+
+    python3 test/test_utils.py -v
+"""
+import importlib.util
+import os
+import sys
+import unittest
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    from qgis.core import QgsGeometry
+except ImportError:
+    QgsGeometry = None
+
+@unittest.skipIf(QgsGeometry is None, "QGIS is not available")
+class SplitAtAntimeridianTest(unittest.TestCase):
+
+    def setUp(self):
+        # Load the plugin as a package so that its relative imports resolve
+        global utils
+        if 'shapetools' not in sys.modules:
+            spec = importlib.util.spec_from_file_location(
+                'shapetools', os.path.join(PLUGIN_DIR, '__init__.py'), submodule_search_locations=[PLUGIN_DIR])
+            package = importlib.util.module_from_spec(spec)
+            sys.modules['shapetools'] = package
+            spec.loader.exec_module(package)
+        from shapetools import utils
+
+    def split(self, xs, ys):
+        return [[tuple(pt) for pt in part] for part in utils.splitAtAntimeridian(xs, ys)]
+
+    def test_crossing(self):
+        parts = self.split([170.0, -170.0], [0.0, 0.0])
+        self.assertEqual(len(parts), 2)
+        self.assertEqual(parts[0][-1][0], 180.0)
+        self.assertEqual(parts[1][0][0], -180.0)
+        self.assertEqual(parts[0][-1][1], parts[1][0][1])
+
+    def test_vertex_on_antimeridian(self):
+        # The vertex on the antimeridian ends one part and begins the next
+        parts = self.split([170.0, 180.0, -170.0], [10.0, 11.0, 12.0])
+        self.assertEqual(parts, [[(170.0, 10.0), (180.0, 11.0)], [(-180.0, 11.0), (-170.0, 12.0)]])
+
+    def test_end_on_antimeridian(self):
+        # A line that begins or ends on the antimeridian is not left with a
+        # part of a single vertex
+        parts = self.split([180.0, -170.0, -160.0], [10.0, 11.0, 12.0])
+        self.assertEqual(parts, [[(-180.0, 10.0), (-170.0, 11.0), (-160.0, 12.0)]])
+        parts = self.split([160.0, 170.0, -180.0], [10.0, 11.0, 12.0])
+        self.assertEqual(parts, [[(160.0, 10.0), (170.0, 11.0), (180.0, 12.0)]])
+
+if __name__ == '__main__':
+    unittest.main()
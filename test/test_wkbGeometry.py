@@ -0,0 +1,58 @@
+"""
+test_wkbGeometry: test the geometries built by wkbGeometry
+
+These tests need the QGIS python bindings and are skipped without them.
+Run them from the plugin directory with
+
+    python3 test/test_wkbGeometry.py -v
+"""
+import importlib.util
+import os
+import sys
+import unittest
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    from qgis.core import QgsGeometry
+except ImportError:
+    QgsGeometry = None
+
+@unittest.skipIf(QgsGeometry is None, "QGIS is not available")
+class PolygonGeometryTest(unittest.TestCase):
+
+    def setUp(self):
+        # Load the plugin as a package so that its relative imports resolve
+        global shapeWorkers, wkbGeometry
+        if 'shapetools' not in sys.modules:
+            spec = importlib.util.spec_from_file_location(
+                'shapetools', os.path.join(PLUGIN_DIR, '__init__.py'), submodule_search_locations=[PLUGIN_DIR])
+            package = importlib.util.module_from_spec(spec)
+            sys.modules['shapetools'] = package
+            spec.loader.exec_module(package)
+        from shapetools import shapeWorkers, wkbGeometry
+
+    def test_pie(self):
+        # A pie wedge ring ends at the center, not at its first arc vertex
+        azimuths = [10.0 + 7 * i for i in range(11)] + [80.0]
+        pts = wkbGeometry.flatCoords(shapeWorkers.fanCoords(40.0, 10.0, azimuths, [1e5] * len(azimuths)))
+        pts.extend((10.0, 40.0))
+        geom = wkbGeometry.polygonGeometry([pts])
+        self.assertTrue(geom.isGeosValid())
+        ring = geom.asPolygon()[0]
+        self.assertEqual(len(ring), len(pts) // 2 + 1)
+        self.assertEqual(ring[0], ring[-1])
+
+    def test_odd_segments(self):
+        # A curve drawn with an odd number of segments, with and without
+        # its closing vertex
+        azimuths, distances = shapeWorkers.heartPolar(1e5, 0.0, 7)
+        pts = wkbGeometry.flatCoords(shapeWorkers.fanCoords(40.0, 10.0, azimuths, distances))
+        for ring in (pts, pts[:-2]):
+            geom = wkbGeometry.polygonGeometry([ring])
+            self.assertTrue(geom.isGeosValid())
+            polygon = geom.asPolygon()[0]
+            self.assertEqual(polygon[0], polygon[-1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,7 +10,12 @@
 """
 import math
 import re
-from qgis.core import QgsUnitTypes, QgsPointXY
+from array import array
+from functools import lru_cache
+from itertools import chain, repeat
+from geographiclib.geodesic import Geodesic
+from geographiclib.geomath import Math
+from qgis.core import QgsUnitTypes, QgsPointXY, QgsGeometry, QgsLineString, QgsProcessingParameterDefinition, QgsProcessingParameterNumber
 from qgis.PyQt.QtCore import QCoreApplication
 
 from .settings import geod
@@ -23,6 +28,8 @@ DISTANCE_LABELS = [tr("Kilometers"), tr("Meters"), tr("Centimeters"), tr("Miles"
 
 DISTANCE_ABBREVIATIONS = ["km", "m", "cm", "mi", 'yd', "ft", "in", "nm"]
 
+AREA_LABELS = [tr("Square kilometers"), tr("Square meters"), tr("Hectares"), tr("Square miles"), tr("Square yards"), tr("Square feet"), tr("Acres"), tr("Square nautical miles")]
+
 def conversionToMeters(units):
     if units == 0:  # Kilometers
         measureFactor = 1000.0
@@ -61,6 +68,337 @@ def conversionFromMeters(units):
         measureFactor = QgsUnitTypes.fromUnitToUnitFactor(QgsUnitTypes.DistanceMeters, QgsUnitTypes.DistanceNauticalMiles)
     return measureFactor
 
+def areaConversionFromSquareMeters(units):
+    if units == 0:  # Square kilometers
+        measureFactor = 1e-6
+    elif units == 1:  # Square meters
+        measureFactor = 1.0
+    elif units == 2:  # Hectares
+        measureFactor = 1e-4
+    elif units == 3:  # Square miles
+        measureFactor = QgsUnitTypes.fromUnitToUnitFactor(QgsUnitTypes.AreaSquareMeters, QgsUnitTypes.AreaSquareMiles)
+    elif units == 4:  # Square yards
+        measureFactor = QgsUnitTypes.fromUnitToUnitFactor(QgsUnitTypes.AreaSquareMeters, QgsUnitTypes.AreaSquareYards)
+    elif units == 5:  # Square feet
+        measureFactor = QgsUnitTypes.fromUnitToUnitFactor(QgsUnitTypes.AreaSquareMeters, QgsUnitTypes.AreaSquareFeet)
+    elif units == 6:  # Acres
+        measureFactor = QgsUnitTypes.fromUnitToUnitFactor(QgsUnitTypes.AreaSquareMeters, QgsUnitTypes.AreaAcres)
+    elif units == 7:  # Square nautical miles
+        measureFactor = QgsUnitTypes.fromUnitToUnitFactor(QgsUnitTypes.AreaSquareMeters, QgsUnitTypes.AreaSquareNauticalMiles)
+    return measureFactor
+
+def transformPoints(transform, pts):
+    '''Transform a list of QgsPointXY with the QgsCoordinateTransform and
+    return the transformed points as a new list. The points are carried
+    through a single QgsGeometry.transform call rather than one transform
+    call per point.'''
+    if len(pts) < 2:
+        return [transform.transform(pt) for pt in pts]
+    geom = QgsGeometry.fromPolylineXY(pts)
+    geom.transform(transform)
+    return geom.asPolyline()
+
+def transformCoords(transform, xs, ys):
+    '''Transform the x and y coordinate sequences with the
+    QgsCoordinateTransform and return the transformed coordinates as two
+    lists. All of the coordinates are transformed in a single call.'''
+    line = QgsLineString(list(xs), list(ys))
+    line.transform(transform)
+    return line.xVector(), line.yVector()
+
+def fanAzimuths(spacing, start=0.0, stop=360.0):
+    '''Return the azimuths from start up to, but not including, stop in
+    increments of spacing. The angles are accumulated the same way as the
+    drawing loops of the shape algorithms so the vertex count is unchanged.'''
+    angles = []
+    angle = start
+    while angle < stop:
+        angles.append(angle)
+        angle += spacing
+    return angles
+
+def deviationSegments(radius, max_deviation, min_segments=4, max_segments=3600):
+    '''Return the number of segments needed to draw a full circle of radius
+    so that the sagitta of each chord, the largest distance between the chord
+    and the arc it replaces, is no more than max_deviation. Both values are in
+    meters.'''
+    if radius <= max_deviation:
+        return min_segments
+    segments = int(math.ceil(math.pi / math.acos(1.0 - max_deviation / radius)))
+    return min(max(segments, min_segments), max_segments)
+
+# The vectorized calls have a fixed cost that is only worth paying for at
+# least this many points
+MIN_ARRAY_SIZE = 16
+
+@lru_cache(maxsize=1)
+def arrayModules():
+    '''Return numpy and the arrayGeodesic module, or None for either when numpy
+    is not installed. They are imported the first time they are needed rather
+    than when the plugin is loaded, as arrayGeodesic may load a second copy of
+    geographiclib.'''
+    try:
+        import numpy
+    except ImportError:
+        return None, None
+    from . import arrayGeodesic
+    return numpy, arrayGeodesic if arrayGeodesic.available else None
+
+def geodesicFan(lat, lon, azimuths, distances, geodesic=geod):
+    '''Solve the direct geodesic problem from (lat, lon) for each azimuth and
+    distance pair and return the end points as a list of QgsPointXY. Either
+    azimuths or distances may be a single value. When numpy is available all
+    of the points are solved in one vectorized DirectFan call.'''
+    arrays = arrayModules()[1]
+    if arrays is not None:
+        g = arrays.DirectFan(geodesic, lat, lon, azimuths, distances, Geodesic.LATITUDE | Geodesic.LONGITUDE)
+        return [QgsPointXY(x, y) for x, y in zip(g['lon2'].tolist(), g['lat2'].tolist())]
+    if not hasattr(azimuths, '__len__'):
+        azimuths = [azimuths] * len(distances)
+    elif not hasattr(distances, '__len__'):
+        distances = [distances] * len(azimuths)
+    pts = []
+    for azimuth, distance in zip(azimuths, distances):
+        g = geodesic.Direct(lat, lon, azimuth, distance, Geodesic.LATITUDE | Geodesic.LONGITUDE)
+        pts.append(QgsPointXY(g['lon2'], g['lat2']))
+    return pts
+
+def geodesicFanCoords(lat, lon, azimuths, distances, geodesic=geod):
+    '''Return the same points as geodesicFan for lists of azimuths and
+    distances as a flat array('d') of x, y values. More than a few points are
+    solved in one vectorized DirectFan call when numpy is available.'''
+    np, arrays = arrayModules()
+    if len(azimuths) >= MIN_ARRAY_SIZE and arrays is not None:
+        g = arrays.DirectFan(geodesic, lat, lon, azimuths, distances, Geodesic.LATITUDE | Geodesic.LONGITUDE)
+        xy = np.empty(2 * len(azimuths))
+        xy[0::2] = g['lon2']
+        xy[1::2] = g['lat2']
+        return array('d', xy.tobytes())
+    coords = array('d')
+    for azimuth, distance in zip(azimuths, distances):
+        g = geodesic.Direct(lat, lon, azimuth, distance, Geodesic.LATITUDE | Geodesic.LONGITUDE)
+        coords.append(g['lon2'])
+        coords.append(g['lat2'])
+    return coords
+
+@lru_cache(maxsize=256)
+def _circleTemplate(lat, azimuths, radius, a, f):
+    '''Return the latitudes and the longitude offsets of the points at radius
+    and azimuths about a center at (lat, 0) on the ellipsoid (a, f).'''
+    geodesic = geod if (a, f) == (geod.a, geod.f) else Geodesic(a, f)
+    pts = geodesicFan(lat, 0.0, list(azimuths), radius, geodesic)
+    return tuple(pt.y() for pt in pts), tuple(pt.x() for pt in pts)
+
+def geodesicCircle(lat, lon, azimuths, radius, geodesic=geod):
+    '''Return the points at radius from (lat, lon) for each of the azimuths as
+    a list of QgsPointXY. On an ellipsoid of revolution the circle only
+    depends on the latitude of the center, any other longitude is an exact
+    shift. The circle is therefore solved once for each latitude, radius,
+    azimuths and ellipsoid, kept in a bounded LRU cache, and translated to
+    the center longitude.'''
+    lats, offsets = _circleTemplate(float(lat), tuple(azimuths), float(radius), geodesic.a, geodesic.f)
+    return [QgsPointXY(Math.AngNormalize(lon + offset), y) for y, offset in zip(lats, offsets)]
+
+def geodesicCircleCoords(lat, lon, azimuths, radius, geodesic=geod):
+    '''Return the same points as geodesicCircle as a flat array('d') of x, y
+    values, ready for the array based helpers and to be packed into WKB.'''
+    np = arrayModules()[0]
+    lats, offsets = _circleTemplate(float(lat), tuple(azimuths), float(radius), geodesic.a, geodesic.f)
+    if np is not None:
+        xy = np.empty(2 * len(lats))
+        lons = np.remainder(np.add(offsets, lon), 360)
+        lons[lons > 180] -= 360
+        xy[0::2] = lons
+        xy[1::2] = lats
+        return array('d', xy.tobytes())
+    return array('d', chain.from_iterable((Math.AngNormalize(lon + offset), y) for y, offset in zip(lats, offsets)))
+
+def _fanGrid(lat, lon, azimuths, distances, geodesic=geod):
+    '''Return the longitudes and latitudes of the points at each of the
+    distances along the geodesic leaving (lat, lon) at each of the azimuths,
+    indexed by distance then azimuth. Every azimuth defines one geodesic that
+    all of the distances share, so it is set up once and the distances are
+    evaluated as positions along it. When numpy is available the azimuths are
+    broadcast against the distances in one vectorized DirectFan call and
+    numpy arrays are returned.'''
+    arrays = arrayModules()[1]
+    if len(azimuths) * len(distances) >= MIN_ARRAY_SIZE and arrays is not None:
+        g = arrays.DirectFan(geodesic, lat, lon, [azimuths], [[d] for d in distances], Geodesic.LATITUDE | Geodesic.LONGITUDE)
+        return g['lon2'], g['lat2']
+    lons = [[] for d in distances]
+    lats = [[] for d in distances]
+    for azimuth in azimuths:
+        gline = geodesic.Line(lat, lon, azimuth, Geodesic.LATITUDE | Geodesic.LONGITUDE | Geodesic.DISTANCE_IN)
+        for i, d in enumerate(distances):
+            g = gline.Position(d, Geodesic.LATITUDE | Geodesic.LONGITUDE)
+            lons[i].append(g['lon2'])
+            lats[i].append(g['lat2'])
+    return lons, lats
+
+@lru_cache(maxsize=64)
+def _ringsTemplate(lat, azimuths, radii, a, f):
+    '''Return the latitudes and the longitude offsets of the points at each of
+    the radii and azimuths about a center at (lat, 0) on the ellipsoid (a, f),
+    indexed by radius then azimuth.'''
+    geodesic = geod if (a, f) == (geod.a, geod.f) else Geodesic(a, f)
+    offsets, lats = _fanGrid(lat, 0.0, azimuths, radii, geodesic)
+    return lats, offsets
+
+def geodesicRingsCoords(lat, lon, azimuths, radii, geodesic=geod):
+    '''Return the points at each of the azimuths about (lat, lon) for every
+    one of the radii as a list with a flat array('d') of x, y values for each
+    radius. The geodesic of each azimuth is shared by all of the rings, and
+    as with geodesicCircleCoords the rings are solved once for each latitude
+    and translated to the center longitude.'''
+    np = arrayModules()[0]
+    if not radii:
+        return []
+    lats, offsets = _ringsTemplate(float(lat), tuple(azimuths), tuple(float(r) for r in radii), geodesic.a, geodesic.f)
+    if np is not None:
+        xy = np.empty((len(radii), 2 * len(azimuths)))
+        lons = np.remainder(np.add(offsets, lon), 360)
+        lons[lons > 180] -= 360
+        xy[:, 0::2] = lons
+        xy[:, 1::2] = lats
+        return [array('d', row.tobytes()) for row in xy]
+    return [array('d', chain.from_iterable((Math.AngNormalize(lon + offset), y) for y, offset in zip(ys, xs))) for ys, xs in zip(lats, offsets)]
+
+def geodesicRadialsCoords(lat, lon, azimuths, distances, geodesic=geod):
+    '''Return the points at each of the distances along the geodesic leaving
+    (lat, lon) at each of the azimuths as a list with a flat array('d') of
+    x, y values for each azimuth.'''
+    np = arrayModules()[0]
+    lons, lats = _fanGrid(lat, lon, azimuths, distances, geodesic)
+    if np is not None and isinstance(lons, np.ndarray):
+        xy = np.empty((len(azimuths), 2 * len(distances)))
+        xy[:, 0::2] = lons.T
+        xy[:, 1::2] = lats.T
+        return [array('d', row.tobytes()) for row in xy]
+    return [array('d', chain.from_iterable(zip(x, y))) for x, y in zip(zip(*lons), zip(*lats))]
+
+def geodesicLinePoints(gline, distances, unroll=True):
+    '''Return the points at each of the distances along the GeodesicLine
+    gline as a list of QgsPointXY. If unroll is True the longitudes are
+    unrolled, otherwise they are reduced to [-180, 180]. When numpy is
+    available all of the points are found in one vectorized Positions call.'''
+    arrays = arrayModules()[1]
+    outmask = Geodesic.LATITUDE | Geodesic.LONGITUDE
+    if unroll:
+        outmask |= Geodesic.LONG_UNROLL
+    if arrays is not None:
+        g = arrays.Positions(gline, distances, outmask)
+        return [QgsPointXY(x, y) for x, y in zip(g['lon2'].tolist(), g['lat2'].tolist())]
+    pts = []
+    for s in distances:
+        g = gline.Position(s, outmask)
+        pts.append(QgsPointXY(g['lon2'], g['lat2']))
+    return pts
+
+def geodesicLinePositions(gline, distances):
+    '''Return the lists of latitudes, longitudes and azimuths of the line at
+    each of the distances along the GeodesicLine gline. When numpy is
+    available more than a few positions are found in one vectorized Positions
+    call.'''
+    arrays = arrayModules()[1]
+    outmask = Geodesic.LATITUDE | Geodesic.LONGITUDE | Geodesic.AZIMUTH
+    if len(distances) >= MIN_ARRAY_SIZE and arrays is not None:
+        g = arrays.Positions(gline, distances, outmask)
+        return g['lat2'].tolist(), g['lon2'].tolist(), g['azi2'].tolist()
+    lats = []
+    lons = []
+    azis = []
+    for s in distances:
+        g = gline.Position(s, outmask)
+        lats.append(g['lat2'])
+        lons.append(g['lon2'])
+        azis.append(g['azi2'])
+    return lats, lons, azis
+
+def geodesicLineCoords(gline, distances, unroll=True):
+    '''Return the points at each of the distances along the GeodesicLine
+    gline as a flat array('d') of x, y values, ready to be packed into WKB
+    without creating a QgsPointXY for each vertex. The longitudes are
+    unrolled or reduced as in geodesicLinePoints.'''
+    arrays = arrayModules()[1]
+    outmask = Geodesic.LATITUDE | Geodesic.LONGITUDE
+    if unroll:
+        outmask |= Geodesic.LONG_UNROLL
+    if arrays is not None:
+        g = arrays.Positions(gline, distances, outmask)
+        return array('d', chain.from_iterable(zip(g['lon2'].tolist(), g['lat2'].tolist())))
+    coords = array('d')
+    for s in distances:
+        g = gline.Position(s, outmask)
+        coords.append(g['lon2'])
+        coords.append(g['lat2'])
+    return coords
+
+def geodesicInverse(lat1, lon1, lat2, lon2, geodesic=geod):
+    '''Solve the inverse geodesic problem between each pair of points and
+    return the lists of distances and of initial azimuths. Any of the
+    coordinates may be a single value, which is paired with every point. When
+    numpy is available more than a few pairs are solved in one vectorized
+    InverseArray call.'''
+    arrays = arrayModules()[1]
+    coords = [lat1, lon1, lat2, lon2]
+    cnt = max([len(c) for c in coords if hasattr(c, '__len__')] + [1])
+    if cnt >= MIN_ARRAY_SIZE and arrays is not None:
+        g = arrays.InverseArray(geodesic, lat1, lon1, lat2, lon2, Geodesic.DISTANCE | Geodesic.AZIMUTH)
+        return g['s12'].ravel().tolist(), g['azi1'].ravel().tolist()
+    coords = [c if hasattr(c, '__len__') else [c] * cnt for c in coords]
+    distances = []
+    azimuths = []
+    for y1, x1, y2, x2 in zip(*coords):
+        g = geodesic.Inverse(y1, x1, y2, x2, Geodesic.DISTANCE | Geodesic.AZIMUTH)
+        distances.append(g['s12'])
+        azimuths.append(g['azi1'])
+    return distances, azimuths
+
+def geodesicRingMeasure(lats, lons, geodesic=geod):
+    '''Return the geodesic perimeter in meters and the area in square meters
+    of the ring through the EPSG:4326 coordinates. The edges are summed in
+    the accumulators of a PolygonArea. When numpy is available more than a
+    few vertices are added in one vectorized AddPoints call.'''
+    arrays = arrayModules()[1]
+    n = len(lats)
+    if n > 1 and lats[0] == lats[-1] and lons[0] == lons[-1]:
+        n -= 1  # The closing vertex repeats the first one
+    if n >= MIN_ARRAY_SIZE and arrays is not None:
+        poly = arrays.Polygon(geodesic)
+        arrays.AddPoints(poly, lats[:n], lons[:n])
+    else:
+        poly = geodesic.Polygon(False)
+        for i in range(n):
+            poly.AddPoint(lats[i], lons[i])
+    num, perimeter, area = poly.Compute(False, True)
+    return perimeter, abs(area)
+
+def geodesicPolygonMeasure(geom, geodesic=geod):
+    '''Return the geodesic perimeter in meters and area in square meters of
+    a polygon or multipolygon QgsGeometry in EPSG:4326. The area of each hole
+    is removed from the area of its polygon and the perimeter includes the
+    holes. The rings are read straight from the geometry without creating a
+    QgsPointXY for each vertex.'''
+    area = 0.0
+    perimeter = 0.0
+    polygon = geom.constGet()
+    if geom.isMultipart():
+        parts = [polygon.geometryN(i) for i in range(polygon.partCount())]
+    else:
+        parts = [polygon]
+    for part in parts:
+        for i in range(part.numInteriorRings() + 1):
+            ring = part.exteriorRing() if i == 0 else part.interiorRing(i - 1)
+            if not isinstance(ring, QgsLineString):
+                ring = ring.curveToLine()
+            ring_perimeter, ring_area = geodesicRingMeasure(ring.yVector(), ring.xVector(), geodesic)
+            perimeter += ring_perimeter
+            if i == 0:
+                area += ring_area
+            else:
+                area -= ring_area
+    return perimeter, area
+
 def hasIdlCrossing(pts):
     ptlen = len(pts)
     if(ptlen == 0):
@@ -89,75 +427,183 @@ def normalizeLongitude(pts):
     for i in range(ptlen):
         pts[i].setX((pts[i].x() + 180) % 360 - 180)
 
-def checkIdlCrossings(pts):
-    outseg = []
-    ptlen = len(pts)
-    pts2 = [pts[0]]
-    for i in range(1, ptlen):
-        if pts[i - 1].x() < -120 and pts[i].x() > 120:  # We have crossed the date line going west
-            ld = geod.Inverse(pts[i - 1].y(), pts[i - 1].x(), pts[i].y(), pts[i].x())
-            try:
-                (intrlat, intrlon) = intersection_point(-89, -180, 0, pts[i - 1].y(), pts[i - 1].x(), ld['azi1'])
-                ptnew = QgsPointXY(-180, intrlat)
-                pts2.append(ptnew)
-                outseg.append(pts2)
-                ptnew = QgsPointXY(180, intrlat)
-                pts2 = [ptnew]
-            except Exception:
-                pts2.append(pts[i])
-        if pts[i - 1].x() > 120 and pts[i].x() < -120:  # We have crossed the date line going east
-            ld = geod.Inverse(pts[i - 1].y(), pts[i - 1].x(), pts[i].y(), pts[i].x())
-            try:
-                (intrlat, intrlon) = intersection_point(-89, 180, 0, pts[i - 1].y(), pts[i - 1].x(), ld['azi1'])
-                ptnew = QgsPointXY(180, intrlat)
-                pts2.append(ptnew)
-                outseg.append(pts2)
-                ptnew = QgsPointXY(-180, intrlat)
-                pts2 = [ptnew]
-            except Exception:
-                pts2.append(pts[i])
+def hasIdlCrossingCoords(coords):
+    '''Return whether the line through the flat array('d') of x, y values
+    crosses the antimeridian, which it does where consecutive longitudes
+    differ by more than 180 degrees. All of the longitudes are compared in
+    one NumPy expression.'''
+    np = arrayModules()[0]
+    if len(coords) < 4:
+        return False
+    if np is not None:
+        lons = np.frombuffer(coords)[0::2]
+        return bool(np.any(np.abs(np.diff(lons)) > 180))
+    lons = coords[0::2]
+    return any(abs(x - x_last) > 180 for x_last, x in zip(lons, lons[1:]))
+
+def makeIdlCrossingsPositiveCoords(coords, force=False):
+    '''Shift the negative longitudes of the flat array('d') of x, y values
+    by 360 degrees in place if the line crosses the antimeridian or force is
+    True, so that the shape is drawn as one piece.'''
+    np = arrayModules()[0]
+    if force or hasIdlCrossingCoords(coords):
+        if np is not None:
+            lons = np.frombuffer(coords)[0::2]
+            lons[lons < 0] += 360
         else:
-            pts2.append(pts[i])
-    outseg.append(pts2)
-
-    return(outseg)
-
-def intersection_point(lat1, lon1, bearing1, lat2, lon2, bearing2):
-    o1 = math.radians(lat1)
-    lam1 = math.radians(lon1)
-    o2 = math.radians(lat2)
-    lam2 = math.radians(lon2)
-    bo_13 = math.radians(bearing1)
-    bo_23 = math.radians(bearing2)
-
-    diff_fo = o2 - o1
-    diff_la = lam2 - lam1
-    d12 = 2 * math.asin(math.sqrt(math.sin(diff_fo / 2) * math.sin(diff_fo / 2) + math.cos(o1) * math.cos(o2) * math.sin(diff_la / 2) * math.sin(diff_la / 2)))
-    if d12 == 0:  # intersection_not_found
-        raise ValueError('Intersection not found')
-
-    bo_1 = math.acos((math.sin(o2) - math.sin(o1) * math.cos(d12)) / (math.sin(d12) * math.cos(o1)))
-    bo_2 = math.acos((math.sin(o1) - math.sin(o2) * math.cos(d12)) / (math.sin(d12) * math.cos(o2)))
-    if math.sin(lam2 - lam1) > 0:
-        bo_12 = bo_1
-        bo_21 = 2 * math.pi - bo_2
+            for i in range(0, len(coords), 2):
+                if coords[i] < 0:
+                    coords[i] += 360
+
+def normalizeLongitudeCoords(coords):
+    '''Reduce the longitudes of the flat array('d') of x, y values to the
+    range [-180, 180) in place.'''
+    np = arrayModules()[0]
+    if np is not None:
+        lons = np.frombuffer(coords)[0::2]
+        lons[:] = (lons + 180) % 360 - 180
+    else:
+        for i in range(0, len(coords), 2):
+            coords[i] = (coords[i] + 180) % 360 - 180
+
+def shapeGeometry(coords, shape_type, transform=None, close=False):
+    '''Return the QgsGeometry of a shape from the flat array('d') of x, y
+    values of its vertices, a polygon if shape_type is 0 and otherwise a line.
+    A shape that crosses the antimeridian is shifted to positive longitudes so
+    that it is drawn as one piece, and if close is True the first vertex is
+    repeated at the end unless the last one already matches it. If transform
+    is given the geometry is transformed with it as it is built.'''
+    from .wkbGeometry import polylineGeometry, polygonGeometry
+    makeIdlCrossingsPositiveCoords(coords)
+    if close and coords[0:2] != coords[-2:]:
+        coords.extend(coords[0:2])
+    if shape_type == 0:
+        return polygonGeometry([coords], transform)
+    return polylineGeometry(coords, transform)
+
+def polarShapeGeometry(lat, lon, azimuths, distances, shape_type, transform=None, close=False, geodesic=geod):
+    '''Return the geometry of a shape given by the azimuth and distance from
+    its center at (lat, lon) of each of its vertices, as returned by the polar
+    shape functions of shapeWorkers. The vertices are projected with
+    geodesicFanCoords and built into a geometry with shapeGeometry.'''
+    return shapeGeometry(geodesicFanCoords(lat, lon, azimuths, distances, geodesic), shape_type, transform, close)
+
+def antimeridianLatitudes(lat1, lon1, lat2, lon2, geodesic=geod):
+    '''Return the latitudes at which the geodesics from each (lat1, lon1) to
+    (lat2, lon2) cross the antimeridian. The longitudes are in the range
+    [-180, 180] and each pair of points is on either side of it. The crossing
+    is found on the ellipsoid by solving for the distance along the geodesic
+    where its unrolled longitude reaches 180 or -180. The longitude changes
+    at the rate sin(azimuth) divided by the radius of the parallel, which
+    gives Newton steps; as the longitude is monotonic along the geodesic, a
+    step that leaves the bracket about the crossing is replaced by bisection.
+    If NumPy is available all of the geodesics are solved together.'''
+    np, arrays = arrayModules()
+    e2 = geodesic.f * (2 - geodesic.f)
+    outmask = Geodesic.LATITUDE | Geodesic.LONGITUDE | Geodesic.AZIMUTH | Geodesic.LONG_UNROLL
+    if len(lat1) >= MIN_ARRAY_SIZE and arrays is not None:
+        lat1 = np.asarray(lat1, dtype=float)
+        lon1 = np.asarray(lon1, dtype=float)
+        inv = arrays.InverseArray(geodesic, lat1, lon1, lat2, lon2, Geodesic.DISTANCE | Geodesic.AZIMUTH)
+        side = np.where(lon1 > 0, 180.0, -180.0)
+        lo = np.zeros(len(lat1))
+        hi = inv['s12']
+        # Start from where the crossing is if the longitude changes linearly
+        s = hi * (side - lon1) / (np.asarray(lon2, dtype=float) + 2 * side - lon1)
+        for _ in range(64):
+            g = arrays.DirectArray(geodesic, lat1, lon1, inv['azi1'], s, outmask)
+            err = np.radians(g['lon2'] - side)
+            if np.all((np.abs(err) < 1e-14) | (hi - lo < 1e-9)):
+                break
+            before = err * side < 0
+            lo = np.where(before, s, lo)
+            hi = np.where(before, hi, s)
+            slat = np.sin(np.radians(g['lat2']))
+            radius = geodesic.a * np.cos(np.radians(g['lat2'])) / np.sqrt(1 - e2 * slat * slat)
+            sazi = np.sin(np.radians(g['azi2']))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                s = s - err * radius / sazi
+            s = np.where((s > lo) & (s < hi), s, (lo + hi) / 2)
+        return g['lat2']
+    lats = []
+    for y1, x1, y2, x2 in zip(lat1, lon1, lat2, lon2):
+        inv = geodesic.Inverse(y1, x1, y2, x2, Geodesic.DISTANCE | Geodesic.AZIMUTH)
+        side = 180.0 if x1 > 0 else -180.0
+        lo = 0.0
+        hi = inv['s12']
+        s = hi * (side - x1) / (x2 + 2 * side - x1)
+        for _ in range(64):
+            g = geodesic.Direct(y1, x1, inv['azi1'], s, outmask)
+            err = math.radians(g['lon2'] - side)
+            if abs(err) < 1e-14 or hi - lo < 1e-9:
+                break
+            if err * side < 0:
+                lo = s
+            else:
+                hi = s
+            slat = math.sin(math.radians(g['lat2']))
+            radius = geodesic.a * math.cos(math.radians(g['lat2'])) / math.sqrt(1 - e2 * slat * slat)
+            sazi = math.sin(math.radians(g['azi2']))
+            s = s - err * radius / sazi if sazi != 0 else lo
+            if not lo < s < hi:
+                s = (lo + hi) / 2
+        lats.append(g['lat2'])
+    return lats
+
+def splitAtAntimeridian(xs, ys, geodesic=geod):
+    '''Split the line with the longitudes xs and latitudes ys, in the range
+    [-180, 180], where its geodesic segments cross the antimeridian. A
+    segment crosses it when its longitudes differ by more than 180 degrees.
+    Both parts end on the antimeridian at the exact crossing latitude. A part
+    left with a single vertex, by a line that begins or ends on the
+    antimeridian, is dropped. Returns a list of the parts as NumPy arrays of
+    x, y rows, or as lists of (x, y) tuples if NumPy is not available.'''
+    np = arrayModules()[0]
+    if np is not None:
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        coords = np.column_stack((xs, ys))
+        crossings = np.flatnonzero(np.abs(np.diff(xs)) > 180)
     else:
-        bo_12 = 2 * math.pi - bo_1
-        bo_21 = bo_2
-    a_1 = ((bo_13 - bo_12 + math.pi) % (2 * math.pi)) - math.pi
-    a_2 = ((bo_21 - bo_23 + math.pi) % (2 * math.pi)) - math.pi
-    if (math.sin(a_1) == 0) and (math.sin(a_2) == 0):  # infinite intersections
-        raise ValueError('Intersection not found')
-    if math.sin(a_1) * math.sin(a_2) < 0:  # ambiguous intersection
-        raise ValueError('Intersection not found')
-
-    a_3 = math.acos(-math.cos(a_1) * math.cos(a_2) + math.sin(a_1) * math.sin(a_2) * math.cos(d12))
-    be_13 = math.atan2(math.sin(d12) * math.sin(a_1) * math.sin(a_2), math.cos(a_2) + math.cos(a_1) * math.cos(a_3))
-    fo_3 = math.asin(math.sin(o1) * math.cos(be_13) + math.cos(o1) * math.sin(be_13) * math.cos(bo_13))
-    diff_lam13 = math.atan2(math.sin(bo_13) * math.sin(be_13) * math.cos(o1), math.cos(be_13) - math.sin(o1) * math.sin(fo_3))
-    la_3 = lam1 + diff_lam13
-
-    return (math.degrees(fo_3), math.degrees(la_3))
+        xs = list(xs)
+        ys = list(ys)
+        coords = list(zip(xs, ys))
+        crossings = [i for i in range(len(xs) - 1) if abs(xs[i + 1] - xs[i]) > 180]
+    if len(crossings) == 0:
+        return [coords]
+    after = [i + 1 for i in crossings]
+    lats = antimeridianLatitudes(
+        [ys[i] for i in crossings], [xs[i] for i in crossings],
+        [ys[i] for i in after], [xs[i] for i in after], geodesic)
+    parts = []
+    start = 0
+    begin = []
+    for i, lat in zip(crossings, lats):
+        side = 180.0 if xs[i] > 0 else -180.0
+        # A vertex already on the antimeridian is where the line crosses it
+        if xs[i] == side:
+            lat = ys[i]
+        elif xs[i + 1] == -side:
+            lat = ys[i + 1]
+        end = [(side, lat)] if (xs[i], ys[i]) != (side, lat) else []
+        parts.append(joinCoords(begin, coords[start:i + 1], end))
+        begin = [(-side, lat)] if (xs[i + 1], ys[i + 1]) != (-side, lat) else []
+        start = i + 1
+    parts.append(joinCoords(begin, coords[start:], []))
+    return [part for part in parts if len(part) >= 2]
+
+def joinCoords(begin, coords, end):
+    np = arrayModules()[0]
+    if np is not None:
+        return np.concatenate((np.reshape(begin, (-1, 2)), coords, np.reshape(end, (-1, 2))))
+    return begin + coords + end
+
+def checkIdlCrossings(pts):
+    '''Split the list of QgsPointXY where it crosses the antimeridian and
+    return the parts as lists of QgsPointXY.'''
+    np = arrayModules()[0]
+    parts = splitAtAntimeridian([pt.x() for pt in pts], [pt.y() for pt in pts])
+    return [[QgsPointXY(x, y) for x, y in (part.tolist() if np is not None else part)] for part in parts]
 
 def GCdistanceTo(lat1, lon1, lat2, lon2, R=6371000.0):
     '''Compute the distance between two points. The average earth
@@ -324,3 +770,163 @@ def parseDMS(str, hemisphere):
     if hemisphere == 'S' or hemisphere == 'W':
         deg = -deg
     return deg
+
+def parallelWorkersParameter(name):
+    '''Return the advanced processing parameter that sets the number of
+    worker processes used to generate the shapes. 0 or 1 keeps the shapes in
+    the QGIS process.'''
+    param = QgsProcessingParameterNumber(
+        name,
+        tr('Number of parallel worker processes (0 to disable)'),
+        QgsProcessingParameterNumber.Integer,
+        defaultValue=0,
+        minValue=0,
+        optional=True)
+    param.setFlags(param.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+    return param
+
+def maxDeviationParameter(name):
+    '''Return the processing parameter for the maximum deviation in meters
+    between a curve and its drawing segments. When it is greater than 0 it
+    replaces the fixed number of drawing segments and the count is chosen for
+    each shape from its radius.'''
+    return QgsProcessingParameterNumber(
+        name,
+        tr('Maximum deviation in meters (0 to use the number of drawing segments)'),
+        QgsProcessingParameterNumber.Double,
+        defaultValue=0,
+        minValue=0,
+        optional=True)
+
+class ParallelShapes():
+    '''Generate the shapes of a point source in a pool of worker processes
+    ahead of processFeature. The features are read in chunks with their own
+    iterator; while processFeature consumes one chunk the workers are already
+    generating the next one. func is one of the shapeWorkers functions and it
+    is called with the center latitude and longitude followed by params. The
+    pool is shut down once the last chunk has been collected, when the
+    algorithm is canceled or if the pool fails, after which coords returns
+    None and the algorithm generates the shapes itself.'''
+    def __init__(self, source, geom_to_4326, func, params, workers, chunk_size=2000):
+        # The worker pool is only imported by the algorithms that use it
+        from concurrent.futures import ProcessPoolExecutor
+        from .shapeWorkers import mpContext
+        self.geom_to_4326 = geom_to_4326
+        self.func = func
+        self.params = tuple(params)
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.num_failed = 0
+        self.iterator = source.getFeatures()
+        self.executor = ProcessPoolExecutor(workers, mp_context=mpContext())
+        self.results = {}
+        self.pending = self.submit()
+
+    def submit(self):
+        fids = []
+        args = []
+        for feature in self.iterator:
+            try:
+                pt = feature.geometry().asPoint()
+                if self.geom_to_4326:
+                    pt = self.geom_to_4326.transform(pt.x(), pt.y())
+            except Exception:
+                continue
+            fids.append(feature.id())
+            args.append((pt.y(), pt.x()) + self.params)
+            if len(fids) >= self.chunk_size:
+                break
+        if not fids:
+            return None
+        from .shapeWorkers import callShape
+        chunksize = max(1, len(args) // (self.workers * 4))
+        return fids, self.executor.map(callShape, repeat(self.func), args, chunksize=chunksize)
+
+    def coords(self, feature, feedback):
+        '''Return the (x, y) coordinates generated for feature or None if they
+        are not available, in which case the caller computes them itself.'''
+        if feedback.isCanceled():
+            self.shutdown(wait=False)
+            return None
+        fid = feature.id()
+        if not self.results and self.pending:
+            # Only move on to the next chunk once this one has been used up so
+            # that a feature without a result does not skip the rest of it
+            fids, results = self.pending
+            try:
+                self.results = dict(zip(fids, results))
+            except Exception as e:
+                # A worker process died and took the pool with it
+                feedback.pushInfo(tr('The parallel workers failed ({}), the remaining features are processed without them').format(e))
+                self.num_failed += len(fids)
+                self.shutdown(wait=False)
+                return None
+            self.pending = self.submit()
+            if not self.pending:
+                self.shutdown()
+        if fid not in self.results:
+            return None
+        # Drop the results of the features before this one that were never asked for
+        key = next(iter(self.results))
+        while key != fid:
+            del self.results[key]
+            key = next(iter(self.results))
+        coords = self.results.pop(fid)
+        if coords is None:
+            self.num_failed += 1
+        return coords
+
+    def shutdown(self, wait=True):
+        if self.executor is None:
+            return
+        executor = self.executor
+        self.executor = None
+        self.pending = None
+        if wait:
+            executor.shutdown()
+        else:
+            try:
+                executor.shutdown(wait=False, cancel_futures=True)
+            except TypeError:
+                # cancel_futures requires Python 3.9
+                executor.shutdown(wait=False)
+
+    def close(self, feedback):
+        self.shutdown()
+        self.results = {}
+        if self.num_failed:
+            feedback.pushInfo(tr('{} features could not be generated by the parallel workers and were generated serially').format(self.num_failed))
+
+class BufferedSink():
+    '''Collect the features written to a QgsFeatureSink and add them in
+    chunks with addFeatures rather than with one addFeature call each. The
+    buffer is flushed once it holds chunk_size features or, to bound the
+    memory it uses, once the geometries in it hold more than max_vertices
+    vertices. flush must be called when the algorithm has written its last
+    feature.'''
+    def __init__(self, sink, chunk_size=1000, max_vertices=1000000):
+        self.sink = sink
+        self.chunk_size = chunk_size
+        self.max_vertices = max_vertices
+        self.features = []
+        self.vertices = 0
+
+    def addFeature(self, feature):
+        self.features.append(feature)
+        geom = feature.geometry()
+        if not geom.isNull():
+            self.vertices += geom.constGet().nCoordinates()
+        if len(self.features) >= self.chunk_size or self.vertices > self.max_vertices:
+            self.flush()
+        return True
+
+    def addFeatures(self, features):
+        for feature in features:
+            self.addFeature(feature)
+        return True
+
+    def flush(self):
+        if self.features:
+            self.sink.addFeatures(self.features)
+            self.features = []
+        self.vertices = 0
@@ -0,0 +1,95 @@
+"""
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+
+Build the output geometries of the algorithms straight from their
+coordinates. The vertices are packed into a WKB byte string and the
+QgsGeometry is created with a single fromWkb call instead of converting a
+list of QgsPointXY one vertex at a time.
+"""
+import struct
+import sys
+from array import array
+from qgis.core import QgsGeometry
+
+# The coordinates are packed in the native byte order
+_BYTE_ORDER = 1 if sys.byteorder == 'little' else 0
+
+WKB_LINESTRING = 2
+WKB_POLYGON = 3
+WKB_MULTILINESTRING = 5
+WKB_MULTIPOLYGON = 6
+
+def flatCoords(pts):
+    '''Return the points as a flat array('d') of x, y values. pts may already
+    be a flat array('d'), in which case it is returned as is, a NumPy array
+    of shape (n, 2), or a sequence of QgsPointXY or (x, y) pairs.'''
+    if isinstance(pts, array):
+        return pts
+    if hasattr(pts, 'tobytes'):
+        # NumPy array
+        return array('d', pts.astype('d').tobytes())
+    coords = array('d')
+    for pt in pts:
+        if isinstance(pt, tuple):
+            coords.extend(pt)
+        else:
+            coords.append(pt.x())
+            coords.append(pt.y())
+    return coords
+
+def _header(wkb_type, count):
+    return struct.pack('=BII', _BYTE_ORDER, wkb_type, count)
+
+def _points(coords):
+    # A point count followed by the x, y values
+    coords = flatCoords(coords)
+    return struct.pack('=I', len(coords) // 2) + coords.tobytes()
+
+def lineStringWkb(coords):
+    coords = flatCoords(coords)
+    return _header(WKB_LINESTRING, len(coords) // 2) + coords.tobytes()
+
+def _ring(coords):
+    # A ring whose last vertex is not its first one is closed by repeating
+    # the first vertex, as QgsGeometry.fromPolygonXY does
+    coords = flatCoords(coords)
+    if len(coords) >= 4 and (coords[0] != coords[-2] or coords[1] != coords[-1]):
+        return struct.pack('=I', len(coords) // 2 + 1) + coords.tobytes() + coords[0:2].tobytes()
+    return _points(coords)
+
+def polygonWkb(rings):
+    return _header(WKB_POLYGON, len(rings)) + b''.join(_ring(ring) for ring in rings)
+
+def multiLineStringWkb(lines):
+    return _header(WKB_MULTILINESTRING, len(lines)) + b''.join(lineStringWkb(line) for line in lines)
+
+def multiPolygonWkb(polygons):
+    return _header(WKB_MULTIPOLYGON, len(polygons)) + b''.join(polygonWkb(rings) for rings in polygons)
+
+def geometryFromWkb(wkb, transform=None):
+    '''Return a QgsGeometry from the WKB bytes. If transform is given the
+    geometry is transformed with it in a single call.'''
+    geom = QgsGeometry()
+    geom.fromWkb(wkb)
+    if transform:
+        geom.transform(transform)
+    return geom
+
+def polylineGeometry(coords, transform=None):
+    return geometryFromWkb(lineStringWkb(coords), transform)
+
+def polygonGeometry(rings, transform=None):
+    return geometryFromWkb(polygonWkb(rings), transform)
+
+def multiPolylineGeometry(lines, transform=None):
+    return geometryFromWkb(multiLineStringWkb(lines), transform)
+
+def multiPolygonGeometry(polygons, transform=None):
+    return geometryFromWkb(multiPolygonWkb(polygons), transform)
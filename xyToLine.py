@@ -10,6 +10,11 @@
 """
 import os
 import math
+from collections import OrderedDict
+try:
+    import numpy as np
+except ImportError:
+    np = None
 from geographiclib.geodesic import Geodesic
 
 from qgis.core import QgsCoordinateTransform, QgsPointXY, QgsFeature, QgsGeometry, QgsProject, QgsWkbTypes
@@ -29,9 +34,74 @@ from qgis.core import (
     QgsProcessingParameterFeatureSink)
 
 from .settings import settings, epsg4326, geod
-from .utils import checkIdlCrossings, tr, GCgetPointsOnLine
+from . import arrayGeodesic
+from .utils import checkIdlCrossings, splitAtAntimeridian, tr, GCgetPointsOnLine, geodesicLinePoints, transformCoords, BufferedSink
+from .wkbGeometry import polylineGeometry, multiPolylineGeometry
 # import traceback
 
+# The number of rows read into arrays at a time by the vectorized path
+CHUNK_SIZE = 10000
+
+class LineCache():
+    '''A bounded cache of the line geometries built during one run of the
+    algorithm, so the line type, output CRS and segment settings are the same
+    for all of them. The lines are keyed on their starting and ending
+    coordinates in EPSG:4326 rounded to DECIMALS places. Once it holds
+    maxsize lines the least recently used one is dropped.'''
+    DECIMALS = 9
+
+    def __init__(self, maxsize=4096):
+        self.lines = OrderedDict()
+        self.maxsize = maxsize
+
+    def key(self, ptStart, ptEnd):
+        return (round(ptStart.x(), self.DECIMALS), round(ptStart.y(), self.DECIMALS),
+                round(ptEnd.x(), self.DECIMALS), round(ptEnd.y(), self.DECIMALS))
+
+    def get(self, key):
+        geom = self.lines.get(key)
+        if geom is not None:
+            self.lines.move_to_end(key)
+        return geom
+
+    def put(self, key, geom):
+        self.lines[key] = geom
+        if len(self.lines) > self.maxsize:
+            self.lines.popitem(last=False)
+
+def floatColumn(values):
+    '''Return the attribute values as a NumPy array of floats. Values that
+    can not be converted, including NULL, become NaN.'''
+    try:
+        return np.array(values, dtype=float)
+    except (TypeError, ValueError):
+        column = np.empty(len(values))
+        for i, value in enumerate(values):
+            try:
+                column[i] = float(value)
+            except Exception:
+                column[i] = np.nan
+        return column
+
+def transformColumns(transform, xs, ys):
+    '''Transform the coordinate arrays in one call. If that fails each point
+    is transformed on its own and those that fail become NaN.'''
+    try:
+        xs, ys = transformCoords(transform, xs, ys)
+        return np.array(xs), np.array(ys)
+    except Exception:
+        xs = xs.copy()
+        ys = ys.copy()
+        for i in range(len(xs)):
+            try:
+                pt = transform.transform(QgsPointXY(xs[i], ys[i]))
+                xs[i] = pt.x()
+                ys[i] = pt.y()
+            except Exception:
+                xs[i] = np.nan
+                ys[i] = np.nan
+        return xs, ys
+
 class XYToLineAlgorithm(QgsProcessingAlgorithm):
     """
     Algorithm for creating lines from two coordinates within a record.
@@ -205,12 +275,14 @@ class XYToLineAlgorithm(QgsProcessingAlgorithm):
             (lineSink, lineDest_id) = self.parameterAsSink(
                 parameters, self.PrmOutputLineLayer, context, source.fields(),
                 QgsWkbTypes.LineString, sinkCrs)
+        lineSink = BufferedSink(lineSink)
 
         skip_pt = True if self.PrmOutputPointLayer not in parameters or parameters[self.PrmOutputPointLayer] is None else False
         if (showStart or showEnd) and not skip_pt:
             (ptSink, ptDest_id) = self.parameterAsSink(
                 parameters, self.PrmOutputPointLayer, context, source.fields(),
                 QgsWkbTypes.Point, sinkCrs)
+            ptSink = BufferedSink(ptSink)
         else:
             if showStart or showEnd:
                 feedback.pushInfo(tr('Output point layer was set to [skip output]. No point layer will be generated.'))
@@ -227,6 +299,8 @@ class XYToLineAlgorithm(QgsProcessingAlgorithm):
             sourceTo4326 = QgsCoordinateTransform(sourceCrs, epsg4326, QgsProject.instance())
         if sinkCrs != epsg4326:
             toSinkCrs = QgsCoordinateTransform(epsg4326, sinkCrs, QgsProject.instance())
+        else:
+            toSinkCrs = None
 
         featureCount = source.featureCount()
         total = 100.0 / featureCount if featureCount else 0
@@ -235,7 +309,46 @@ class XYToLineAlgorithm(QgsProcessingAlgorithm):
         maxSegments = settings.maxSegments
         beginning_ending_same = False
 
-        iterator = source.getFeatures()
+        # Origin and destination pairs are often repeated so the lines that
+        # have been built are reused
+        self.cache = LineCache()
+
+        # When both points come from the attribute fields the rows are read
+        # in chunks and all of their lines are solved with array operations.
+        useArrays = (lineType != 1 and not startUseGeom and not endUseGeom and
+                     arrayGeodesic.available)
+        if useArrays:
+            fields = source.fields()
+            self.columns = [fields.indexOf(col) for col in (startXcol, startYcol, endXcol, endYcol)]
+            self.sourceTo4326 = sourceTo4326 if sourceCrs != epsg4326 else None
+            self.toSinkCrs = toSinkCrs
+            self.lineType = lineType
+            self.isMultiPart = isMultiPart
+            self.maxseglen = maxseglen
+            self.maxSegments = maxSegments
+            self.lineSink = lineSink
+            self.ptSink = ptSink if showStart or showEnd else None
+            self.showStart = showStart
+            self.showEnd = showEnd
+            iterator = []
+            chunk = []
+            for cnt, feature in enumerate(source.getFeatures()):
+                if (cnt % 100 == 0) and feedback.isCanceled():
+                    chunk = []
+                    break
+                chunk.append(feature.attributes())
+                if len(chunk) == CHUNK_SIZE:
+                    bad, same = self.processChunk(chunk)
+                    numBad += bad
+                    beginning_ending_same |= same
+                    chunk = []
+                    feedback.setProgress(int(cnt * total))
+            if chunk:
+                bad, same = self.processChunk(chunk)
+                numBad += bad
+                beginning_ending_same |= same
+        else:
+            iterator = source.getFeatures()
         for cnt, feature in enumerate(iterator):
             if (cnt % 100 == 0) and feedback.isCanceled():
                 break
@@ -262,40 +375,36 @@ class XYToLineAlgorithm(QgsProcessingAlgorithm):
                     beginning_ending_same = True
                     continue
 
-                if lineType == 0:  # Geodesic
-                    gline = geod.InverseLine(ptStart.y(), ptStart.x(), ptEnd.y(), ptEnd.x())
-                    if gline.s13 > maxseglen:
-                        n = int(math.ceil(gline.s13 / maxseglen))
-                        if n > maxSegments:
-                            n = maxSegments
-                        seglen = gline.s13 / n
-                        for i in range(1, n + 1):
-                            s = seglen * i
-                            g = gline.Position(s, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-                            pts.append(QgsPointXY(g['lon2'], g['lat2']))
-                    else:  # The line segment is too short so it is from ptStart to ptEnd
+                key = self.cache.key(ptStart, ptEnd)
+                geom = self.cache.get(key)
+                if geom is None:  # The line between these points has not been built yet
+                    if lineType == 0:  # Geodesic
+                        gline = geod.InverseLine(ptStart.y(), ptStart.x(), ptEnd.y(), ptEnd.x())
+                        if gline.s13 > maxseglen:
+                            n = int(math.ceil(gline.s13 / maxseglen))
+                            if n > maxSegments:
+                                n = maxSegments
+                            seglen = gline.s13 / n
+                            pts.extend(geodesicLinePoints(gline, [seglen * i for i in range(1, n + 1)], unroll=False))
+                        else:  # The line segment is too short so it is from ptStart to ptEnd
+                            pts.append(ptEnd)
+                    elif lineType == 1:  # Great circle
+                        pts = GCgetPointsOnLine(
+                            ptStart.y(), ptStart.x(),
+                            ptEnd.y(), ptEnd.x(),
+                            settings.maxSegLength * 1000.0,  # Put it in meters
+                            settings.maxSegments + 1)
+                    else:  # Simple line
                         pts.append(ptEnd)
-                elif lineType == 1:  # Great circle
-                    pts = GCgetPointsOnLine(
-                        ptStart.y(), ptStart.x(),
-                        ptEnd.y(), ptEnd.x(),
-                        settings.maxSegLength * 1000.0,  # Put it in meters
-                        settings.maxSegments + 1)
-                else:  # Simple line
-                    pts.append(ptEnd)
+                    # If the output crs is not 4326 the geometry is transformed to it as it is built
+                    if isMultiPart:
+                        outseg = checkIdlCrossings(pts)
+                        geom = multiPolylineGeometry(outseg, toSinkCrs)
+                    else:
+                        geom = polylineGeometry(pts, toSinkCrs)
+                    self.cache.put(key, geom)
                 f = QgsFeature()
-                if isMultiPart:
-                    outseg = checkIdlCrossings(pts)
-                    if sinkCrs != epsg4326:  # Convert each point to the output CRS
-                        for y in range(len(outseg)):
-                            for x, pt in enumerate(outseg[y]):
-                                outseg[y][x] = toSinkCrs.transform(pt)
-                    f.setGeometry(QgsGeometry.fromMultiPolylineXY(outseg))
-                else:
-                    if sinkCrs != epsg4326:  # Convert each point to the output CRS
-                        for x, pt in enumerate(pts):
-                            pts[x] = toSinkCrs.transform(pt)
-                    f.setGeometry(QgsGeometry.fromPolylineXY(pts))
+                f.setGeometry(geom)
                 f.setAttributes(feature.attributes())
                 lineSink.addFeature(f)
 
@@ -329,12 +438,131 @@ class XYToLineAlgorithm(QgsProcessingAlgorithm):
             feedback.pushInfo(tr("{} out of {} features from the input layer were invalid and were ignored.".format(numBad, featureCount)))
 
         r = {}
+        lineSink.flush()
         r[self.PrmOutputLineLayer] = lineDest_id
         if showStart or showEnd:
+            ptSink.flush()
             r[self.PrmOutputPointLayer] = ptDest_id
 
         return (r)
 
+    def processChunk(self, rows):
+        '''Create the lines and points for a chunk of attribute rows using
+        array operations. Returns the number of bad rows and whether any of
+        them began and ended at the same point.'''
+        x1, y1, x2, y2 = [floatColumn([row[i] for row in rows]) for i in self.columns]
+        if self.sourceTo4326:
+            x1, y1 = transformColumns(self.sourceTo4326, x1, y1)
+            x2, y2 = transformColumns(self.sourceTo4326, x2, y2)
+        valid = np.isfinite(x1) & np.isfinite(y1) & np.isfinite(x2) & np.isfinite(y2)
+        same = valid & (x1 == x2) & (y1 == y2)
+        valid &= ~same
+        numBad = len(rows) - int(np.count_nonzero(valid))
+        idx = np.flatnonzero(valid)
+        if len(idx) == 0:
+            return numBad, bool(same.any())
+        x1 = x1[idx]
+        y1 = y1[idx]
+        x2 = x2[idx]
+        y2 = y2[idx]
+
+        # Only the first row of each origin and destination pair that is not
+        # already in the cache has its line built
+        geoms = [None] * len(idx)
+        todo = {}
+        for i, key in enumerate(zip(*[np.round(c, LineCache.DECIMALS).tolist() for c in (x1, y1, x2, y2)])):
+            geom = self.cache.get(key)
+            if geom is None:
+                todo.setdefault(key, []).append(i)
+            else:
+                geoms[i] = geom
+        if todo:
+            first = np.array([positions[0] for positions in todo.values()])
+            for geom, (key, positions) in zip(
+                    self.buildLines(x1[first], y1[first], x2[first], y2[first]), todo.items()):
+                if geom is not None:
+                    self.cache.put(key, geom)
+                for i in positions:
+                    geoms[i] = geom
+
+        # The points that cannot be transformed to the output CRS are NaN
+        if self.ptSink is not None and self.toSinkCrs:
+            x1, y1 = transformColumns(self.toSinkCrs, x1, y1)
+            x2, y2 = transformColumns(self.toSinkCrs, x2, y2)
+        lines = []
+        points = []
+        for i, row in enumerate(idx):
+            if geoms[i] is None:
+                numBad += 1
+                continue
+            ends = []
+            if self.showStart:
+                ends.append((x1[i], y1[i]))
+            if self.showEnd:
+                ends.append((x2[i], y2[i]))
+            if not all(math.isfinite(x) and math.isfinite(y) for x, y in ends):
+                numBad += 1
+                continue
+            f = QgsFeature()
+            f.setGeometry(geoms[i])
+            f.setAttributes(rows[row])
+            lines.append(f)
+            # The start and end points of each row are written together as
+            # they are by the serial path
+            for x, y in ends:
+                f = QgsFeature()
+                f.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(x, y)))
+                f.setAttributes(rows[row])
+                points.append(f)
+        self.lineSink.addFeatures(lines)
+        if self.ptSink is not None:
+            self.ptSink.addFeatures(points)
+        return numBad, bool(same.any())
+
+    def buildLines(self, x1, y1, x2, y2):
+        '''Return the line geometries between the arrays of starting and
+        ending points in EPSG:4326 in the output CRS. A line that cannot be
+        transformed to the output CRS is returned as None.'''
+        # The number of segments of each line
+        if self.lineType == 0:  # Geodesic
+            inv = arrayGeodesic.InverseArray(geod, y1, x1, y2, x2, Geodesic.DISTANCE | Geodesic.AZIMUTH)
+            segments = np.clip(np.ceil(inv['s12'] / self.maxseglen), 1, self.maxSegments).astype(int)
+        else:  # Simple line
+            segments = np.ones(len(x1), dtype=int)
+        counts = segments + 1
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        xs = np.empty(int(counts.sum()))
+        ys = np.empty(len(xs))
+        xs[starts] = x1
+        ys[starts] = y1
+        xs[starts + segments] = x2
+        ys[starts + segments] = y2
+
+        # All of the vertices between the end points are solved together
+        inner = segments - 1
+        line = np.repeat(np.arange(len(x1)), inner)
+        if len(line):
+            k = np.arange(len(line)) - np.repeat(np.cumsum(inner) - inner, inner) + 1
+            dist = inv['s12'][line] / segments[line] * k
+            g = arrayGeodesic.DirectArray(geod, y1[line], x1[line], inv['azi1'][line], dist, Geodesic.LATITUDE | Geodesic.LONGITUDE)
+            xs[starts[line] + k] = g['lon2']
+            ys[starts[line] + k] = g['lat2']
+        coords = np.column_stack((xs, ys))
+
+        geoms = []
+        for start, count in zip(starts, counts):
+            pts = coords[start:start + count]
+            # If the output crs is not 4326 the geometry is transformed to it as it is built
+            try:
+                if self.isMultiPart:
+                    outseg = splitAtAntimeridian((pts[:, 0] + 180) % 360 - 180, pts[:, 1])
+                    geoms.append(multiPolylineGeometry(outseg, self.toSinkCrs))
+                else:
+                    geoms.append(polylineGeometry(pts, self.toSinkCrs))
+            except Exception:
+                geoms.append(None)
+        return geoms
+
     def name(self):
         return 'xy2line'
 